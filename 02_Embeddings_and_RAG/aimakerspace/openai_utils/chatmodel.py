@@ -1,4 +1,4 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 import os
 
@@ -11,6 +11,7 @@ class ChatOpenAI:
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         if self.openai_api_key is None:
             raise ValueError("OPENAI_API_KEY is not set")
+        self._async_client = None
 
     def run(self, messages, text_only: bool = True, **kwargs):
         if not isinstance(messages, list):
@@ -25,3 +26,26 @@ class ChatOpenAI:
             return response.choices[0].message.content
 
         return response
+
+    async def astream(self, messages, **kwargs):
+        if not isinstance(messages, list):
+            raise ValueError("messages must be a list")
+
+        # Reuse one async client so concurrent streams share a connection pool
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI()
+        client = self._async_client
+
+        stream = await client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            stream=True,
+            **kwargs
+        )
+
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content is not None:
+                yield content
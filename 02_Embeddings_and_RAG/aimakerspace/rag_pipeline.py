@@ -0,0 +1,173 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from aimakerspace.openai_utils.chatmodel import ChatOpenAI
+from aimakerspace.openai_utils.prompts import SystemRolePrompt, UserRolePrompt
+from aimakerspace.vectordatabase import VectorDatabase
+
+
+RAG_SYSTEM_TEMPLATE = """You are a knowledgeable assistant that answers questions based strictly on provided context.
+
+Instructions:
+- Only answer questions using information from the provided context
+- If the context doesn't contain relevant information, respond with "I don't know"
+- Be accurate and cite specific parts of the context when possible
+- Keep responses {response_style} and {response_length}
+- Only use the provided context. Do not use external knowledge.
+- Only provide answers when you are confident the context supports your response."""
+
+RAG_USER_TEMPLATE = """Context Information:
+{context}
+
+Number of relevant sources found: {context_count}
+{similarity_scores}
+
+Question: {user_query}
+
+Please provide your answer based solely on the context above."""
+
+
+class AsyncRetrievalAugmentedQAPipeline:
+    """Async version of the notebook's RetrievalAugmentedQAPipeline.
+
+    Stages run as a pipeline over a batch of questions: one batched embedding
+    call for all queries, one vectorized similarity search for the whole batch,
+    then streamed generations running concurrently under a semaphore.
+    Every result carries a ``timings`` dict (seconds) for each stage.
+    """
+
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        vector_db_retriever: VectorDatabase,
+        response_style: str = "detailed",
+        include_scores: bool = False,
+        system_prompt: Optional[SystemRolePrompt] = None,
+        user_prompt: Optional[UserRolePrompt] = None,
+    ) -> None:
+        self.llm = llm
+        self.vector_db_retriever = vector_db_retriever
+        self.response_style = response_style
+        self.include_scores = include_scores
+        self.system_prompt = system_prompt or SystemRolePrompt(
+            RAG_SYSTEM_TEMPLATE,
+            strict=True,
+            defaults={"response_style": "concise", "response_length": "brief"},
+        )
+        self.user_prompt = user_prompt or UserRolePrompt(
+            RAG_USER_TEMPLATE,
+            strict=True,
+            defaults={"context_count": "", "similarity_scores": ""},
+        )
+
+    async def arun_pipeline(self, user_query: str, k: int = 4, **system_kwargs) -> dict:
+        results = await self.arun_many([user_query], k=k, max_concurrency=1, **system_kwargs)
+        return results[0]
+
+    async def arun_many(
+        self,
+        questions: List[str],
+        max_concurrency: int = 8,
+        k: int = 4,
+        **system_kwargs,
+    ) -> List[dict]:
+        if not questions:
+            return []
+
+        # Stage 1: embed every query in a single batched request
+        start = time.perf_counter()
+        query_vectors = await self.vector_db_retriever.embedding_model.async_get_embeddings(
+            list(questions)
+        )
+        embed_time = time.perf_counter() - start
+
+        # Stage 2: one matrix product scores every query against every chunk
+        start = time.perf_counter()
+        context_lists = self.vector_db_retriever.search_many(query_vectors, k=k)
+        search_time = time.perf_counter() - start
+
+        # Stage 3: stream generations concurrently, bounded by max_concurrency
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run_one(user_query: str, context_list) -> dict:
+            start = time.perf_counter()
+            prompts = self._format_prompts(user_query, context_list, **system_kwargs)
+            format_time = time.perf_counter() - start
+
+            async with semaphore:
+                start = time.perf_counter()
+                first_token_time = None
+                chunks = []
+                async for chunk in self.llm.astream([prompts["system"], prompts["user"]]):
+                    if first_token_time is None:
+                        first_token_time = time.perf_counter() - start
+                    chunks.append(chunk)
+                generate_time = time.perf_counter() - start
+
+            similarity_scores = [
+                f"Source {i}: {score:.3f}" for i, (_, score) in enumerate(context_list, 1)
+            ]
+            return {
+                "response": "".join(chunks),
+                "context": context_list,
+                "context_count": len(context_list),
+                "similarity_scores": similarity_scores if self.include_scores else None,
+                "prompts_used": prompts,
+                "timings": {
+                    # Embedding and search are shared by the batch; each question reports the batch cost
+                    "embed": embed_time,
+                    "search": search_time,
+                    "format": format_time,
+                    "time_to_first_token": first_token_time,
+                    "generate": generate_time,
+                },
+            }
+
+        return await asyncio.gather(
+            *[run_one(query, contexts) for query, contexts in zip(questions, context_lists)]
+        )
+
+    def _format_prompts(self, user_query: str, context_list, **system_kwargs) -> Dict[str, dict]:
+        context_prompt = ""
+        similarity_scores = []
+
+        for i, (context, score) in enumerate(context_list, 1):
+            context_prompt += f"[Source {i}]: {context}\n\n"
+            similarity_scores.append(f"Source {i}: {score:.3f}")
+
+        formatted_system_prompt = self.system_prompt.create_message(
+            response_style=self.response_style,
+            response_length=system_kwargs.get("response_length", "detailed"),
+        )
+        formatted_user_prompt = self.user_prompt.create_message(
+            user_query=user_query,
+            context=context_prompt.strip(),
+            context_count=len(context_list),
+            similarity_scores=(
+                f"Relevance scores: {', '.join(similarity_scores)}" if self.include_scores else ""
+            ),
+        )
+        return {"system": formatted_system_prompt, "user": formatted_user_prompt}
+
+
+if __name__ == "__main__":
+    from aimakerspace.text_utils import CharacterTextSplitter, TextFileLoader
+
+    documents = TextFileLoader("data/PMarcaBlogs.txt").load_documents()
+    chunks = CharacterTextSplitter().split_texts(documents)
+    vector_db = asyncio.run(VectorDatabase().abuild_from_list(chunks))
+
+    pipeline = AsyncRetrievalAugmentedQAPipeline(
+        llm=ChatOpenAI(), vector_db_retriever=vector_db, include_scores=True
+    )
+    questions = [
+        "What is the 'Michael Eisner Memorial Weak Executive Problem'?",
+        "How should a startup think about hiring?",
+        "What does the author say about product/market fit?",
+    ]
+    start = time.perf_counter()
+    results = asyncio.run(pipeline.arun_many(questions, max_concurrency=3, k=3))
+    print(f"Answered {len(results)} questions in {time.perf_counter() - start:.2f}s")
+    for question, result in zip(questions, results):
+        print(f"\nQ: {question}\nA: {result['response'][:200]}\nTimings: {result['timings']}")
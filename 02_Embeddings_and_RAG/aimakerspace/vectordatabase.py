@@ -33,6 +33,31 @@ class VectorDatabase:
         ]
         return sorted(scores, key=lambda x: x[1], reverse=True)[:k]
 
+    def search_many(
+        self,
+        query_vectors: np.array,
+        k: int,
+    ) -> List[List[Tuple[str, float]]]:
+        """Cosine-similarity top-k for a batch of query vectors in one matrix product."""
+        if not self.vectors:
+            return [[] for _ in range(len(query_vectors))]
+
+        keys = list(self.vectors.keys())
+        matrix = np.array([self.vectors[key] for key in keys], dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        queries = np.array(query_vectors, dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        scores = queries @ matrix.T
+        k = min(k, len(keys))
+        top_k = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+        results = []
+        for row, candidates in zip(scores, top_k):
+            ranked = candidates[np.argsort(-row[candidates])]
+            results.append([(keys[i], float(row[i])) for i in ranked])
+        return results
+
     def search_by_text(
         self,
         query_text: str,
@@ -0,0 +1,156 @@
+"""In-process BM25 keyword retrieval and reciprocal-rank fusion with dense search.
+
+Dense embeddings blur exact identifiers such as loan program names and form
+numbers. `BM25Index` scores the same chunks lexically. It is built once from
+the chunk list into flat numpy postings arrays, sorted by term id, so a query
+reads only the postings of its own terms. `HybridRetriever` runs BM25 alongside the
+dense retriever and merges both rankings with `reciprocal_rank_fusion`.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# Hyphenated/dotted identifiers ("1098-e", "2025-26") stay whole as well as being split
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i if in is it its of on "
+    "or that the their this to was what when where which who will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens; hyphenated identifiers also contribute their parts."""
+    tokens: List[str] = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        if "-" in token or "." in token:
+            tokens.extend(part for part in re.split(r"[-.]", token) if part and part not in _STOPWORDS)
+    return tokens
+
+
+def doc_key(doc: Document) -> Hashable:
+    """Identity of a chunk across retrievers, which return separate Document objects."""
+    return doc.metadata.get("source"), doc.metadata.get("page"), doc.page_content
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents.
+
+    - k1, b: the usual BM25 term-frequency saturation and length normalization.
+
+    Postings are stored as flat arrays (doc ids and precomputed term-frequency
+    weights, sliced by per-term offsets), so scoring a query costs one vectorized
+    add per query term.
+    """
+
+    def __init__(self, documents: Sequence[Document], *, k1: float = 1.5, b: float = 0.75) -> None:
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+
+        vocabulary: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        lengths = np.zeros(len(self.documents), dtype=np.float32)
+        for doc_id, doc in enumerate(self.documents):
+            tokens = tokenize(doc.page_content)
+            lengths[doc_id] = len(tokens)
+            for token in tokens:
+                term_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                doc_ids.append(doc_id)
+
+        self.vocabulary = vocabulary
+        n_docs = max(len(self.documents), 1)
+        # Collapse (term, doc) occurrences into unique pairs with counts, grouped by term
+        pairs = np.array(term_ids, dtype=np.int64) * n_docs + np.array(doc_ids, dtype=np.int64)
+        unique_pairs, tf = np.unique(pairs, return_counts=True)
+        posting_terms = unique_pairs // n_docs
+        self._posting_docs = (unique_pairs % n_docs).astype(np.int32)
+        self._offsets = np.searchsorted(posting_terms, np.arange(len(vocabulary) + 1))
+
+        df = np.diff(self._offsets).astype(np.float32)
+        self._idf = np.log1p((len(self.documents) - df + 0.5) / (df + 0.5)).astype(np.float32)
+        average_length = float(lengths.mean()) if len(lengths) else 0.0
+        norm = k1 * (1 - b + b * lengths / (average_length or 1.0))
+        tf = tf.astype(np.float32)
+        # Precompute each posting's term-frequency component; queries only add idf-weighted rows
+        self._posting_weights = tf * (k1 + 1) / (tf + norm[self._posting_docs])
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for `query`."""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for token in set(tokenize(query)):
+            term_id = self.vocabulary.get(token)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            # Doc ids are unique within a posting list, so plain fancy-index addition is safe
+            scores[self._posting_docs[start:end]] += self._idf[term_id] * self._posting_weights[start:end]
+        return scores
+
+    def search(self, query: str, k: int = 4) -> List[Document]:
+        """Top-`k` documents by BM25 score, skipping documents with no matching term."""
+        if not self.documents:
+            return []
+        scores = self.scores(query)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.documents[i] for i in top if scores[i] > 0]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], *, k: int = 60) -> List[Document]:
+    """Merge ranked lists by summing 1 / (k + rank); documents are matched with `doc_key`."""
+    fused: Dict[Hashable, float] = {}
+    first_seen: Dict[Hashable, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc_key(doc)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+            first_seen.setdefault(key, doc)
+    return [first_seen[key] for key in sorted(fused, key=fused.get, reverse=True)]
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense retriever + `BM25Index`, fused with reciprocal rank fusion.
+
+    Configure `dense` to return `candidates` results; BM25 contributes the same
+    number, and the top `k` fused documents are returned.
+    """
+
+    dense: Optional[BaseRetriever] = None
+    bm25: Any
+    k: int = 4
+    candidates: int = 10
+    rrf_k: int = 60
+
+    def _fuse(self, query: str, dense_docs: List[Document]) -> List[Document]:
+        keyword_docs = self.bm25.search(query, self.candidates)
+        return reciprocal_rank_fusion([dense_docs, keyword_docs], k=self.rrf_k)[: self.k]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        dense_docs = self.dense.invoke(query) if self.dense else []
+        return self._fuse(query, dense_docs)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        dense_docs = await self.dense.ainvoke(query) if self.dense else []
+        return self._fuse(query, dense_docs)
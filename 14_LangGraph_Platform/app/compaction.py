@@ -0,0 +1,334 @@
+"""Token-budgeted compaction of the message history sent to the model.
+
+`add_messages` only appends, so every agent step would otherwise resend the
+whole thread. `MessageCompactor.compact` builds the list actually sent to the
+model; the checkpointed state is left untouched:
+
+1. Leading system messages, the first user message and the most recent
+   `keep_recent` messages are kept verbatim.
+2. Older `ToolMessage` payloads above `max_tool_tokens` are cut to a head plus
+   a note saying how much was elided. The tool_call_id is kept, so message
+   pairing stays valid.
+3. If the result is still over `token_budget`, the older turns are replaced by
+   one summary message (when a summarizer model is configured) or dropped,
+   oldest first.
+
+Each call logs tokens before/after; `stats()` aggregates them.
+
+14_LangGraph_Platform and 15_A2A_LangGraph each ship this file as `app/compaction.py`:
+they are separate projects with their own environments and no shared package.
+Keep the two copies identical.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import (
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message framing overhead in OpenAI chat formats
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = (
+    "Summarize the earlier part of this conversation for an assistant that will continue it. "
+    "Keep facts, figures, names, sources and open questions; drop pleasantries. "
+    "Use at most {max_words} words."
+)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """Load the tiktoken encoding once; None (cached) if it cannot be loaded, e.g. offline."""
+    try:
+        import tiktoken
+
+        return tiktoken.encoding_for_model("gpt-4o")
+    except Exception:
+        logger.warning("tiktoken encoding unavailable; estimating history tokens as chars/4")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """tiktoken count, or a chars/4 estimate when the encoding cannot be loaded."""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def _text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        text = content
+    else:
+        text = " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps([{"name": c["name"], "args": c["args"]} for c in tool_calls], default=str)
+    return text
+
+
+@dataclass
+class CompactionReport:
+    """What one `compact` call did to the outgoing message list."""
+
+    tokens_before: int
+    tokens_after: int
+    messages_before: int
+    messages_after: int
+    collapsed_tool_messages: int = 0
+    summarized_messages: int = 0
+    dropped_messages: int = 0
+
+
+class MessageCompactor:
+    """Shrinks a message history to a token budget before it is sent to the model.
+
+    - token_budget: target size of the outgoing history, in tokens.
+    - keep_recent: number of trailing messages always sent verbatim.
+    - max_tool_tokens: older tool results longer than this are truncated.
+    - summarizer: optional chat model; when set, turns that still do not fit are
+      summarized instead of dropped. Summaries are cached per message span.
+    - token_counter: text -> token count (default: tiktoken for gpt-4o).
+    """
+
+    def __init__(
+        self,
+        *,
+        token_budget: int = 6000,
+        keep_recent: int = 6,
+        max_tool_tokens: int = 400,
+        summarizer: Any = None,
+        summary_words: int = 200,
+        token_counter: Callable[[str], int] = count_tokens,
+    ) -> None:
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.max_tool_tokens = max_tool_tokens
+        self.summarizer = summarizer
+        self.summary_words = summary_words
+        self.token_counter = token_counter
+        self._token_cache: OrderedDict[str, int] = OrderedDict()
+        self._summaries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._totals = {"steps": 0, "compacted_steps": 0, "tokens_before": 0, "tokens_after": 0}
+
+    # --- token accounting -------------------------------------------------------
+
+    def message_tokens(self, message: BaseMessage) -> int:
+        text = _text(message)
+        key = f"{message.id}:{len(text)}" if message.id else None
+        if key is not None:
+            with self._lock:
+                cached = self._token_cache.get(key)
+            if cached is not None:
+                return cached
+        tokens = self.token_counter(text) + _MESSAGE_OVERHEAD_TOKENS
+        if key is not None:
+            with self._lock:
+                self._token_cache[key] = tokens
+                while len(self._token_cache) > 4096:
+                    self._token_cache.popitem(last=False)
+        return tokens
+
+    def count(self, messages: Sequence[BaseMessage]) -> int:
+        return sum(self.message_tokens(m) for m in messages)
+
+    # --- planning ---------------------------------------------------------------
+
+    def _split(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], List[BaseMessage], List[BaseMessage]]:
+        """Return (head, middle, recent); only `middle` may be rewritten."""
+        head_end = 0
+        while head_end < len(messages) and isinstance(messages[head_end], SystemMessage):
+            head_end += 1
+        if head_end < len(messages) and isinstance(messages[head_end], HumanMessage):
+            head_end += 1
+        recent_start = max(head_end, len(messages) - self.keep_recent)
+        # Never separate tool results from the AI message that requested them
+        while recent_start > head_end and isinstance(messages[recent_start], ToolMessage):
+            recent_start -= 1
+        return messages[:head_end], messages[head_end:recent_start], messages[recent_start:]
+
+    def _collapse_tool_message(self, message: ToolMessage) -> ToolMessage:
+        text = _text(message)
+        tokens = self.token_counter(text)
+        if tokens <= self.max_tool_tokens:
+            return message
+        # Proportional character cut keeps this cheap; exactness is not needed for an excerpt
+        head = text[: max(1, len(text) * self.max_tool_tokens // tokens)].rstrip()
+        note = f"\n[... {tokens - self.max_tool_tokens} more tokens of this {message.name or 'tool'} result elided]"
+        return message.model_copy(update={"content": head + note})
+
+    @staticmethod
+    def _turns(middle: List[BaseMessage]) -> List[List[BaseMessage]]:
+        """Group messages so an AI tool-call message and its tool results move together."""
+        turns: List[List[BaseMessage]] = []
+        for message in middle:
+            if isinstance(message, ToolMessage) and turns:
+                turns[-1].append(message)
+            else:
+                turns.append([message])
+        return turns
+
+    def _summary_key(self, messages: Sequence[BaseMessage]) -> str:
+        digest = hashlib.sha256()
+        for message in messages:
+            digest.update(f"{message.type}\x00{_text(message)}\x01".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _summary_request(self, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        transcript = "\n".join(f"{m.type}: {_text(m)}" for m in messages)
+        return [
+            SystemMessage(content=SUMMARY_PROMPT.format(max_words=self.summary_words)),
+            HumanMessage(content=transcript),
+        ]
+
+    @staticmethod
+    def _summary_message(summary: str, count: int) -> SystemMessage:
+        return SystemMessage(content=f"Summary of {count} earlier messages:\n{summary}")
+
+    def _cached_summary(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+            return summary
+
+    def _store_summary(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._summaries[key] = summary
+            while len(self._summaries) > 256:
+                self._summaries.popitem(last=False)
+
+    def _fit(
+        self, head: List[BaseMessage], middle: List[BaseMessage], recent: List[BaseMessage], report: CompactionReport
+    ) -> Tuple[List[BaseMessage], List[BaseMessage]]:
+        """Drop the oldest middle turns until the history fits; return (kept, removed)."""
+        fixed = self.count(head) + self.count(recent)
+        if fixed + self.count(middle) <= self.token_budget:
+            return middle, []
+        if self.summarizer is not None:
+            # Leave room for the summary that will replace the removed turns
+            fixed += 2 * self.summary_words
+        turns = self._turns(middle)
+        removed: List[BaseMessage] = []
+        while turns and fixed + sum(self.count(t) for t in turns) > self.token_budget:
+            removed.extend(turns.pop(0))
+        report.dropped_messages = len(removed)
+        return [m for turn in turns for m in turn], removed
+
+    def _finish(self, report: CompactionReport, compacted: List[BaseMessage]) -> List[BaseMessage]:
+        report.tokens_after = self.count(compacted)
+        report.messages_after = len(compacted)
+        with self._lock:
+            self._totals["steps"] += 1
+            self._totals["compacted_steps"] += report.tokens_after < report.tokens_before
+            self._totals["tokens_before"] += report.tokens_before
+            self._totals["tokens_after"] += report.tokens_after
+        # Steps where nothing needed compacting are only interesting when debugging
+        log = logger.info if report.tokens_after < report.tokens_before else logger.debug
+        log(
+            "History compaction: %d -> %d tokens (%d -> %d messages; %d tool results collapsed, "
+            "%d summarized, %d dropped)",
+            report.tokens_before,
+            report.tokens_after,
+            report.messages_before,
+            report.messages_after,
+            report.collapsed_tool_messages,
+            report.summarized_messages,
+            report.dropped_messages,
+        )
+        return compacted
+
+    def _plan(self, messages: Sequence[BaseMessage]):
+        messages = list(messages)
+        report = CompactionReport(
+            tokens_before=self.count(messages),
+            tokens_after=0,
+            messages_before=len(messages),
+            messages_after=0,
+        )
+        head, middle, recent = self._split(messages)
+        if not middle:
+            return report, head, [], recent, []
+        collapsed = []
+        for message in middle:
+            if isinstance(message, ToolMessage):
+                new = self._collapse_tool_message(message)
+                report.collapsed_tool_messages += new is not message
+                message = new
+            collapsed.append(message)
+        kept, removed = self._fit(head, collapsed, recent, report)
+        return report, head, kept, recent, removed
+
+    # --- public API -------------------------------------------------------------
+
+    def compact(self, messages: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], CompactionReport]:
+        """Return the history to send to the model and a report of what changed."""
+        report, head, kept, recent, removed = self._plan(messages)
+        summary: List[BaseMessage] = []
+        if removed and self.summarizer is not None:
+            key = self._summary_key(removed)
+            text = self._cached_summary(key)
+            if text is None:
+                text = str(self.summarizer.invoke(self._summary_request(removed)).content)
+                self._store_summary(key, text)
+            summary = [self._summary_message(text, len(removed))]
+            report.summarized_messages, report.dropped_messages = len(removed), 0
+        return self._finish(report, head + summary + kept + recent), report
+
+    async def acompact(self, messages: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], CompactionReport]:
+        """Async variant of `compact`; only the summarizer call is awaited."""
+        report, head, kept, recent, removed = self._plan(messages)
+        summary: List[BaseMessage] = []
+        if removed and self.summarizer is not None:
+            key = self._summary_key(removed)
+            text = self._cached_summary(key)
+            if text is None:
+                text = str((await self.summarizer.ainvoke(self._summary_request(removed))).content)
+                self._store_summary(key, text)
+            summary = [self._summary_message(text, len(removed))]
+            report.summarized_messages, report.dropped_messages = len(removed), 0
+        return self._finish(report, head + summary + kept + recent), report
+
+    def stats(self) -> Dict[str, float]:
+        """Steps seen, steps compacted, and tokens sent before vs after compaction."""
+        with self._lock:
+            totals = dict(self._totals)
+        steps = totals["steps"] or 1
+        return {
+            **totals,
+            "tokens_saved": totals["tokens_before"] - totals["tokens_after"],
+            "mean_tokens_before": totals["tokens_before"] / steps,
+            "mean_tokens_after": totals["tokens_after"] / steps,
+        }
+
+
+def compactor_from_env(summarizer_factory: Optional[Callable[[], Any]] = None) -> MessageCompactor:
+    """Build a `MessageCompactor` from HISTORY_* environment variables.
+
+    - HISTORY_TOKEN_BUDGET (6000), HISTORY_KEEP_RECENT (6), HISTORY_TOOL_TOKENS (400).
+    - HISTORY_SUMMARIZE=1 summarizes older turns with `summarizer_factory()`
+      instead of dropping them.
+    """
+    summarize = os.environ.get("HISTORY_SUMMARIZE", "0").lower() in ("1", "true", "yes")
+    return MessageCompactor(
+        token_budget=int(os.environ.get("HISTORY_TOKEN_BUDGET", "6000")),
+        keep_recent=int(os.environ.get("HISTORY_KEEP_RECENT", "6")),
+        max_tool_tokens=int(os.environ.get("HISTORY_TOOL_TOKENS", "400")),
+        summarizer=summarizer_factory() if summarize and summarizer_factory else None,
+    )
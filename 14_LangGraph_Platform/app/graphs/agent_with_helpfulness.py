@@ -1,34 +1,68 @@
 """An agent graph with a post-response helpfulness check loop.
 
-After the agent responds, a secondary node evaluates helpfulness ('Y'/'N').
+After the agent responds, a secondary node evaluates helpfulness ('Y'/'N')
+with a tiered evaluator: cached verdicts and clear-cut heuristic cases skip
+the LLM judge entirely (see app.helpfulness).
 If helpful, end; otherwise, continue the loop or terminate after a safe limit.
 """
 from __future__ import annotations
 
+import logging
+import os
+from functools import lru_cache
 from typing import Dict, Any
 
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import AIMessage
 
+from app.helpfulness import HelpfulnessEvaluator
 from app.state import AgentState
-from app.models import get_chat_model
-from app.tools import get_tool_belt
+from app.models import get_chat_model, get_message_compactor, get_model_with_tools, get_single_flight
+from app.tools import get_tool_belt, get_tool_node
+from app.rag import warm_up
+from app.single_flight import first_turn_key
+
+logger = logging.getLogger(__name__)
 
 
 def _build_model_with_tools():
-    """Return a chat model instance bound to the current tool belt."""
-    model = get_chat_model()
-    return model.bind_tools(get_tool_belt())
+    """Return the shared chat model bound to the current tool belt."""
+    return get_model_with_tools(get_tool_belt())
+
+
+def _single_flight_key(state: AgentState):
+    """Key shared by identical first-turn histories on the same model and tool belt."""
+    tools = [tool.name for tool in get_tool_belt()]
+    return first_turn_key(state["messages"], os.environ.get("OPENAI_MODEL", ""), tools)
 
 
 def call_model(state: AgentState) -> Dict[str, Any]:
-    """Invoke the model with the accumulated messages and append its response."""
+    """Invoke the model with the compacted message history and append its response.
+
+    Identical first-turn calls already in flight are joined instead of repeated.
+    """
+    model = _build_model_with_tools()
+
+    def respond():
+        messages, _ = get_message_compactor().compact(state["messages"])
+        return model.invoke(messages)
+
+    response = get_single_flight().run_sync(_single_flight_key(state), respond)
+    return {"messages": [response]}
+
+
+async def acall_model(state: AgentState) -> Dict[str, Any]:
+    """Async variant of `call_model`, used when the graph runs via ainvoke/astream."""
     model = _build_model_with_tools()
-    messages = state["messages"]
-    response = model.invoke(messages)
+
+    async def respond():
+        messages, _ = await get_message_compactor().acompact(state["messages"])
+        return await model.ainvoke(messages)
+
+    response = await get_single_flight().run(_single_flight_key(state), respond)
     return {"messages": [response]}
 
 
@@ -40,6 +74,33 @@ def route_to_action_or_helpfulness(state: AgentState):
     return "helpfulness"
 
 
+HELPFULNESS_PROMPT = """
+  Given an initial query and a final response, determine if the final response is extremely helpful or not. Please indicate helpfulness with a 'Y' and unhelpfulness as an 'N'. Reply with the single letter only.
+
+  Initial Query:
+  {initial_query}
+
+  Final Response:
+  {final_response}"""
+
+
+@lru_cache(maxsize=1)
+def _get_helpfulness_chain():
+    """Return the prompt | model | parser judge chain, built once.
+
+    The judge only has to emit 'Y' or 'N', so generation is capped at one token.
+    """
+    helpfulness_prompt_template = PromptTemplate.from_template(HELPFULNESS_PROMPT)
+    helpfulness_check_model = get_chat_model(model_name="gpt-4.1-mini").bind(max_tokens=1)
+    return helpfulness_prompt_template | helpfulness_check_model | StrOutputParser()
+
+
+@lru_cache(maxsize=1)
+def get_helpfulness_evaluator() -> HelpfulnessEvaluator:
+    """Return the shared tiered evaluator; its metrics() accumulate across runs."""
+    return HelpfulnessEvaluator(_get_helpfulness_chain())
+
+
 def helpfulness_node(state: AgentState) -> Dict[str, Any]:
     """Evaluate helpfulness of the latest response relative to the initial query."""
     # If we've exceeded loop limit, short-circuit with END decision marker
@@ -49,29 +110,23 @@ def helpfulness_node(state: AgentState) -> Dict[str, Any]:
     initial_query = state["messages"][0]
     final_response = state["messages"][-1]
 
-    prompt_template = """
-  Given an initial query and a final response, determine if the final response is extremely helpful or not. Please indicate helpfulness with a 'Y' and unhelpfulness as an 'N'.
+    evaluator = get_helpfulness_evaluator()
+    decision = evaluator.evaluate(initial_query.content, final_response.content)
+    logger.info("Helpfulness %s; evaluator metrics: %s", decision, evaluator.metrics())
+    return {"messages": [AIMessage(content=f"HELPFULNESS:{decision}")]}
 
-  Initial Query:
-  {initial_query}
 
-  Final Response:
-  {final_response}"""
-
-    helpfulness_prompt_template = PromptTemplate.from_template(prompt_template)
-    helpfulness_check_model = get_chat_model(model_name="gpt-4.1-mini")
-    helpfulness_chain = (
-        helpfulness_prompt_template | helpfulness_check_model | StrOutputParser()
-    )
+async def ahelpfulness_node(state: AgentState) -> Dict[str, Any]:
+    """Async variant of `helpfulness_node`; only an escalated judge call is awaited."""
+    if len(state["messages"]) > 10:
+        return {"messages": [AIMessage(content="HELPFULNESS:END")]}
 
-    helpfulness_response = helpfulness_chain.invoke(
-        {
-            "initial_query": initial_query.content,
-            "final_response": final_response.content,
-        }
-    )
+    initial_query = state["messages"][0]
+    final_response = state["messages"][-1]
 
-    decision = "Y" if "Y" in helpfulness_response else "N"
+    evaluator = get_helpfulness_evaluator()
+    decision = await evaluator.aevaluate(initial_query.content, final_response.content)
+    logger.info("Helpfulness %s; evaluator metrics: %s", decision, evaluator.metrics())
     return {"messages": [AIMessage(content=f"HELPFULNESS:{decision}")]}
 
 
@@ -91,10 +146,13 @@ def helpfulness_decision(state: AgentState):
 def build_graph():
     """Build an agent graph with an auxiliary helpfulness evaluation subgraph."""
     graph = StateGraph(AgentState)
-    tool_node = ToolNode(get_tool_belt())
-    graph.add_node("agent", call_model)
+    tool_node = get_tool_node().as_runnable("action")
+    graph.add_node("agent", RunnableLambda(call_model, afunc=acall_model, name="agent"))
     graph.add_node("action", tool_node)
-    graph.add_node("helpfulness", helpfulness_node)
+    graph.add_node(
+        "helpfulness",
+        RunnableLambda(helpfulness_node, afunc=ahelpfulness_node, name="helpfulness"),
+    )
     graph.set_entry_point("agent")
     graph.add_conditional_edges(
         "agent",
@@ -112,4 +170,7 @@ def build_graph():
 
 graph = build_graph().compile()
 
+# Load the RAG index in the background so the first tool call doesn't pay for ingest
+warm_up()
+
 
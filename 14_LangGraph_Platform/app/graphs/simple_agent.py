@@ -1,33 +1,61 @@
 """A minimal tool-using agent graph.
 
 The graph:
-- Calls a chat model bound to the tool belt.
-- If the last message requested tool calls, routes to a ToolNode.
+- Calls a chat model bound to the tool belt (async under the LangGraph server,
+  so a run awaits the LLM instead of holding a worker thread).
+- If the last message requested tool calls, routes to the parallel tool node.
 - Otherwise, terminates.
 """
 from __future__ import annotations
 
+import os
 from typing import Dict, Any
 
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 
 from app.state import AgentState
-from app.models import get_chat_model
-from app.tools import get_tool_belt
+from app.models import get_message_compactor, get_model_with_tools, get_single_flight
+from app.tools import get_tool_belt, get_tool_node
+from app.rag import warm_up
+from app.single_flight import first_turn_key
 
 
 def _build_model_with_tools():
-    """Return a chat model instance bound to the current tool belt."""
-    model = get_chat_model()
-    return model.bind_tools(get_tool_belt())
+    """Return the shared chat model bound to the current tool belt."""
+    return get_model_with_tools(get_tool_belt())
+
+
+def _single_flight_key(state: AgentState):
+    """Key shared by identical first-turn histories on the same model and tool belt."""
+    tools = [tool.name for tool in get_tool_belt()]
+    return first_turn_key(state["messages"], os.environ.get("OPENAI_MODEL", ""), tools)
 
 
 def call_model(state: AgentState) -> Dict[str, Any]:
-    """Invoke the model with the accumulated messages and append its response."""
+    """Invoke the model with the compacted message history and append its response.
+
+    Identical first-turn calls already in flight are joined instead of repeated.
+    """
+    model = _build_model_with_tools()
+
+    def respond():
+        messages, _ = get_message_compactor().compact(state["messages"])
+        return model.invoke(messages)
+
+    response = get_single_flight().run_sync(_single_flight_key(state), respond)
+    return {"messages": [response]}
+
+
+async def acall_model(state: AgentState) -> Dict[str, Any]:
+    """Async variant of `call_model`, used when the graph runs via ainvoke/astream."""
     model = _build_model_with_tools()
-    messages = state["messages"]
-    response = model.invoke(messages)
+
+    async def respond():
+        messages, _ = await get_message_compactor().acompact(state["messages"])
+        return await model.ainvoke(messages)
+
+    response = await get_single_flight().run(_single_flight_key(state), respond)
     return {"messages": [response]}
 
 
@@ -42,8 +70,8 @@ def should_continue(state: AgentState):
 def build_graph():
     """Build an agent graph that interleaves model and tool execution."""
     graph = StateGraph(AgentState)
-    tool_node = ToolNode(get_tool_belt())
-    graph.add_node("agent", call_model)
+    tool_node = get_tool_node().as_runnable("action")
+    graph.add_node("agent", RunnableLambda(call_model, afunc=acall_model, name="agent"))
     graph.add_node("action", tool_node)
     graph.set_entry_point("agent")
     # Explicitly map END sentinel to avoid KeyError('__end__') in platform runtime
@@ -55,4 +83,7 @@ def build_graph():
 # Export compiled graph for LangGraph Platform
 graph = build_graph().compile()
 
+# Load the RAG index in the background so the first tool call doesn't pay for ingest
+warm_up()
+
 
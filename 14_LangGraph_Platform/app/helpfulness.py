@@ -0,0 +1,175 @@
+"""Tiered helpfulness evaluation for agent responses.
+
+Asking an LLM judge for a single Y/N on every final answer roughly doubles the
+latency of simple questions. `HelpfulnessEvaluator` decides in three tiers:
+
+1. A verdict cache keyed by a hash of (query, response).
+2. A local heuristic scorer that settles clear cases: empty answers and short
+   refusals are unhelpful; substantial answers that cover the query's key terms
+   are helpful.
+3. Everything else escalates to the LLM judge, constrained to one output token.
+
+`metrics()` reports cache hits, escalation rate and the judge latency saved.
+
+14_LangGraph_Platform and 15_A2A_LangGraph each ship this file as `app/helpfulness.py`:
+they are separate projects with their own environments and no shared package.
+Keep the two copies identical.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can could did do does for from had has have how i if in "
+    "is it its me my of on or our should so than that the their them then there these "
+    "they this to was we were what when where which who why will with would you your "
+    "about any tell give find please latest recent".split()
+)
+
+_REFUSAL_PHRASES = (
+    "i don't know",
+    "i do not know",
+    "unable to find",
+    "could not find",
+    "couldn't find",
+    "no information",
+    "not able to",
+    "cannot help",
+    "can't help",
+    "please try again",
+)
+
+
+def _key_terms(text: str) -> set[str]:
+    return {w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+class HelpfulnessEvaluator:
+    """Cache -> heuristic -> one-token LLM judge, returning 'Y' or 'N'.
+
+    - judge: runnable taking {"initial_query", "final_response"} and returning text.
+      Bind it with `max_tokens=1` so the judge emits a single character.
+    - min_helpful_chars / min_term_coverage: a response at least this long that
+      mentions this fraction of the query's key terms is accepted without the judge.
+    - max_refusal_chars: refusals shorter than this are rejected without the judge.
+    - cache_size: number of (query, response) verdicts kept in the LRU cache.
+    """
+
+    def __init__(
+        self,
+        judge: Any,
+        *,
+        min_helpful_chars: int = 200,
+        min_term_coverage: float = 0.6,
+        max_refusal_chars: int = 300,
+        cache_size: int = 1024,
+    ) -> None:
+        self.judge = judge
+        self.min_helpful_chars = min_helpful_chars
+        self.min_term_coverage = min_term_coverage
+        self.max_refusal_chars = max_refusal_chars
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {
+            "evaluations": 0,
+            "cache_hits": 0,
+            "heuristic_accepts": 0,
+            "heuristic_rejects": 0,
+            "escalations": 0,
+        }
+        self._judge_seconds = 0.0
+
+    # --- tiers -----------------------------------------------------------------
+
+    def heuristic_verdict(self, query: str, response: str) -> Optional[str]:
+        """Return 'Y'/'N' for clear-cut cases, or None when the judge is needed."""
+        text = (response or "").strip()
+        if not text:
+            return "N"
+        lowered = text.lower()
+        if len(text) < self.max_refusal_chars and any(p in lowered for p in _REFUSAL_PHRASES):
+            return "N"
+        if len(text) >= self.min_helpful_chars:
+            terms = _key_terms(query or "")
+            if terms:
+                coverage = len(terms & _key_terms(text)) / len(terms)
+                if coverage >= self.min_term_coverage:
+                    return "Y"
+        return None
+
+    @staticmethod
+    def _cache_key(query: str, response: str) -> str:
+        return hashlib.sha256(f"{query}\x00{response}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            self._counts["evaluations"] += 1
+            verdict = self._cache.get(key)
+            if verdict is not None:
+                self._cache.move_to_end(key)
+                self._counts["cache_hits"] += 1
+            return verdict
+
+    def _store(self, key: str, verdict: str, tier: str, judge_seconds: float = 0.0) -> str:
+        with self._lock:
+            self._counts[tier] += 1
+            self._judge_seconds += judge_seconds
+            self._cache[key] = verdict
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return verdict
+
+    @staticmethod
+    def _parse_judge(text: Any) -> str:
+        return "Y" if "Y" in str(text).upper() else "N"
+
+    # --- public API -------------------------------------------------------------
+
+    def evaluate(self, query: str, response: str) -> str:
+        key = self._cache_key(query, response)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        verdict = self.heuristic_verdict(query, response)
+        if verdict is not None:
+            return self._store(key, verdict, "heuristic_accepts" if verdict == "Y" else "heuristic_rejects")
+        start = time.perf_counter()
+        raw = self.judge.invoke({"initial_query": query, "final_response": response})
+        return self._store(key, self._parse_judge(raw), "escalations", time.perf_counter() - start)
+
+    async def aevaluate(self, query: str, response: str) -> str:
+        key = self._cache_key(query, response)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        verdict = self.heuristic_verdict(query, response)
+        if verdict is not None:
+            return self._store(key, verdict, "heuristic_accepts" if verdict == "Y" else "heuristic_rejects")
+        start = time.perf_counter()
+        raw = await self.judge.ainvoke({"initial_query": query, "final_response": response})
+        return self._store(key, self._parse_judge(raw), "escalations", time.perf_counter() - start)
+
+    def metrics(self) -> Dict[str, float]:
+        """Counters plus escalation rate and an estimate of judge latency saved."""
+        with self._lock:
+            counts = dict(self._counts)
+            judge_seconds = self._judge_seconds
+        evaluations = counts["evaluations"]
+        escalations = counts["escalations"]
+        mean_judge = judge_seconds / escalations if escalations else 0.0
+        short_circuited = evaluations - escalations
+        return {
+            **counts,
+            "escalation_rate": escalations / evaluations if evaluations else 0.0,
+            "mean_judge_latency_s": mean_judge,
+            "latency_saved_s": short_circuited * mean_judge,
+        }
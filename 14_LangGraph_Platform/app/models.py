@@ -6,7 +6,9 @@ import a single helper without repeating provider-specific wiring.
 from __future__ import annotations
 
 import os
-from typing import Any
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Sequence, Tuple
 
 from langchain_openai import ChatOpenAI
 
@@ -18,9 +20,62 @@ def get_chat_model(model_name: str | None = None, *, temperature: float = 0) ->
       falling back to "gpt-4.1-nano".
     - temperature: sampling temperature for the chat model.
 
+    Set USE_STUB_MODEL=1 to get an offline `StubChatModel` instead (benchmarks,
+    load tests); STUB_MODEL_LATENCY_MS controls its simulated latency.
+
     Returns: a LangChain-compatible chat model instance.
     """
+    if os.environ.get("USE_STUB_MODEL", "0").lower() in ("1", "true", "yes"):
+        from app.stub_model import StubChatModel
+
+        return StubChatModel(latency_s=float(os.environ.get("STUB_MODEL_LATENCY_MS", "50")) / 1000)
     name = model_name or os.environ.get("OPENAI_MODEL", "gpt-4.1-nano")
     return ChatOpenAI(model=name, temperature=temperature)
 
 
+_bound_models: Dict[Tuple[str, float, Tuple[str, ...]], Any] = {}
+_bound_models_lock = threading.Lock()
+
+
+def get_model_with_tools(
+    tools: Sequence, model_name: str | None = None, *, temperature: float = 0
+) -> Any:
+    """Return a chat model bound to `tools`, built once per configuration.
+
+    Constructing ChatOpenAI and converting tool schemas in `bind_tools` is pure
+    overhead when repeated on every agent step, so bound runnables are memoized
+    by (resolved model name, temperature, tool names) and shared across runs.
+    """
+    name = model_name or os.environ.get("OPENAI_MODEL", "gpt-4.1-nano")
+    key = (name, temperature, tuple(tool.name for tool in tools))
+    bound = _bound_models.get(key)
+    if bound is None:
+        with _bound_models_lock:
+            bound = _bound_models.get(key)
+            if bound is None:
+                bound = get_chat_model(name, temperature=temperature).bind_tools(list(tools))
+                _bound_models[key] = bound
+    return bound
+
+
+@lru_cache(maxsize=1)
+def get_message_compactor() -> Any:
+    """Return the shared history compactor used before every agent model call.
+
+    Configured from HISTORY_* env vars (see `app.compaction.compactor_from_env`);
+    with HISTORY_SUMMARIZE=1, older turns are summarized by the default chat model.
+    """
+    from app.compaction import compactor_from_env
+
+    return compactor_from_env(get_chat_model)
+
+
+@lru_cache(maxsize=1)
+def get_single_flight() -> Any:
+    """Return the shared single-flight group that deduplicates identical first-turn model calls.
+
+    Configured from SINGLE_FLIGHT* env vars (see `app.single_flight.single_flight_from_env`).
+    """
+    from app.single_flight import single_flight_from_env
+
+    return single_flight_from_env()
@@ -1,64 +1,161 @@
 """Retrieval-Augmented Generation (RAG) utilities and tool.
 
-This module builds an in-memory RAG pipeline that:
+This module builds a RAG pipeline that:
 - Loads PDF documents from `RAG_DATA_DIR` (default: "data").
 - Splits documents into chunks using a token-aware splitter.
-- Embeds chunks with OpenAI and stores vectors in an in-memory Qdrant store.
+- Embeds chunks with OpenAI and persists chunks + vectors to a local index under
+  `RAG_INDEX_DIR` (default: ".rag_index"), one segment per file keyed by a hash
+  of its content and the splitter/embedding settings, so restarts reload
+  instead of re-embedding.
+- Serves the vectors from an in-memory Qdrant store, fused with an in-process
+  BM25 keyword index over the same chunks (`RAG_RETRIEVER`, see `app.bm25`).
 - Exposes a LangChain Tool `retrieve_information` that retrieves relevant
-  context and generates a response constrained to that context.
+  context and generates a response constrained to that context. The tool and
+  the RAG graph have async paths, so agents running under `ainvoke` never block
+  the event loop on retrieval or generation.
+- With `RAG_TOOL_MODE=passages` the tool skips its own generation and returns
+  token-budgeted passages with source ids, leaving synthesis to the calling
+  agent. `get_tool_stats()` compares latency and tokens per mode.
+
+Build the index ahead of time with `python -m app.rag`; at server start,
+`warm_up()` loads (or builds) it in a background thread. After that, a polling
+watcher (`RAG_WATCH_INTERVAL_S`) re-embeds only added or changed PDFs, drops
+deleted ones, and swaps in the new retriever atomically; `get_index_status()`
+reports staleness and update duration.
 """
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import logging
 import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
 from functools import lru_cache
-from typing import Annotated, List
+from pathlib import Path
+from typing import Annotated, Any, Callable, Dict, List, Set, Tuple
 
+import numpy as np
 import tiktoken
-from langchain_community.document_loaders import DirectoryLoader, PyMuPDFLoader
+from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_community.vectorstores import Qdrant
 from langchain_core.documents import Document
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.tools import tool
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import StructuredTool
 from langchain_openai import ChatOpenAI
 from langchain_openai.embeddings import OpenAIEmbeddings
-from langgraph.graph import START, StateGraph
+from langgraph.graph import END, START, StateGraph
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
 from typing_extensions import TypedDict
 
+from app.bm25 import BM25Index, HybridRetriever
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 750
+CHUNK_OVERLAP = 0
+EMBEDDING_MODEL = "text-embedding-3-small"
+# Bump when the on-disk layout or chunking logic changes so stale indexes are ignored
+INDEX_FORMAT_VERSION = 1
+
+RETRIEVER_TYPES = ("hybrid", "dense", "bm25")
+RETRIEVAL_K = 4
+# Results each side feeds into rank fusion in hybrid mode
+FUSION_CANDIDATES = 10
+
+TOOL_MODES = ("generate", "passages")
+DEFAULT_PASSAGE_TOKEN_BUDGET = 1200
+# Passages shorter than this after truncation are dropped rather than sent as fragments
+MIN_PASSAGE_TOKENS = 40
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.encoding_for_model("gpt-4o")
+
 
 def _tiktoken_len(text: str) -> int:
     """Return token length using tiktoken; used for chunk length measurement."""
-    tokens = tiktoken.encoding_for_model("gpt-4o").encode(text)
+    tokens = _encoding().encode(text)
     return len(tokens)
 
 
-class _RAGState(TypedDict):
-    """State schema for the simple two-step RAG graph: retrieve then generate."""
+class _RAGState(TypedDict, total=False):
+    """State schema for the RAG graph: retrieve, then generate unless mode is "passages"."""
     question: str
+    mode: str
     context: List[Document]
     response: str
+    generation_tokens: int
 
 
-def _build_rag_graph(data_dir: str) -> "CompiledGraph":
-    """Construct and compile a minimal RAG graph.
+def _index_dir() -> Path:
+    return Path(os.environ.get("RAG_INDEX_DIR", ".rag_index"))
 
-    Steps:
-    1) Load PDFs from `data_dir` recursively (best-effort).
-    2) Split documents into token-aware chunks.
-    3) Create embeddings and an in-memory Qdrant vector store retriever.
-    4) Define a chat prompt and generation model.
-    5) Wire a two-node graph: retrieve -> generate.
+
+def _settings_fingerprint() -> str:
+    """Return a stable string describing everything that affects chunk vectors."""
+    return json.dumps(
+        {
+            "version": INDEX_FORMAT_VERSION,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "embedding_model": EMBEDDING_MODEL,
+        },
+        sort_keys=True,
+    )
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _scan_data_dir(
+    data_dir: str, stat_cache: Dict[str, Tuple[int, int, str]] | None = None
+) -> Dict[str, str]:
+    """Return {relative pdf path: content sha256} for every PDF under `data_dir`.
+
+    With `stat_cache` ({path: (mtime_ns, size, sha)}, updated in place), files
+    whose mtime and size are unchanged are not re-hashed, which keeps polling cheap.
     """
-    # Load PDFs from data directory (recursive)
-    try:
-        directory_loader = DirectoryLoader(
-            data_dir, glob="**/*.pdf", loader_cls=PyMuPDFLoader
-        )
-        documents = directory_loader.load()
-    except Exception:
-        documents = []
+    root = Path(data_dir)
+    if not root.is_dir():
+        return {}
+    files: Dict[str, str] = {}
+    for path in sorted(root.rglob("*.pdf")):
+        source = path.relative_to(root).as_posix()
+        if stat_cache is None:
+            files[source] = _file_sha256(path)
+            continue
+        stat = path.stat()
+        cached = stat_cache.get(source)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            files[source] = cached[2]
+        else:
+            files[source] = _file_sha256(path)
+            stat_cache[source] = (stat.st_mtime_ns, stat.st_size, files[source])
+    if stat_cache is not None:
+        for source in set(stat_cache) - set(files):
+            del stat_cache[source]
+    return files
+
+
+def _segment_key(file_hash: str) -> str:
+    """Key for one file's chunks + vectors under the current settings."""
+    return hashlib.sha256(f"{file_hash}:{_settings_fingerprint()}".encode()).hexdigest()
 
-    # Split documents
+
+def _split_file(path: Path, source: str) -> List[Document]:
+    """Load one PDF and split it into token-aware chunks (best-effort)."""
     try:
         from langchain_text_splitters import RecursiveCharacterTextSplitter
     except Exception:
@@ -67,18 +164,211 @@ def _build_rag_graph(data_dir: str) -> "CompiledGraph":
             RecursiveCharacterTextSplitter,
         )
 
+    try:
+        documents = PyMuPDFLoader(str(path)).load()
+    except Exception:
+        logger.warning("Skipping unreadable PDF %s", path, exc_info=True)
+        return []
+
     text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=750, chunk_overlap=0, length_function=_tiktoken_len
+        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, length_function=_tiktoken_len
     )
-    chunks = text_splitter.split_documents(documents) if documents else []
+    chunks = text_splitter.split_documents(documents)
+    for chunk in chunks:
+        chunk.metadata["source"] = source
+    return chunks
+
+
+def _segment_paths(segment_key: str) -> Tuple[Path, Path]:
+    segment_dir = _index_dir() / "segments"
+    return segment_dir / f"{segment_key}.json", segment_dir / f"{segment_key}.npy"
+
+
+def _write_segment(segment_key: str, chunks: List[Document], vectors: np.ndarray) -> None:
+    """Persist one file's chunks and vectors; written to temp names then renamed."""
+    chunks_path, vectors_path = _segment_paths(segment_key)
+    chunks_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_chunks = chunks_path.with_suffix(".json.tmp")
+    tmp_vectors = vectors_path.with_suffix(".tmp.npy")
+    with open(tmp_chunks, "w", encoding="utf-8") as f:
+        json.dump(
+            [{"page_content": c.page_content, "metadata": c.metadata} for c in chunks], f
+        )
+    np.save(tmp_vectors, vectors.astype(np.float32))
+    os.replace(tmp_vectors, vectors_path)
+    os.replace(tmp_chunks, chunks_path)
+
+
+def _read_segment(segment_key: str) -> Tuple[List[Document], np.ndarray] | None:
+    chunks_path, vectors_path = _segment_paths(segment_key)
+    if not (chunks_path.exists() and vectors_path.exists()):
+        return None
+    with open(chunks_path, encoding="utf-8") as f:
+        chunks = [Document(**record) for record in json.load(f)]
+    vectors = np.load(vectors_path)
+    return chunks, vectors
+
+
+def _embedding_model() -> OpenAIEmbeddings:
+    return OpenAIEmbeddings(model=EMBEDDING_MODEL)
+
+
+Segment = Tuple[List[Document], np.ndarray]
+
 
-    # Embeddings and vector store (in-memory Qdrant)
-    embedding_model = OpenAIEmbeddings(model="text-embedding-3-small")
-    qdrant_vectorstore = Qdrant.from_documents(
-        documents=chunks, embedding=embedding_model, location=":memory:"
+def _load_segments(
+    data_dir: str, files: Dict[str, str], previous: Dict[str, Tuple[str, Segment]] | None = None
+) -> Tuple[Dict[str, Tuple[str, Segment]], int]:
+    """Return ({source: (file hash, segment)}, number of files split and embedded).
+
+    Segments are reused from `previous` when the file hash is unchanged, then
+    read from disk; only files with no stored segment are split and embedded.
+    """
+    previous = previous or {}
+    segments: Dict[str, Tuple[str, Segment]] = {}
+    built = 0
+    embeddings = None
+    for source, file_hash in files.items():
+        if source in previous and previous[source][0] == file_hash:
+            segments[source] = previous[source]
+            continue
+        segment_key = _segment_key(file_hash)
+        segment = _read_segment(segment_key)
+        if segment is None:
+            file_chunks = _split_file(Path(data_dir) / source, source)
+            if embeddings is None:
+                embeddings = _embedding_model()
+            file_vectors = np.array(
+                embeddings.embed_documents([c.page_content for c in file_chunks]) if file_chunks else [],
+                dtype=np.float32,
+            )
+            _write_segment(segment_key, file_chunks, file_vectors)
+            segment = (file_chunks, file_vectors)
+            built += 1
+        segments[source] = (file_hash, segment)
+    return segments, built
+
+
+def _prune_segments(keep: Set[str]) -> int:
+    """Delete stored segments whose key is not in `keep`; return how many were removed.
+
+    Edited and deleted files leave their old segments behind, so without this a
+    hot-reloaded index directory would only grow.
+    """
+    segment_dir = _index_dir() / "segments"
+    if not segment_dir.is_dir():
+        return 0
+    removed = set()
+    for path in segment_dir.iterdir():
+        # Skip in-progress temp files (".json.tmp", ".tmp.npy") of a concurrent build
+        if ".tmp" in path.name or path.suffix not in (".json", ".npy"):
+            continue
+        if path.stem not in keep:
+            path.unlink(missing_ok=True)
+            removed.add(path.stem)
+    return len(removed)
+
+
+def _merge_segments(segments: Dict[str, Tuple[str, Segment]]) -> Tuple[List[Document], np.ndarray]:
+    chunks: List[Document] = []
+    vectors: List[np.ndarray] = []
+    for _, (file_chunks, file_vectors) in segments.values():
+        if file_chunks:
+            chunks.extend(file_chunks)
+            vectors.append(file_vectors)
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    return chunks, matrix
+
+
+def build_index(data_dir: str) -> Tuple[List[Document], np.ndarray]:
+    """Load the persisted index for `data_dir`, building missing pieces on disk.
+
+    Each PDF is stored as its own segment keyed by content hash and settings, so
+    only new or changed files are split and embedded; the index is the current
+    files' segments, so no per-snapshot record is kept.
+    """
+    start = time.perf_counter()
+    files = _scan_data_dir(data_dir)
+    segments, built = _load_segments(data_dir, files)
+    chunks, matrix = _merge_segments(segments)
+    logger.info(
+        "RAG index for %s ready in %.2fs (%d files, %d embedded, %d chunks)",
+        data_dir,
+        time.perf_counter() - start,
+        len(files),
+        built,
+        len(chunks),
+    )
+    return chunks, matrix
+
+
+def _build_vectorstore(chunks: List[Document], vectors: np.ndarray) -> Qdrant | None:
+    """Load precomputed vectors into an in-memory Qdrant collection."""
+    if not chunks:
+        return None
+    collection_name = "rag_chunks"
+    client = QdrantClient(location=":memory:")
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE),
+    )
+    client.upsert(
+        collection_name=collection_name,
+        points=[
+            PointStruct(
+                id=uuid.uuid4().hex,
+                vector=vector.tolist(),
+                payload={"page_content": chunk.page_content, "metadata": chunk.metadata},
+            )
+            for chunk, vector in zip(chunks, vectors)
+        ],
+    )
+    return Qdrant(client=client, collection_name=collection_name, embeddings=_embedding_model())
+
+
+def _retriever_type() -> str:
+    kind = os.environ.get("RAG_RETRIEVER", "hybrid").strip().lower()
+    if kind not in RETRIEVER_TYPES:
+        logger.warning("Unknown RAG_RETRIEVER %r; falling back to 'hybrid'", kind)
+        return "hybrid"
+    return kind
+
+
+def build_retriever(chunks: List[Document], vectors: np.ndarray, kind: str | None = None):
+    """Return the retriever selected by `kind` (default: RAG_RETRIEVER) over the indexed chunks.
+
+    - dense: Qdrant cosine search only.
+    - bm25: in-process keyword search only.
+    - hybrid: both, merged with reciprocal rank fusion.
+    """
+    kind = kind or _retriever_type()
+    if not chunks:
+        return None
+    if kind == "dense":
+        return _build_vectorstore(chunks, vectors).as_retriever(search_kwargs={"k": RETRIEVAL_K})
+    start = time.perf_counter()
+    bm25 = BM25Index(chunks)
+    logger.info("BM25 index over %d chunks built in %.3fs", len(bm25), time.perf_counter() - start)
+    if kind == "bm25":
+        return HybridRetriever(dense=None, bm25=bm25, k=RETRIEVAL_K, candidates=RETRIEVAL_K)
+    return HybridRetriever(
+        dense=_build_vectorstore(chunks, vectors).as_retriever(search_kwargs={"k": FUSION_CANDIDATES}),
+        bm25=bm25,
+        k=RETRIEVAL_K,
+        candidates=FUSION_CANDIDATES,
     )
-    retriever = qdrant_vectorstore.as_retriever()
 
+
+def _build_rag_graph() -> "CompiledGraph":
+    """Construct and compile a minimal RAG graph.
+
+    Steps:
+    1) Retrieve with the retriever of the current index snapshot (see
+       `refresh_index`), read once per query so a hot swap never splits a run.
+    2) Define a chat prompt and generation model.
+    3) Wire the graph: retrieve -> generate, ending after retrieve when the
+       input sets `mode="passages"`.
+    """
     # Prompt and model
     human_template = (
         "\n#CONTEXT:\n{context}\n\nQUERY:\n{query}\n\n"
@@ -87,41 +377,416 @@ def _build_rag_graph(data_dir: str) -> "CompiledGraph":
     )
     chat_prompt = ChatPromptTemplate.from_messages([("human", human_template)])
     generator_llm = ChatOpenAI(model=os.environ.get("OPENAI_CHAT_MODEL", "gpt-4.1-nano"))
+    # Keep the AIMessage (not a parsed string) so token usage can be recorded
+    generator_chain = chat_prompt | generator_llm
+
+    def _generated(message) -> _RAGState:
+        usage = getattr(message, "usage_metadata", None) or {}
+        return {"response": message.content, "generation_tokens": usage.get("total_tokens", 0)}  # type: ignore
 
     def retrieve(state: _RAGState) -> _RAGState:
+        retriever = _snapshot.retriever if _snapshot else None
         retrieved_docs = retriever.invoke(state["question"]) if retriever else []
         return {"context": retrieved_docs}  # type: ignore
 
     def generate(state: _RAGState) -> _RAGState:
-        generator_chain = chat_prompt | generator_llm | StrOutputParser()
-        response_text = generator_chain.invoke(
+        message = generator_chain.invoke(
             {"query": state["question"], "context": state.get("context", [])}
         )
-        return {"response": response_text}  # type: ignore
+        return _generated(message)
+
+    async def aretrieve(state: _RAGState) -> _RAGState:
+        retriever = _snapshot.retriever if _snapshot else None
+        retrieved_docs = await retriever.ainvoke(state["question"]) if retriever else []
+        return {"context": retrieved_docs}  # type: ignore
+
+    async def agenerate(state: _RAGState) -> _RAGState:
+        message = await generator_chain.ainvoke(
+            {"query": state["question"], "context": state.get("context", [])}
+        )
+        return _generated(message)
+
+    def route_after_retrieve(state: _RAGState) -> str:
+        return END if state.get("mode") == "passages" else "generate"
 
     graph_builder = StateGraph(_RAGState)
-    graph_builder = graph_builder.add_sequence([retrieve, generate])
+    graph_builder.add_node("retrieve", RunnableLambda(retrieve, afunc=aretrieve))
+    graph_builder.add_node("generate", RunnableLambda(generate, afunc=agenerate))
     graph_builder.add_edge(START, "retrieve")
+    graph_builder.add_conditional_edges("retrieve", route_after_retrieve, {"generate": "generate", END: END})
+    graph_builder.add_edge("generate", END)
     return graph_builder.compile()
 
 
-@lru_cache(maxsize=1)
+@dataclass(frozen=True)
+class _IndexSnapshot:
+    """An immutable, fully built index; replaced as a whole, never modified."""
+
+    data_dir: str
+    segments: Dict[str, Tuple[str, Segment]]
+    retriever: Any
+    chunks: int
+    built_at: float
+
+
+# Readers take one reference to the snapshot; updates build a new one and
+# rebind this name, so queries never wait on (or observe half of) an update.
+_snapshot: _IndexSnapshot | None = None
+_update_lock = threading.Lock()
+# Called after each swap, e.g. to drop tool results computed from the old documents
+_swap_listeners: List[Callable[[], None]] = []
+_stat_cache: Dict[str, Tuple[int, int, str]] = {}
+_status = {
+    "updates": 0,
+    "last_update_s": None,
+    "last_checked_at": None,
+    "pending_since": None,
+    "updating": False,
+    "last_error": None,
+}
+
+
+def _data_dir() -> str:
+    return os.environ.get("RAG_DATA_DIR", "data")
+
+
+def on_index_swap(callback: Callable[[], None]) -> None:
+    """Register `callback` to run after `refresh_index` swaps in a new snapshot."""
+    _swap_listeners.append(callback)
+
+
+def _change_time(
+    files: Dict[str, str], previous: Dict[str, Tuple[str, Segment]], previous_check: float | None
+) -> float:
+    """Best estimate of when the data dir changed: the oldest mtime of an added or
+    edited file, but no earlier than the previous check, which saw no change."""
+    now = time.time()
+    if previous_check is None:
+        # First load: there was no earlier state to be stale against
+        return now
+    mtimes = [
+        _stat_cache[source][0] / 1e9
+        for source, file_hash in files.items()
+        if source in _stat_cache and (source not in previous or previous[source][0] != file_hash)
+    ]
+    changed_at = max(min(mtimes, default=now), previous_check)
+    return min(changed_at, now)
+
+
+def refresh_index(data_dir: str | None = None) -> bool:
+    """Bring the served index in line with `data_dir`; return True if it changed.
+
+    New and changed PDFs are split and embedded (or loaded from their stored
+    segment); deleted ones are dropped; unchanged files reuse the segments
+    already in memory. Only embedding is incremental: the retriever (Qdrant
+    collection and BM25 index) is rebuilt over all merged segments and swapped in
+    with a single assignment. `on_index_swap` listeners run after the swap.
+    """
+    global _snapshot
+    data_dir = data_dir or _data_dir()
+    with _update_lock:
+        files = _scan_data_dir(data_dir, _stat_cache)
+        current = _snapshot
+        previous_check = _status["last_checked_at"]
+        _status["last_checked_at"] = time.time()
+        if current is not None and current.data_dir == data_dir and {
+            source: entry[0] for source, entry in current.segments.items()
+        } == files:
+            _status["pending_since"] = None
+            return False
+
+        start = time.perf_counter()
+        previous = current.segments if current is not None and current.data_dir == data_dir else {}
+        if _status["pending_since"] is None:
+            _status["pending_since"] = _change_time(files, previous, previous_check)
+        _status["updating"] = True
+        try:
+            segments, built = _load_segments(data_dir, files, previous)
+            chunks, vectors = _merge_segments(segments)
+            retriever = build_retriever(chunks, vectors)
+        except Exception as e:
+            _status["last_error"] = repr(e)
+            raise
+        finally:
+            _status["updating"] = False
+
+        _snapshot = _IndexSnapshot(data_dir, segments, retriever, len(chunks), time.time())
+        for callback in _swap_listeners:
+            try:
+                callback()
+            except Exception:
+                logger.exception("RAG index swap listener failed")
+        try:
+            pruned = _prune_segments({_segment_key(file_hash) for file_hash, _ in segments.values()})
+        except OSError:
+            logger.warning("Could not prune old RAG index segments", exc_info=True)
+            pruned = 0
+        elapsed = time.perf_counter() - start
+        _status.update(updates=_status["updates"] + 1, last_update_s=elapsed, pending_since=None, last_error=None)
+        logger.info(
+            "RAG index for %s updated in %.2fs "
+            "(%d files: %d added, %d changed, %d removed, %d embedded; %d chunks; %d old segments pruned)",
+            data_dir,
+            elapsed,
+            len(files),
+            len(set(files) - set(previous)),
+            sum(1 for source in files if source in previous and previous[source][0] != files[source]),
+            len(set(previous) - set(files)),
+            built,
+            len(chunks),
+            pruned,
+        )
+        return True
+
+
+
+def get_index_status() -> Dict[str, Any]:
+    """Report what the served index contains and how fresh it is.
+
+    - stale: a data-dir change has been detected but is not served yet.
+    - staleness_s: how long the pending change has been waiting (0 when fresh),
+      counted from the changed files' mtimes (no earlier than the previous
+      check), so it includes the up to `watch_interval_s` before the change was
+      noticed as well as the rebuild.
+    - last_update_s: duration of the most recent rebuild.
+    """
+    snapshot = _snapshot
+    now = time.time()
+    pending_since = _status["pending_since"]
+    return {
+        "data_dir": snapshot.data_dir if snapshot else _data_dir(),
+        "files": len(snapshot.segments) if snapshot else 0,
+        "chunks": snapshot.chunks if snapshot else 0,
+        "built_at": snapshot.built_at if snapshot else None,
+        "age_s": now - snapshot.built_at if snapshot else None,
+        "stale": snapshot is None or pending_since is not None,
+        "staleness_s": now - pending_since if pending_since else 0.0,
+        "updating": _status["updating"],
+        "updates": _status["updates"],
+        "last_update_s": _status["last_update_s"],
+        "last_checked_at": _status["last_checked_at"],
+        "last_error": _status["last_error"],
+        "watch_interval_s": _watch_interval_s(),
+        "watching": _watcher_thread is not None and _watcher_thread.is_alive(),
+    }
+
+
+_watcher_thread: threading.Thread | None = None
+_watcher_stop = threading.Event()
+
+
+def _watch_interval_s() -> float:
+    return float(os.environ.get("RAG_WATCH_INTERVAL_S", "10"))
+
+
+def start_watcher(interval_s: float | None = None) -> None:
+    """Poll RAG_DATA_DIR every `interval_s` (default RAG_WATCH_INTERVAL_S) and hot-swap the index.
+
+    Polling compares file mtimes and sizes, hashing only files that changed, so
+    an idle check costs a directory walk. Disabled when the interval is 0.
+    """
+    global _watcher_thread
+    interval_s = _watch_interval_s() if interval_s is None else interval_s
+    if interval_s <= 0 or (_watcher_thread is not None and _watcher_thread.is_alive()):
+        return
+    _watcher_stop.clear()
+
+    def _run():
+        while not _watcher_stop.wait(interval_s):
+            try:
+                refresh_index()
+            except Exception:
+                logger.exception("RAG index refresh failed; still serving the previous index")
+
+    _watcher_thread = threading.Thread(target=_run, name="rag-index-watcher", daemon=True)
+    _watcher_thread.start()
+
+
+def stop_watcher() -> None:
+    _watcher_stop.set()
+
+
+_rag_graph = None
+_rag_graph_lock = threading.Lock()
+
+
 def _get_rag_graph():
-    """Return a cached compiled RAG graph built from RAG_DATA_DIR."""
-    data_dir = os.environ.get("RAG_DATA_DIR", "data")
-    return _build_rag_graph(data_dir)
+    """Return the compiled RAG graph, loading the index from RAG_DATA_DIR once.
+
+    Guarded by a lock so a background warm-up and an early tool call never
+    build the index twice; the second caller simply waits for the first. After
+    the first load, the data-dir watcher keeps the index current.
+    """
+    global _rag_graph
+    if _rag_graph is None:
+        with _rag_graph_lock:
+            if _rag_graph is None:
+                start = time.perf_counter()
+                if _snapshot is None:
+                    refresh_index()
+                _rag_graph = _build_rag_graph()
+                logger.info("RAG graph ready in %.2fs", time.perf_counter() - start)
+                start_watcher()
+    return _rag_graph
+
 
+_warm_up_thread: threading.Thread | None = None
 
-@tool
-def retrieve_information(
+
+def warm_up(background: bool = True) -> None:
+    """Load or build the RAG index at server start instead of on the first tool call.
+
+    Disabled with RAG_EAGER_WARMUP=0. Safe to call more than once.
+    """
+    global _warm_up_thread
+    if os.environ.get("RAG_EAGER_WARMUP", "1").lower() in ("0", "false", "no"):
+        return
+    if not background:
+        _get_rag_graph()
+        return
+    if _warm_up_thread is None:
+
+        def _run():
+            try:
+                _get_rag_graph()
+            except Exception:
+                logger.exception("RAG warm-up failed; the index will be built on first use")
+
+        _warm_up_thread = threading.Thread(target=_run, name="rag-warm-up", daemon=True)
+        _warm_up_thread.start()
+
+
+def _tool_mode() -> str:
+    """Return RAG_TOOL_MODE: "generate" (default) answers inside the tool, "passages" does not."""
+    mode = os.environ.get("RAG_TOOL_MODE", "generate").strip().lower()
+    if mode not in TOOL_MODES:
+        logger.warning("Unknown RAG_TOOL_MODE %r; falling back to 'generate'", mode)
+        return "generate"
+    return mode
+
+
+def _passage_token_budget() -> int:
+    return int(os.environ.get("RAG_PASSAGE_TOKEN_BUDGET", DEFAULT_PASSAGE_TOKEN_BUDGET))
+
+
+def format_passages(question: str, docs: List[Document], token_budget: int) -> str:
+    """Render retrieved chunks as numbered passages with source ids, within `token_budget` tokens.
+
+    Passages keep retriever order; the last one that fits is truncated, and any
+    chunk repeated verbatim is sent once.
+    """
+    if not docs:
+        return f"No passages found for: {question}"
+    encoding = _encoding()
+    header = f"Passages for: {question}\nAnswer from these passages and cite their ids, e.g. [1]."
+    parts = [header]
+    remaining = token_budget - len(encoding.encode(header))
+    seen = set()
+    for doc in docs:
+        text = " ".join(doc.page_content.split())
+        if not text or text in seen:
+            continue
+        seen.add(text)
+        source = doc.metadata.get("source", "unknown")
+        page = doc.metadata.get("page")
+        label = f"[{len(parts)}] {source}" + (f" p.{page + 1}" if isinstance(page, int) else "")
+        available = remaining - len(encoding.encode(label)) - 1
+        if available < MIN_PASSAGE_TOKENS:
+            break
+        tokens = encoding.encode(text)
+        if len(tokens) > available:
+            text = encoding.decode(tokens[:available]).rstrip() + " ..."
+            tokens = tokens[:available]
+        parts.append(f"{label}\n{text}")
+        remaining = available - len(tokens)
+    return "\n\n".join(parts)
+
+
+_tool_stats: Dict[str, Dict[str, float]] = {}
+_tool_stats_lock = threading.Lock()
+
+
+def _record_tool_call(mode: str, seconds: float, output: str, generation_tokens: int) -> None:
+    output_tokens = _tiktoken_len(output)
+    with _tool_stats_lock:
+        entry = _tool_stats.setdefault(
+            mode, {"calls": 0, "total_s": 0.0, "output_tokens": 0, "generation_tokens": 0}
+        )
+        entry["calls"] += 1
+        entry["total_s"] += seconds
+        entry["output_tokens"] += output_tokens
+        entry["generation_tokens"] += generation_tokens
+    logger.info(
+        "retrieve_information mode=%s in %.3fs (output %d tokens, nested generation %d tokens)",
+        mode,
+        seconds,
+        output_tokens,
+        generation_tokens,
+    )
+
+
+def get_tool_stats() -> Dict[str, Dict[str, float]]:
+    """Per-mode totals and means for the RAG tool: latency, output tokens and nested generation tokens.
+
+    `output_tokens` is what the calling agent has to read; `generation_tokens` is
+    what the tool's own LLM call spent (always 0 in passages mode).
+    """
+    with _tool_stats_lock:
+        stats = {mode: dict(entry) for mode, entry in _tool_stats.items()}
+    for entry in stats.values():
+        calls = entry["calls"] or 1
+        entry["mean_s"] = entry["total_s"] / calls
+        entry["mean_output_tokens"] = entry["output_tokens"] / calls
+        entry["mean_generation_tokens"] = entry["generation_tokens"] / calls
+    return stats
+
+
+def _tool_output(query: str, mode: str, result) -> Tuple[str, int]:
+    if mode == "passages":
+        return format_passages(query, result.get("context", []), _passage_token_budget()), 0
+    # Prefer returning the response string if available
+    if isinstance(result, dict) and "response" in result:
+        return result["response"], result.get("generation_tokens", 0)
+    return str(result), 0
+
+
+def _retrieve_information(
     query: Annotated[str, "query to ask the retrieve information tool"]
 ):
     """Use Retrieval Augmented Generation to retrieve information about student loan policies"""
+    mode = _tool_mode()
+    start = time.perf_counter()
     graph = _get_rag_graph()
-    result = graph.invoke({"question": query})
-    # Prefer returning the response string if available
-    if isinstance(result, dict) and "response" in result:
-        return result["response"]
-    return result
+    result = graph.invoke({"question": query, "mode": mode})
+    output, generation_tokens = _tool_output(query, mode, result)
+    _record_tool_call(mode, time.perf_counter() - start, output, generation_tokens)
+    return output
+
+
+async def _aretrieve_information(
+    query: Annotated[str, "query to ask the retrieve information tool"]
+):
+    """Use Retrieval Augmented Generation to retrieve information about student loan policies"""
+    mode = _tool_mode()
+    start = time.perf_counter()
+    graph = _rag_graph
+    if graph is None:
+        # Building the index is blocking work; keep it off the event loop
+        graph = await asyncio.to_thread(_get_rag_graph)
+    result = await graph.ainvoke({"question": query, "mode": mode})
+    output, generation_tokens = _tool_output(query, mode, result)
+    _record_tool_call(mode, time.perf_counter() - start, output, generation_tokens)
+    return output
+
+
+retrieve_information = StructuredTool.from_function(
+    func=_retrieve_information,
+    coroutine=_aretrieve_information,
+    name="retrieve_information",
+)
 
 
+if __name__ == "__main__":
+    # Build step: `python -m app.rag` writes the index so servers start warm
+    logging.basicConfig(level=logging.INFO)
+    build_index(os.environ.get("RAG_DATA_DIR", "data"))
@@ -0,0 +1,172 @@
+"""Single-flight deduplication of identical concurrent work.
+
+During an incident many users ask the same question within seconds, and each
+run calls the model and the same tools again. `SingleFlight` lets the first
+caller for a key (the leader) do the work. Callers with the same key that
+arrive while it is in flight wait for the leader and get copies of its result.
+For `reuse_window_s` after completion, new callers get the stored result
+without any work. Failures are shared with the callers already waiting, but
+never reused.
+
+Graphs key model calls with `first_turn_key`: a fingerprint of a threadless run
+or a thread's first turn. Later turns depend on per-user history and always
+run on their own.
+
+Configured by env vars (see `single_flight_from_env`):
+- SINGLE_FLIGHT=0 disables deduplication.
+- SINGLE_FLIGHT_REUSE_S sets the reuse window (default 0 = in-flight only).
+  A window replays answers, including tool results such as Tavily searches,
+  that may be stale by then.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Sequence, Tuple, TypeVar
+
+from langchain_core.messages import HumanMessage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _LeaderAbandoned(Exception):
+    """The leader was cancelled; its followers retry and one of them takes over."""
+
+
+def _normalize_text(text: Any) -> Any:
+    return " ".join(text.lower().split()) if isinstance(text, str) else text
+
+
+def first_turn_key(messages: Sequence[Any], *context: Any) -> Optional[str]:
+    """Fingerprint of a first-turn history plus `context` (model, tools); None for later turns.
+
+    Message text is lower-cased and whitespace-collapsed, so trivially different
+    phrasings of the same question share a key. Message ids are ignored.
+    """
+    if sum(1 for m in messages if isinstance(m, HumanMessage)) != 1:
+        return None
+    history = [
+        (
+            getattr(m, "type", ""),
+            _normalize_text(getattr(m, "content", "")),
+            [(call["name"], call["args"]) for call in getattr(m, "tool_calls", None) or []],
+        )
+        for m in messages
+    ]
+    payload = json.dumps([list(context), history], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key; thread-safe, sync and async."""
+
+    def __init__(self, reuse_window_s: float = 0.0, max_entries: int = 1024, *, enabled: bool = True) -> None:
+        self.reuse_window_s = reuse_window_s
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._recent: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"leaders": 0, "coalesced": 0, "reused": 0, "errors": 0}
+
+    def _claim(self, key: Hashable) -> Tuple[str, Any]:
+        """Return ("reused", result), ("follower", future) or ("leader", future)."""
+        with self._lock:
+            entry = self._recent.get(key)
+            if entry is not None:
+                if entry[0] >= time.monotonic():
+                    self._counts["reused"] += 1
+                    return "reused", entry[1]
+                del self._recent[key]
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._counts["coalesced"] += 1
+                return "follower", future
+            future = Future()
+            self._in_flight[key] = future
+            self._counts["leaders"] += 1
+            return "leader", future
+
+    def _finish(self, key: Hashable, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if error is None and self.reuse_window_s > 0:
+                self._recent[key] = (time.monotonic() + self.reuse_window_s, result)
+                while len(self._recent) > self.max_entries:
+                    self._recent.popitem(last=False)
+            elif error is not None and not isinstance(error, _LeaderAbandoned):
+                self._counts["errors"] += 1
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    async def run(self, key: Optional[Hashable], fn: Callable[[], Awaitable[T]]) -> T:
+        """Await `fn()` once per key; concurrent callers with the same key share the result."""
+        if key is None or not self.enabled:
+            return await fn()
+        while True:
+            role, value = self._claim(key)
+            if role == "reused":
+                return copy.deepcopy(value)
+            if role == "follower":
+                try:
+                    # Shield: a follower giving up must not cancel the leader's future
+                    return copy.deepcopy(await asyncio.shield(asyncio.wrap_future(value)))
+                except _LeaderAbandoned:
+                    continue
+            try:
+                result = await fn()
+            except Exception as e:
+                self._finish(key, value, error=e)
+                raise
+            except BaseException:
+                self._finish(key, value, error=_LeaderAbandoned())
+                raise
+            self._finish(key, value, result=copy.deepcopy(result))
+            return result
+
+    def run_sync(self, key: Optional[Hashable], fn: Callable[[], T]) -> T:
+        """Blocking variant of `run` for the graphs' sync paths."""
+        if key is None or not self.enabled:
+            return fn()
+        while True:
+            role, value = self._claim(key)
+            if role == "reused":
+                return copy.deepcopy(value)
+            if role == "follower":
+                try:
+                    return copy.deepcopy(value.result())
+                except _LeaderAbandoned:
+                    continue
+            try:
+                result = fn()
+            except Exception as e:
+                self._finish(key, value, error=e)
+                raise
+            except BaseException:
+                self._finish(key, value, error=_LeaderAbandoned())
+                raise
+            self._finish(key, value, result=copy.deepcopy(result))
+            return result
+
+    def stats(self) -> Dict[str, int]:
+        """Counters: leaders (work done), coalesced (joined in flight), reused (within the window), errors."""
+        with self._lock:
+            return {**self._counts, "in_flight": len(self._in_flight)}
+
+
+def single_flight_from_env() -> SingleFlight:
+    """Build a `SingleFlight` from SINGLE_FLIGHT and SINGLE_FLIGHT_REUSE_S."""
+    enabled = os.environ.get("SINGLE_FLIGHT", "1").lower() not in ("0", "false", "no")
+    return SingleFlight(float(os.environ.get("SINGLE_FLIGHT_REUSE_S", "0")), enabled=enabled)
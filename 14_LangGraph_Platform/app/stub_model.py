@@ -0,0 +1,68 @@
+"""Offline stand-in for the chat model, used by benchmarks and load tests.
+
+`StubChatModel` never touches the network: it waits a fixed latency (sleeping
+without blocking the event loop on the async path) and answers with a
+deterministic message that echoes the last user query. Select it for the graphs
+with `USE_STUB_MODEL=1`; `STUB_MODEL_LATENCY_MS` sets the simulated latency.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_FILLER = (
+    "This is a deterministic stub response used for offline benchmarking. It "
+    "restates the question so routing and helpfulness checks behave like a real, "
+    "on-topic answer without calling any model provider."
+)
+
+
+class StubChatModel(BaseChatModel):
+    """Deterministic chat model with simulated latency and no tool calls."""
+
+    latency_s: float = 0.05
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "StubChatModel":
+        # The stub never calls tools, so binding is a no-op
+        return self
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        query = next(
+            (m.content for m in reversed(messages) if isinstance(m, HumanMessage)),
+            "",
+        )
+        content = f"Answer to: {query}\n\n{_FILLER}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency_s)
+        return self._reply(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency_s)
+        return self._reply(messages)
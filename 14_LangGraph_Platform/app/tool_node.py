@@ -0,0 +1,269 @@
+"""Concurrent, cached, deadline-bounded tool execution for agent graphs.
+
+`ParallelToolNode` replaces `ToolNode` as the graph's `action` node:
+- All tool calls from the last AI message run concurrently.
+- Each tool gets its own deadline; a tool that misses it yields a partial-result
+  ToolMessage instead of stalling the run.
+- Successful results go into a TTL cache keyed by (tool name, normalized args),
+  so repeated Arxiv/Tavily/RAG queries are answered without calling the tool.
+  Identical calls that arrive while the first is still running wait for it
+  instead of calling the tool again (single-flight).
+- Per-tool latency, timeouts and cache hits are logged and exposed by `stats()`.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from app.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+# One pool for every node's sync tool calls. A call that misses its deadline
+# keeps its worker until the tool returns: threads cannot be interrupted.
+_TOOL_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="tool")
+
+
+def _normalize(value: Any) -> Any:
+    """Collapse whitespace in strings so trivially different queries share a key.
+
+    Case is kept: URLs, IDs, file paths and code differ by case.
+    """
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, Mapping):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+class ToolResultCache:
+    """Thread-safe TTL + LRU cache of tool message content."""
+
+    def __init__(self, ttl_s: float = 600.0, max_entries: int = 512) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Tuple[str, str], Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(tool_name: str, args: Any) -> Tuple[str, str]:
+        return tool_name, json.dumps(_normalize(args), sort_keys=True, default=str)
+
+    def get(self, key: Tuple[str, str]) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, content = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return content
+
+    def invalidate(self, tool_name: str) -> int:
+        """Drop every cached result of `tool_name`; return how many were dropped."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == tool_name]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def set(self, key: Tuple[str, str], content: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class ParallelToolNode:
+    """Graph node that executes tool calls concurrently under per-tool deadlines.
+
+    - tools: tools available to the agent.
+    - timeouts: optional {tool name: seconds} overrides of `default_timeout_s`.
+    - cache: shared `ToolResultCache`; pass `cache=None` and `cache_ttl_s=0` to disable.
+
+    Use `as_runnable()` to get a node with both sync and async paths. On the sync
+    path a call that times out still holds its worker in the shared pool until
+    the tool returns, so slow tools can exhaust the pool's 32 threads.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[Any],
+        *,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout_s: float = 30.0,
+        cache: Optional[ToolResultCache] = None,
+        cache_ttl_s: float = 600.0,
+    ) -> None:
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout_s = default_timeout_s
+        self.cache = cache if cache is not None else (ToolResultCache(cache_ttl_s) if cache_ttl_s > 0 else None)
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+        self._pool = _TOOL_POOL
+        # In-flight deduplication only; finished results are reused through the cache
+        self._flight = SingleFlight(reuse_window_s=0, enabled=self.cache is not None)
+
+    # --- bookkeeping ------------------------------------------------------------
+
+    def _record(self, name: str, seconds: float, outcome: str) -> None:
+        with self._stats_lock:
+            entry = self._stats.setdefault(
+                name,
+                {"calls": 0, "cache_hits": 0, "coalesced": 0, "timeouts": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0},
+            )
+            entry["calls"] += 1
+            if outcome in ("cache_hits", "coalesced", "timeouts", "errors"):
+                entry[outcome] += 1
+            entry["total_s"] += seconds
+            entry["max_s"] = max(entry["max_s"], seconds)
+        logger.info("Tool %s %s in %.3fs", name, outcome, seconds)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-tool counters: calls, cache_hits, coalesced, timeouts, errors, total_s, max_s."""
+        with self._stats_lock:
+            return {name: dict(entry) for name, entry in self._stats.items()}
+
+    def _timeout_for(self, name: str) -> float:
+        return self.timeouts.get(name, self.default_timeout_s)
+
+    # --- message helpers --------------------------------------------------------
+
+    @staticmethod
+    def _tool_calls(state: Any) -> List[dict]:
+        messages = state["messages"] if isinstance(state, dict) else state
+        return list(getattr(messages[-1], "tool_calls", None) or [])
+
+    def _unknown_tool(self, call: dict) -> ToolMessage:
+        return ToolMessage(
+            content=f"Error: {call['name']} is not a valid tool, try one of [{', '.join(self.tools_by_name)}].",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def _cached(self, call: dict) -> Tuple[Optional[Tuple[str, str]], Optional[ToolMessage]]:
+        if self.cache is None:
+            return None, None
+        key = ToolResultCache.key(call["name"], call["args"])
+        content = self.cache.get(key)
+        if content is None:
+            return key, None
+        self._record(call["name"], 0.0, "cache_hits")
+        return key, ToolMessage(content=content, name=call["name"], tool_call_id=call["id"])
+
+    def _timed_out(self, call: dict, timeout_s: float) -> ToolMessage:
+        return ToolMessage(
+            content=(
+                f"Partial result: the {call['name']} tool did not respond within {timeout_s:g}s "
+                "and was skipped. Answer with the other tool results, or retry with a narrower query."
+            ),
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    @staticmethod
+    def _failed(call: dict, error: Exception) -> ToolMessage:
+        return ToolMessage(
+            content=f"Error: {error!r}\n Please fix your mistakes.",
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def _succeeded(self, call: dict, key, message: ToolMessage, seconds: float) -> ToolMessage:
+        if message.tool_call_id != call["id"]:
+            # Joined another run's identical call: same result, this run's call id
+            self._record(call["name"], seconds, "coalesced")
+            return message.model_copy(update={"tool_call_id": call["id"]})
+        if self.cache is not None and key is not None and message.status != "error":
+            self.cache.set(key, message.content)
+        self._record(call["name"], seconds, "ok")
+        return message
+
+    # --- execution --------------------------------------------------------------
+
+    async def _arun_call(self, call: dict, config: Optional[RunnableConfig]) -> ToolMessage:
+        tool = self.tools_by_name.get(call["name"])
+        if tool is None:
+            return self._unknown_tool(call)
+        key, cached = self._cached(call)
+        if cached is not None:
+            return cached
+        timeout_s = self._timeout_for(call["name"])
+        start = time.perf_counter()
+        try:
+            message = await asyncio.wait_for(
+                self._flight.run(key, lambda: tool.ainvoke({**call, "type": "tool_call"}, config)),
+                timeout=timeout_s,
+            )
+        except asyncio.TimeoutError:
+            self._record(call["name"], time.perf_counter() - start, "timeouts")
+            return self._timed_out(call, timeout_s)
+        except Exception as e:
+            self._record(call["name"], time.perf_counter() - start, "errors")
+            return self._failed(call, e)
+        return self._succeeded(call, key, message, time.perf_counter() - start)
+
+    async def arun(self, state: Any, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        calls = self._tool_calls(state)
+        messages = await asyncio.gather(*(self._arun_call(call, config) for call in calls))
+        return {"messages": list(messages)}
+
+    def run(self, state: Any, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        calls = self._tool_calls(state)
+        results: List[Optional[ToolMessage]] = [None] * len(calls)
+        pending = []
+        for i, call in enumerate(calls):
+            tool = self.tools_by_name.get(call["name"])
+            if tool is None:
+                results[i] = self._unknown_tool(call)
+                continue
+            key, cached = self._cached(call)
+            if cached is not None:
+                results[i] = cached
+                continue
+            future = self._pool.submit(
+                self._flight.run_sync, key, lambda call=call, tool=tool: tool.invoke({**call, "type": "tool_call"}, config)
+            )
+            pending.append((i, call, key, future, time.perf_counter()))
+
+        for i, call, key, future, start in pending:
+            timeout_s = self._timeout_for(call["name"])
+            remaining = max(0.0, start + timeout_s - time.perf_counter())
+            try:
+                message = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # The worker thread cannot be interrupted; it stays busy and its late result is discarded
+                self._record(call["name"], time.perf_counter() - start, "timeouts")
+                results[i] = self._timed_out(call, timeout_s)
+            except Exception as e:
+                self._record(call["name"], time.perf_counter() - start, "errors")
+                results[i] = self._failed(call, e)
+            else:
+                results[i] = self._succeeded(call, key, message, time.perf_counter() - start)
+        return {"messages": results}
+
+    def as_runnable(self, name: str = "action"):
+        """Return a RunnableLambda node exposing both the sync and async paths."""
+        from langchain_core.runnables import RunnableLambda
+
+        return RunnableLambda(self.run, afunc=self.arun, name=name)
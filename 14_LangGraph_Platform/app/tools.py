@@ -5,16 +5,38 @@ graphs can bind to their language models.
 """
 from __future__ import annotations
 
-from typing import List
+import os
+from functools import lru_cache
+from typing import List, Tuple
 
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_community.tools.arxiv.tool import ArxivQueryRun
-from app.rag import retrieve_information
+from app.rag import on_index_swap, retrieve_information
+from app.tool_node import ParallelToolNode, ToolResultCache
+
+
+@lru_cache(maxsize=1)
+def _build_tool_belt() -> Tuple:
+    """Instantiate the tools once; they hold no per-run state."""
+    tavily_tool = TavilySearchResults(max_results=5)
+    return (tavily_tool, ArxivQueryRun(), retrieve_information)
 
 
 def get_tool_belt() -> List:
     """Return the list of tools available to agents (Tavily, Arxiv, RAG)."""
-    tavily_tool = TavilySearchResults(max_results=5)
-    return [tavily_tool, ArxivQueryRun(), retrieve_information]
+    return list(_build_tool_belt())
+
+
+# One result cache shared by every graph in the process
+_tool_result_cache = ToolResultCache(ttl_s=float(os.environ.get("TOOL_CACHE_TTL_S", "600")))
+# Answers from the RAG tool describe the old documents once the index is hot-swapped
+on_index_swap(lambda: _tool_result_cache.invalidate(retrieve_information.name))
 
 
+def get_tool_node() -> ParallelToolNode:
+    """Return the action node: concurrent tool calls, per-tool deadlines, shared result cache."""
+    return ParallelToolNode(
+        get_tool_belt(),
+        default_timeout_s=float(os.environ.get("TOOL_TIMEOUT_S", "30")),
+        cache=_tool_result_cache,
+    )
@@ -0,0 +1,89 @@
+"""Runs/sec of the compiled graphs at increasing concurrency against a stub model.
+
+Each run goes through the real compiled graph (agent node, routing, and for
+`agent_with_helpfulness` the helpfulness node) with `StubChatModel` standing in
+for OpenAI, so results are offline and repeatable. Two modes are compared:
+
+- async: `graph.ainvoke` on one event loop, the path the LangGraph server uses.
+- threads: `graph.invoke` on worker threads, the old sync-node behaviour where
+  every in-flight run occupies a thread for the whole LLM round trip.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_concurrency --latency-ms 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+os.environ["USE_STUB_MODEL"] = "1"
+os.environ["RAG_EAGER_WARMUP"] = "0"
+# Both modes send the same questions; single-flight would answer the repeats from its cache
+os.environ["SINGLE_FLIGHT"] = "0"
+
+
+def _inputs(i: int) -> dict:
+    return {"messages": [{"role": "human", "content": f"Question {i}: what is a Direct Loan?"}]}
+
+
+async def _async_runs_per_sec(graph, concurrency: int, runs: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await graph.ainvoke(_inputs(i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(runs)))
+    return runs / (time.perf_counter() - start)
+
+
+async def _thread_runs_per_sec(graph, concurrency: int, runs: int, max_threads: int) -> float:
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    with ThreadPoolExecutor(max_workers=max_threads) as pool:
+
+        async def one(i: int):
+            async with semaphore:
+                await loop.run_in_executor(pool, graph.invoke, _inputs(i))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(runs)))
+        return runs / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--runs-per-level", type=int, default=3, help="runs = level * this (min 20)")
+    parser.add_argument(
+        "--max-threads",
+        type=int,
+        default=min(32, (os.cpu_count() or 1) + 4),
+        help="thread pool size for the sync baseline (asyncio's default)",
+    )
+    args = parser.parse_args()
+    os.environ["STUB_MODEL_LATENCY_MS"] = str(args.latency_ms)
+
+    from app.graphs.agent_with_helpfulness import graph as helpful_graph
+    from app.graphs.simple_agent import graph as simple_graph
+
+    print(f"stub latency {args.latency_ms:.0f} ms, sync baseline on {args.max_threads} threads")
+    print(f"{'graph':<24}{'concurrency':>12}{'async runs/s':>14}{'threads runs/s':>16}")
+    for name, graph in (("simple_agent", simple_graph), ("agent_with_helpfulness", helpful_graph)):
+        for level in args.levels:
+            runs = max(20, level * args.runs_per_level)
+            async_rate = await _async_runs_per_sec(graph, level, runs)
+            thread_rate = await _thread_runs_per_sec(graph, level, runs, args.max_threads)
+            print(f"{name:<24}{level:>12}{async_rate:>14.1f}{thread_rate:>16.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
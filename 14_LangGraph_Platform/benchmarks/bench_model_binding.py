@@ -0,0 +1,69 @@
+"""Per-step overhead of building the tool-bound model, before vs after memoization.
+
+"Before" reproduces what `call_model` used to do on every agent step: construct
+a fresh ChatOpenAI, fresh Tavily/Arxiv tools and re-run `bind_tools`. "After"
+is the memoized `get_model_with_tools` lookup the graphs use now. No network
+calls are made; dummy API keys are set if none are configured.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_model_binding --steps 200
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+os.environ.setdefault("RAG_EAGER_WARMUP", "0")
+
+from app.graphs.agent_with_helpfulness import _get_helpfulness_chain  # noqa: E402
+from app.models import get_chat_model, get_model_with_tools  # noqa: E402
+from app.tools import _build_tool_belt, get_tool_belt  # noqa: E402
+
+
+def _uncached_step():
+    model = get_chat_model()
+    return model.bind_tools(list(_build_tool_belt.__wrapped__()))
+
+
+def _uncached_helpfulness():
+    return _get_helpfulness_chain.__wrapped__()
+
+
+def _cached_step():
+    return get_model_with_tools(get_tool_belt())
+
+
+def _time(fn, steps: int) -> list[float]:
+    fn()  # warm imports and caches
+    samples = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = [
+        ("agent step, before", _time(_uncached_step, args.steps)),
+        ("agent step, after", _time(_cached_step, args.steps)),
+        ("helpfulness step, before", _time(_uncached_helpfulness, args.steps)),
+        ("helpfulness step, after", _time(_get_helpfulness_chain, args.steps)),
+    ]
+    print(f"{'case':<26}{'mean ms':>10}{'p95 ms':>10}")
+    for name, samples in rows:
+        p95 = statistics.quantiles(samples, n=20)[-1]
+        print(f"{name:<26}{statistics.mean(samples):>10.3f}{p95:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Recall@k and per-query latency of dense, BM25 and hybrid retrieval on labelled questions.
+
+`retrieval_questions.json` pairs each question with the PDF and the (0-based)
+pages that answer it; a question counts as recalled when any of the top-k
+chunks comes from one of those pages. Dense and hybrid retrieval embed the
+query with OpenAI, so they need OPENAI_API_KEY and the persisted index
+(`python -m app.rag`). `--bm25-only` splits the PDFs locally and needs no API.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_retrieval --k 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+os.environ.setdefault("RAG_EAGER_WARMUP", "0")
+
+from app import rag  # noqa: E402
+from app.bm25 import BM25Index, HybridRetriever  # noqa: E402
+
+QUESTIONS_PATH = Path(__file__).with_name("retrieval_questions.json")
+
+
+def _hit(docs, label) -> bool:
+    return any(
+        d.metadata.get("source") == label["source"] and d.metadata.get("page") in label["pages"]
+        for d in docs
+    )
+
+
+def _evaluate(retriever, questions):
+    retriever.invoke(questions[0]["question"])  # warm connections and caches
+    hits, latencies_ms = 0, []
+    for label in questions:
+        start = time.perf_counter()
+        docs = retriever.invoke(label["question"])
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        hits += _hit(docs, label)
+    return hits / len(questions), latencies_ms
+
+
+def _chunks_without_embeddings(data_dir: str):
+    files = rag._scan_data_dir(data_dir)
+    return [chunk for source in files for chunk in rag._split_file(Path(data_dir) / source, source)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=rag.RETRIEVAL_K)
+    parser.add_argument("--questions", type=Path, default=QUESTIONS_PATH)
+    parser.add_argument("--data-dir", default=os.environ.get("RAG_DATA_DIR", "data"))
+    parser.add_argument("--bm25-only", action="store_true", help="skip dense/hybrid (no OpenAI calls)")
+    args = parser.parse_args()
+    rag.RETRIEVAL_K = args.k
+    questions = json.loads(args.questions.read_text())
+
+    if args.bm25_only:
+        chunks = _chunks_without_embeddings(args.data_dir)
+        retrievers = {"bm25": HybridRetriever(dense=None, bm25=BM25Index(chunks), k=args.k, candidates=args.k)}
+    else:
+        chunks, vectors = rag.build_index(args.data_dir)
+        retrievers = {kind: rag.build_retriever(chunks, vectors, kind) for kind in rag.RETRIEVER_TYPES}
+
+    start = time.perf_counter()
+    BM25Index(chunks)
+    print(f"{len(chunks)} chunks, {len(questions)} questions; BM25 build {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"{'retriever':<10}{f'recall@{args.k}':>12}{'mean ms':>10}{'p95 ms':>10}")
+    for kind, retriever in retrievers.items():
+        recall, latencies = _evaluate(retriever, questions)
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{kind:<10}{recall:>12.2f}{statistics.mean(latencies):>10.2f}{p95:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Model calls saved by single-flight deduplication of identical first-turn runs.
+
+Fires `--burst` concurrent threadless runs of the same question (different
+capitalization and spacing) at a compiled graph on `StubChatModel`, then a
+second burst inside the reuse window and a burst of distinct questions. Runs
+each scenario with single-flight off and on, and reports wall time, model
+calls actually made, and the single-flight counters.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_single_flight --burst 50 --latency-ms 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+os.environ["USE_STUB_MODEL"] = "1"
+os.environ["RAG_EAGER_WARMUP"] = "0"
+os.environ.setdefault("SINGLE_FLIGHT_REUSE_S", "5")
+
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+
+QUESTION = "What is the maximum Direct Loan amount for a dependent undergraduate?"
+
+
+def _variant(i: int) -> str:
+    """The same question as different users type it."""
+    return [QUESTION, QUESTION.lower(), "  " + QUESTION.upper(), QUESTION.replace(" ", "  ")][i % 4]
+
+
+class ModelCallCounter(BaseCallbackHandler):
+    def __init__(self):
+        self.calls = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+
+
+async def _burst(graph, questions) -> tuple[float, int]:
+    counter = ModelCallCounter()
+    config = {"callbacks": [counter]}
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(graph.ainvoke({"messages": [{"role": "human", "content": q}]}, config) for q in questions)
+    )
+    return time.perf_counter() - start, counter.calls
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--graph", choices=["simple_agent", "agent_with_helpfulness"], default="simple_agent")
+    args = parser.parse_args()
+    os.environ["STUB_MODEL_LATENCY_MS"] = str(args.latency_ms)
+
+    import importlib
+
+    from app.models import get_single_flight
+
+    graph = importlib.import_module(f"app.graphs.{args.graph}").graph
+    flight = get_single_flight()
+    scenarios = [
+        ("identical burst", [_variant(i) for i in range(args.burst)]),
+        ("again, in window", [_variant(i) for i in range(args.burst)]),
+        ("distinct questions", [f"Question {i}: {QUESTION}" for i in range(args.burst)]),
+    ]
+    print(f"{args.graph}: bursts of {args.burst} concurrent threadless runs, stub latency {args.latency_ms:.0f} ms")
+    print(f"{'scenario':<20}{'single-flight':>15}{'wall ms':>9}{'model calls':>13}{'coalesced':>11}{'reused':>8}")
+    for enabled in (False, True):
+        flight.enabled = enabled
+        flight._recent.clear()
+        for name, questions in scenarios:
+            before = flight.stats()
+            wall, calls = await _burst(graph, questions)
+            after = flight.stats()
+            delta = {k: after[k] - before[k] for k in ("coalesced", "reused")}
+            print(
+                f"{name:<20}{'on' if enabled else 'off':>15}{wall * 1000:>9.0f}{calls:>13}"
+                f"{delta['coalesced']:>11}{delta['reused']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,236 @@
+"""Concurrent load generator and latency report for the served graphs.
+
+Drives `simple_agent` and `agent_with_helpfulness` through the langgraph_sdk
+async client with threadless runs streamed in `updates` mode, and reports per
+graph:
+
+- throughput (completed runs / wall time) and error count,
+- end-to-end run latency and time-to-first-event (first `updates` event) p50/p95/p99,
+- per-node latency p50/p95/p99, measured as the time from the previous event
+  (or run start) to the node's `updates` event.
+
+Load is either closed-loop (`--rate 0`: `--concurrency` workers back to back) or
+open-loop (`--rate R`: Poisson arrivals at R runs/s, seeded, capped at
+`--concurrency` in flight; open-loop latencies count from each run's scheduled
+arrival, so time spent waiting for a slot is included). Questions come from `--questions` (.txt, one per
+line, or .json with strings or {"question": ...} objects) and are used in order.
+
+Against a running server (`uv run langgraph dev`):
+
+    uv run python -m benchmarks.load_test --concurrency 20 --runs 200
+
+Offline and repeatable, in-process against the stub model:
+
+    uv run python -m benchmarks.load_test --in-process --stub-latency-ms 200 --rate 50 --seed 7
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_QUESTIONS = Path(__file__).with_name("retrieval_questions.json")
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class RunResult:
+    graph: str
+    total_s: float
+    first_event_s: Optional[float]
+    node_s: Dict[str, List[float]] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def load_questions(path: Path) -> List[str]:
+    if path.suffix == ".json":
+        items = json.loads(path.read_text())
+        return [item["question"] if isinstance(item, dict) else str(item) for item in items]
+    return [line.strip() for line in path.read_text().splitlines() if line.strip()]
+
+
+class _InProcessRuns:
+    """Mimics `client.runs.stream` over the compiled graphs, for offline runs."""
+
+    def __init__(self):
+        from app.graphs.agent_with_helpfulness import graph as helpful_graph
+        from app.graphs.simple_agent import graph as simple_graph
+
+        self.graphs = {"simple_agent": simple_graph, "agent_with_helpfulness": helpful_graph}
+
+    async def stream(self, thread_id, assistant_id, *, input, stream_mode="updates", **kwargs):
+        from langgraph_sdk.schema import StreamPart
+
+        yield StreamPart(event="metadata", data={"run_id": None})
+        async for chunk in self.graphs[assistant_id].astream(input, stream_mode=stream_mode):
+            yield StreamPart(event=stream_mode, data=chunk)
+
+
+class _InProcessClient:
+    def __init__(self):
+        self.runs = _InProcessRuns()
+
+
+async def _one_run(client, graph: str, question: str, scheduled: float | None = None) -> RunResult:
+    """Stream one run; times count from `scheduled` (an open-loop arrival) when given."""
+    last = time.perf_counter()
+    start = scheduled if scheduled is not None else last
+    first_event_s = None
+    node_s: Dict[str, List[float]] = defaultdict(list)
+    try:
+        async for part in client.runs.stream(
+            None,
+            graph,
+            input={"messages": [{"role": "human", "content": question}]},
+            stream_mode="updates",
+        ):
+            now = time.perf_counter()
+            if part.event == "error":
+                raise RuntimeError(str(part.data))
+            if part.event != "updates":
+                continue
+            if first_event_s is None:
+                first_event_s = now - start
+            for node in part.data or {}:
+                node_s[node].append(now - last)
+            last = now
+    except Exception as e:
+        return RunResult(graph, time.perf_counter() - start, first_event_s, dict(node_s), error=repr(e))
+    return RunResult(graph, time.perf_counter() - start, first_event_s, dict(node_s))
+
+
+async def run_load(
+    client,
+    graph: str,
+    questions: List[str],
+    *,
+    runs: int,
+    concurrency: int,
+    rate: float,
+    seed: int,
+) -> tuple[List[RunResult], float]:
+    """Issue `runs` runs against `graph`; return the results and the wall time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    rng = random.Random(seed)
+
+    async def issue(i: int, scheduled: float | None) -> RunResult:
+        async with semaphore:
+            return await _one_run(client, graph, questions[i % len(questions)], scheduled)
+
+    start = time.perf_counter()
+    arrival = start
+    tasks = []
+    for i in range(runs):
+        scheduled = None
+        if rate > 0:
+            # Latency counts from the scheduled arrival, so time queued behind the
+            # concurrency limit is measured instead of omitted
+            if i:
+                arrival += rng.expovariate(rate)
+                await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            scheduled = arrival
+        tasks.append(asyncio.create_task(issue(i, scheduled)))
+    results = await asyncio.gather(*tasks)
+    return list(results), time.perf_counter() - start
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {f"p{p}": float("nan") for p in PERCENTILES}
+    return {f"p{p}": float(np.percentile(values, p)) * 1000 for p in PERCENTILES}
+
+
+def summarize(graph: str, results: List[RunResult], wall_s: float) -> dict:
+    ok = [r for r in results if r.error is None]
+    nodes: Dict[str, List[float]] = defaultdict(list)
+    for r in ok:
+        for node, samples in r.node_s.items():
+            nodes[node].extend(samples)
+    return {
+        "graph": graph,
+        "runs": len(results),
+        "errors": len(results) - len(ok),
+        "throughput_rps": len(ok) / wall_s if wall_s else 0.0,
+        "run_ms": _percentiles([r.total_s for r in ok]),
+        "first_event_ms": _percentiles([r.first_event_s for r in ok if r.first_event_s is not None]),
+        "node_ms": {node: _percentiles(samples) for node, samples in sorted(nodes.items())},
+        "sample_errors": sorted({r.error for r in results if r.error})[:3],
+    }
+
+
+def _print_report(summary: dict) -> None:
+    print(
+        f"\n{summary['graph']}: {summary['runs']} runs, {summary['errors']} errors, "
+        f"{summary['throughput_rps']:.1f} runs/s"
+    )
+    print(f"  {'metric':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = [("run", summary["run_ms"]), ("first event", summary["first_event_ms"])]
+    rows += [(f"node {name}", values) for name, values in summary["node_ms"].items()]
+    for name, values in rows:
+        print(f"  {name:<26}{values['p50']:>10.1f}{values['p95']:>10.1f}{values['p99']:>10.1f}")
+    for error in summary["sample_errors"]:
+        print(f"  error: {error}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:2024")
+    parser.add_argument("--graphs", nargs="+", default=["simple_agent", "agent_with_helpfulness"])
+    parser.add_argument("--questions", type=Path, default=DEFAULT_QUESTIONS)
+    parser.add_argument("--runs", type=int, default=100, help="runs per graph")
+    parser.add_argument("--concurrency", type=int, default=10, help="max runs in flight")
+    parser.add_argument("--rate", type=float, default=0.0, help="Poisson arrivals per second; 0 = closed loop")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--in-process", action="store_true", help="run the graphs in this process on the stub model")
+    parser.add_argument("--stub-latency-ms", type=float, default=200)
+    parser.add_argument("--json", type=Path, help="also write the summaries to this file")
+    args = parser.parse_args()
+
+    if args.in_process:
+        os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+        os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+        os.environ["USE_STUB_MODEL"] = "1"
+        os.environ["STUB_MODEL_LATENCY_MS"] = str(args.stub_latency_ms)
+        os.environ["RAG_EAGER_WARMUP"] = "0"
+        # The question mix repeats; measure the graph, not single-flight dedup
+        os.environ["SINGLE_FLIGHT"] = "0"
+        client = _InProcessClient()
+        target = f"in-process stub model ({args.stub_latency_ms:.0f} ms)"
+    else:
+        from langgraph_sdk import get_client
+
+        client = get_client(url=args.url)
+        target = args.url
+
+    questions = load_questions(args.questions)
+    load = f"{args.rate:g} runs/s Poisson" if args.rate > 0 else "closed loop"
+    print(f"target {target}; {load}, concurrency {args.concurrency}, {args.runs} runs per graph, seed {args.seed}")
+    summaries = []
+    for graph in args.graphs:
+        results, wall_s = await run_load(
+            client,
+            graph,
+            questions,
+            runs=args.runs,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            seed=args.seed,
+        )
+        summary = summarize(graph, results, wall_s)
+        summaries.append(summary)
+        _print_report(summary)
+    if args.json:
+        args.json.write_text(json.dumps(summaries, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
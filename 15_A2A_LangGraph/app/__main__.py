@@ -1,15 +1,16 @@
+import json
 import logging
 import os
 import sys
 
+from contextlib import asynccontextmanager
+
 import click
-import httpx
 import uvicorn
 
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import (
-    BasePushNotificationSender,
     InMemoryPushNotificationConfigStore,
     InMemoryTaskStore,
 )
@@ -19,9 +20,14 @@ from a2a.types import (
     AgentSkill,
 )
 from dotenv import load_dotenv
+from starlette.responses import JSONResponse
+from starlette.routing import Route
 
+from app.admission import POLICIES, AdmissionController
 from app.agent import Agent
 from app.agent_executor import GeneralAgentExecutor
+from app.notifications import PooledPushNotificationSender
+from app.stores import SQLitePushNotificationConfigStore, SQLiteTaskStore
 
 
 load_dotenv()
@@ -34,10 +40,170 @@ class MissingAPIKeyError(Exception):
     """Exception for missing API key."""
 
 
+def build_app(
+    host,
+    port,
+    store,
+    store_path,
+    task_retention_hours,
+    max_concurrency=0,
+    max_queue=0,
+    queue_policy='fifo',
+    status_interval_ms=250,
+    push_max_in_flight=64,
+):
+    """Builds the A2A Starlette app: agent card, executor, task and push-config stores."""
+    capabilities = AgentCapabilities(streaming=True, push_notifications=True)
+    skills = [
+        AgentSkill(
+            id='web_search',
+            name='Web Search Tool',
+            description='Search the web for current information',
+            tags=['search', 'web', 'internet'],
+            examples=['What are the latest news about AI?'],
+        ),
+        AgentSkill(
+            id='arxiv_search',
+            name='Academic Paper Search',
+            description='Search for academic papers on arXiv',
+            tags=['research', 'papers', 'academic'],
+            examples=['Find recent papers on large language models'],
+        ),
+        AgentSkill(
+            id='rag_search',
+            name='Document Retrieval',
+            description='Search through loaded documents for specific information',
+            tags=['documents', 'rag', 'retrieval'],
+            examples=['What do the policy documents say about student loans?'],
+        ),
+    ]
+    agent_card = AgentCard(
+        name='General Purpose Agent',
+        description='A helpful AI assistant with web search, academic paper search, and document retrieval capabilities',
+        url=f'http://{host}:{port}/',
+        version='1.0.0',
+        default_input_modes=Agent.SUPPORTED_CONTENT_TYPES,
+        default_output_modes=Agent.SUPPORTED_CONTENT_TYPES,
+        capabilities=capabilities,
+        skills=skills,
+    )
+
+    # --8<-- [start:DefaultRequestHandler]
+    if store == 'sqlite':
+        retention_s = task_retention_hours * 3600
+        task_store = SQLiteTaskStore(store_path, retention_s=retention_s)
+        push_config_store = SQLitePushNotificationConfigStore(store_path, retention_s=retention_s)
+        logger.info(f'Persisting tasks to {store_path} (retention {task_retention_hours:g}h)')
+    else:
+        task_store = InMemoryTaskStore()
+        push_config_store = InMemoryPushNotificationConfigStore()
+    push_sender = PooledPushNotificationSender(push_config_store, max_in_flight=push_max_in_flight)
+    admission = None
+    if max_concurrency > 0:
+        admission = AdmissionController(max_concurrency, max_queue, policy=queue_policy)
+        logger.info(f'Admission control: {max_concurrency} concurrent, {max_queue} queued ({queue_policy})')
+    agent_executor = GeneralAgentExecutor(admission=admission, status_interval_s=status_interval_ms / 1000)
+    request_handler = DefaultRequestHandler(
+        agent_executor=agent_executor,
+        task_store=task_store,
+        push_config_store=push_config_store,
+        push_sender= push_sender
+    )
+    server = A2AStarletteApplication(
+        agent_card=agent_card, http_handler=request_handler
+    )
+
+    async def metrics(request):
+        return JSONResponse({
+            'admission': admission.metrics() if admission else None,
+            'push': push_sender.metrics(),
+            'single_flight': agent_executor.agent.single_flight.stats(),
+        })
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        # Deliver the last queued push notifications before the process exits
+        await push_sender.aclose()
+
+    return server.build(routes=[Route('/metrics', metrics, methods=['GET'])], lifespan=lifespan)
+    # --8<-- [end:DefaultRequestHandler]
+
+
+def create_app():
+    """Uvicorn factory for --workers mode; each worker builds its app from the parent's options."""
+    return build_app(**json.loads(os.environ['A2A_SERVER_OPTIONS']))
+
+
+def _prepare_workers(workers, store):
+    """Sets up state shared by all workers before uvicorn spawns them.
+
+    Tasks and checkpoints must live in shared SQLite files so a context_id
+    continues on whichever worker takes the next request, and the RAG index is
+    built once here, then memory-mapped read-only by every worker.
+    """
+    if store == 'memory':
+        raise click.BadParameter('--workers > 1 needs --store sqlite; in-memory tasks are per worker', param_hint='--store')
+    if os.environ.setdefault('CHECKPOINTER', 'sqlite') != 'sqlite':
+        raise click.BadParameter('--workers > 1 needs CHECKPOINTER=sqlite; in-memory threads are per worker')
+    os.environ.setdefault('RAG_INDEX_DIR', '.rag_index')
+    try:
+        from app.rag import build_shared_index
+
+        build_shared_index()
+    except Exception as e:
+        # Not fatal: workers build the index lazily on the first RAG call
+        logger.warning(f'Could not prebuild the shared RAG index: {e}')
+    logger.info(f'Starting {workers} workers sharing {os.environ["RAG_INDEX_DIR"]}')
+
+
 @click.command()
 @click.option('--host', 'host', default='localhost')
 @click.option('--port', 'port', default=10000)
-def main(host, port):
+@click.option(
+    '--store',
+    type=click.Choice(['memory', 'sqlite']),
+    default=None,
+    help='Where tasks and push configs live; sqlite persists them with expiry. Default: memory, or sqlite with --workers > 1.',
+)
+@click.option('--store-path', default='a2a_tasks.sqlite', help='SQLite file for --store sqlite.')
+@click.option(
+    '--task-retention-hours',
+    default=168.0,
+    help='How long finished tasks (and push configs) are kept with --store sqlite.',
+)
+@click.option(
+    '--max-concurrency',
+    default=16,
+    help='Agent executions run at once (per worker); 0 disables admission control.',
+)
+@click.option('--max-queue', default=64, help='Requests waiting for a slot before new ones are rejected.')
+@click.option(
+    '--queue-policy',
+    type=click.Choice(POLICIES),
+    default='fifo',
+    help='priority orders waiters by the message metadata "priority" (lower first).',
+)
+@click.option(
+    '--status-interval-ms',
+    default=250,
+    help='Minimum gap between a task\'s progress updates; the latest one in each window is sent.',
+)
+@click.option('--push-max-in-flight', default=64, help='Concurrent push-notification POSTs.')
+@click.option('--workers', default=1, help='Server processes; > 1 shares tasks, threads and the RAG index via local files.')
+def main(
+    host,
+    port,
+    store,
+    store_path,
+    task_retention_hours,
+    max_concurrency,
+    max_queue,
+    queue_policy,
+    status_interval_ms,
+    push_max_in_flight,
+    workers,
+):
     """Starts the General Agent server with A2A protocol support."""
     try:
         if not os.getenv('OPENAI_API_KEY'):
@@ -45,59 +211,24 @@ def main(host, port):
                 'OPENAI_API_KEY environment variable not set.'
             )
 
-        capabilities = AgentCapabilities(streaming=True, push_notifications=True)
-        skills = [
-            AgentSkill(
-                id='web_search',
-                name='Web Search Tool',
-                description='Search the web for current information',
-                tags=['search', 'web', 'internet'],
-                examples=['What are the latest news about AI?'],
-            ),
-            AgentSkill(
-                id='arxiv_search',
-                name='Academic Paper Search',
-                description='Search for academic papers on arXiv',
-                tags=['research', 'papers', 'academic'],
-                examples=['Find recent papers on large language models'],
-            ),
-            AgentSkill(
-                id='rag_search',
-                name='Document Retrieval',
-                description='Search through loaded documents for specific information',
-                tags=['documents', 'rag', 'retrieval'],
-                examples=['What do the policy documents say about student loans?'],
-            ),
-        ]
-        agent_card = AgentCard(
-            name='General Purpose Agent',
-            description='A helpful AI assistant with web search, academic paper search, and document retrieval capabilities',
-            url=f'http://{host}:{port}/',
-            version='1.0.0',
-            default_input_modes=Agent.SUPPORTED_CONTENT_TYPES,
-            default_output_modes=Agent.SUPPORTED_CONTENT_TYPES,
-            capabilities=capabilities,
-            skills=skills,
-        )
-
-
-        # --8<-- [start:DefaultRequestHandler]
-        httpx_client = httpx.AsyncClient()
-        push_config_store = InMemoryPushNotificationConfigStore()
-        push_sender = BasePushNotificationSender(httpx_client=httpx_client,
-                        config_store=push_config_store)
-        request_handler = DefaultRequestHandler(
-            agent_executor=GeneralAgentExecutor(),
-            task_store=InMemoryTaskStore(),
-            push_config_store=push_config_store,
-            push_sender= push_sender
-        )
-        server = A2AStarletteApplication(
-            agent_card=agent_card, http_handler=request_handler
-        )
-
-        uvicorn.run(server.build(), host=host, port=port)
-        # --8<-- [end:DefaultRequestHandler]
+        options = {
+            'host': host,
+            'port': port,
+            'store': store or ('sqlite' if workers > 1 else 'memory'),
+            'store_path': store_path,
+            'task_retention_hours': task_retention_hours,
+            'max_concurrency': max_concurrency,
+            'max_queue': max_queue,
+            'queue_policy': queue_policy,
+            'status_interval_ms': status_interval_ms,
+            'push_max_in_flight': push_max_in_flight,
+        }
+        if workers > 1:
+            _prepare_workers(workers, options['store'])
+            os.environ['A2A_SERVER_OPTIONS'] = json.dumps(options)
+            uvicorn.run('app.__main__:create_app', factory=True, host=host, port=port, workers=workers)
+        else:
+            uvicorn.run(build_app(**options), host=host, port=port)
 
     except MissingAPIKeyError as e:
         logger.error(f'Error: {e}')
@@ -0,0 +1,157 @@
+"""Admission control for agent executions.
+
+Without a limit, a burst of requests becomes the same number of parallel graph
+runs. They all hit the model provider's rate limits and slow down together.
+`AdmissionController` runs at most `max_concurrency` executions at a time.
+Up to `max_queue` more wait in line, first in first out, or by priority then
+arrival when `policy="priority"`. Requests beyond that are rejected at once
+with `QueueFullError`, which carries a retry-after hint estimated from recent
+execution times.
+
+`metrics()` reports running and queued counts, admissions, rejections and
+queue-wait percentiles.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Tuple
+
+POLICIES = ("fifo", "priority")
+
+
+class QueueFullError(Exception):
+    """Raised when both the execution slots and the wait queue are full."""
+
+    def __init__(self, retry_after_s: float):
+        super().__init__(f"Server busy; retry after {retry_after_s:.0f}s")
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    """Caps concurrent executions and queues a bounded number of waiters."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        *,
+        policy: str = "fifo",
+        initial_service_s: float = 5.0,
+        window: int = 1000,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.policy = policy
+        self.running = 0
+        # Heap of (priority, arrival, future); lower priority values go first.
+        # Cancelled waiters stay in it (their future is done) until popped or compacted.
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._queued = 0
+        self._arrivals = itertools.count()
+        # Exponentially weighted mean execution time, for the retry-after hint
+        self._service_s = initial_service_s
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._counts = {"admitted": 0, "queued": 0, "rejected": 0, "cancelled_in_queue": 0}
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def retry_after_s(self) -> float:
+        """Rough time until a request sent now would start: the line ahead of it, drained in parallel."""
+        ahead = self.queued + 1
+        return max(1.0, math.ceil(self._service_s * ahead / self.max_concurrency))
+
+    async def acquire(self, priority: int = 0) -> float:
+        """Wait for an execution slot; return the time spent queued.
+
+        Raises QueueFullError without waiting when the queue is full.
+        """
+        if self.running < self.max_concurrency and not self.queued:
+            self.running += 1
+            self._record_admission(0.0)
+            return 0.0
+        if self.queued >= self.max_queue:
+            self._counts["rejected"] += 1
+            raise QueueFullError(self.retry_after_s())
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority if self.policy == "priority" else 0, next(self._arrivals), future)
+        heapq.heappush(self._waiters, entry)
+        self._queued += 1
+        self._counts["queued"] += 1
+        start = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the waiter was cancelled; pass it on
+                self._release_slot()
+            else:
+                # Lazy deletion: `_release_slot` skips the done future, which may
+                # already have been popped, so the entry is not searched for here
+                self._queued -= 1
+                self._counts["cancelled_in_queue"] += 1
+                if len(self._waiters) > 2 * self._queued + 64:
+                    self._waiters = [w for w in self._waiters if not w[2].done()]
+                    heapq.heapify(self._waiters)
+            raise
+        waited = time.monotonic() - start
+        self._record_admission(waited)
+        return waited
+
+    def release(self, service_s: float | None = None) -> None:
+        """Free a slot; `service_s` (the execution's duration) refines the retry-after estimate."""
+        if service_s is not None:
+            self._service_s = 0.8 * self._service_s + 0.2 * service_s
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        # Hand the slot straight to the next live waiter, so running never dips and refills
+        while self._waiters:
+            *_, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._queued -= 1
+                future.set_result(None)
+                return
+        self.running -= 1
+
+    def _record_admission(self, waited: float) -> None:
+        self._counts["admitted"] += 1
+        self._waits.append(waited)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0) -> AsyncIterator[float]:
+        """`async with controller.slot() as queued_s:` runs the body in an execution slot."""
+        queued_s = await self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield queued_s
+        finally:
+            self.release(time.monotonic() - start)
+
+    def metrics(self) -> Dict[str, float]:
+        waits = sorted(self._waits)
+
+        def pct(p: float) -> float:
+            return waits[min(len(waits) - 1, int(p * len(waits)))] * 1000 if waits else 0.0
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queued": self.queued,
+            **self._counts,
+            "queue_wait_p50_ms": pct(0.50),
+            "queue_wait_p95_ms": pct(0.95),
+            "queue_wait_max_ms": waits[-1] * 1000 if waits else 0.0,
+            "mean_execution_s": self._service_s,
+        }
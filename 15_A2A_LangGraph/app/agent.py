@@ -1,18 +1,51 @@
+import logging
 import os
 
 from collections.abc import AsyncIterable
 from typing import Any, Literal
 
-from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import create_react_agent
 from pydantic import BaseModel
 
 from app.agent_graph_with_helpfulness import build_agent_graph_with_helpfulness
+from app.checkpointer import checkpointer_from_env
+from app.single_flight import Flight, FlightAbandoned, single_flight_from_env
+from app.usage import LLMUsageTracker
 
+logger = logging.getLogger(__name__)
+
+# MemorySaver by default; CHECKPOINTER=sqlite for bounded, persistent threads
+memory = checkpointer_from_env()
+
+
+class _StatusTrailerFilter:
+    """Holds back a possible trailing `STATUS: ...` line from streamed answer text.
+
+    Text is released as soon as the current line can no longer be the status
+    line, so streaming is delayed by at most one short line.
+    """
+
+    def __init__(self):
+        self._pending = ''
+
+    @staticmethod
+    def _maybe_status(line: str) -> bool:
+        text = line.lstrip().upper()
+        return 'STATUS:'.startswith(text) or text.startswith('STATUS:')
+
+    def feed(self, text: str) -> str:
+        head, newline, last = (self._pending + text).rpartition('\n')
+        if self._maybe_status(last):
+            self._pending = last
+            return head + newline
+        self._pending = ''
+        return head + newline + last
+
+    def reset(self):
+        self._pending = ''
 
-memory = MemorySaver()
 
 class ResponseFormat(BaseModel):
     """Respond to the user in this format."""
@@ -38,49 +71,196 @@ class Agent:
         'Set response status to completed if the request is complete.'
     )
 
-    def __init__(self):
-        self.model = ChatOpenAI(
-            model=os.getenv('TOOL_LLM_NAME', 'gpt-4o-mini'),
-            openai_api_key=os.getenv('OPENAI_API_KEY'),
-            openai_api_base=os.getenv('TOOL_LLM_URL', 'https://api.openai.com/v1'),
-            temperature=0,
-        )
+    def __init__(self, model=None, checkpointer=None, single_flight=None):
+        self.model = model or self._default_model()
+        self.checkpointer = checkpointer or memory
+        # Identical first-turn queries share one graph run (SINGLE_FLIGHT=0 disables)
+        self.single_flight = single_flight or single_flight_from_env()
         # Use the new graph with helpfulness evaluation for A2A protocol compatibility
         self.graph = build_agent_graph_with_helpfulness(
             self.model,
             self.SYSTEM_INSTRUCTION,
             self.FORMAT_INSTRUCTION,
-            checkpointer=memory
+            checkpointer=self.checkpointer
+        )
+
+    @staticmethod
+    def _default_model():
+        if os.getenv('USE_STUB_MODEL', '0').lower() in ('1', 'true', 'yes'):
+            from app.stub_model import StubChatModel
+
+            return StubChatModel(
+                latency_s=float(os.getenv('STUB_MODEL_LATENCY_MS', '50')) / 1000,
+                token_latency_s=float(os.getenv('STUB_MODEL_TOKEN_LATENCY_MS', '0')) / 1000,
+                capacity=int(os.getenv('STUB_MODEL_CAPACITY', '0')),
+            )
+        return ChatOpenAI(
+            model=os.getenv('TOOL_LLM_NAME', 'gpt-4o-mini'),
+            openai_api_key=os.getenv('OPENAI_API_KEY'),
+            openai_api_base=os.getenv('TOOL_LLM_URL', 'https://api.openai.com/v1'),
+            temperature=0,
+            # Report token usage on streamed responses too, for per-task accounting
+            stream_usage=True,
         )
 
     async def stream(self, query, context_id) -> AsyncIterable[dict[str, Any]]:
-        inputs = {'messages': [('user', query)]}
+        """Run the graph with `astream`, yielding progress, answer tokens and the final response.
+
+        Answer tokens come from the agent node's model call as items with
+        `answer_delta=True`; `new_answer=True` marks the first token of a fresh
+        generation (e.g. a retry after a failed helpfulness check), whose text
+        replaces what was streamed before. The trailing status line the model
+        appends is not streamed. The last item is the authoritative structured
+        response, with the task's LLM calls and tokens under `usage`.
+
+        A new context's first turn goes through single-flight: if the same
+        query is already running (or finished moments ago), this call replays
+        that run's items instead of running the graph, and its thread gets a
+        copy of the resulting state so the conversation can continue.
+        """
+        key = await self._single_flight_key(query, context_id)
+        if key is None:
+            async for item in self._stream_graph(query, context_id):
+                yield item
+            return
+
+        leader, flight = self.single_flight.join(key)
+        if not leader:
+            try:
+                async for item in self._follow(flight, context_id):
+                    yield item
+                return
+            except FlightAbandoned:
+                logger.info(f'Shared run for context {context_id} stopped early; running the query directly')
+            async for item in self._stream_graph(query, context_id):
+                yield item
+            return
+
+        try:
+            async for item in self._stream_graph(query, context_id):
+                if item.get('answer_delta') or not (item['is_task_complete'] or item['require_user_input']):
+                    flight.publish(item)
+                else:
+                    state = await self.graph.aget_state({'configurable': {'thread_id': context_id}})
+                    flight.finish(item, state.values)
+                yield item
+        finally:
+            flight.abandon()
+
+    async def _single_flight_key(self, query, context_id):
+        """Single-flight key for a new context's first turn; None when disabled or the thread has history."""
+        if not self.single_flight.enabled:
+            return None
+        state = await self.graph.aget_state({'configurable': {'thread_id': context_id}})
+        if state.values.get('messages'):
+            return None
+        model = getattr(self.model, 'model_name', None) or type(self.model).__name__
+        return self.single_flight.key(query, model, self.SYSTEM_INSTRUCTION, self.FORMAT_INSTRUCTION)
+
+    async def _follow(self, flight: Flight, context_id):
+        """Replay a shared run's items, then copy its final state into this context's thread."""
+        async for item in flight.follow():
+            yield item
         config = {'configurable': {'thread_id': context_id}}
+        # Every finished run ends in the helpfulness node, which routes to END from this state
+        await self.graph.aupdate_state(config, flight.state, as_node='helpfulness')
+        flush = getattr(self.checkpointer, 'aflush', None)
+        if flush is not None:
+            await flush()
+        logger.info(f'Context {context_id} answered by a shared run')
+        # This task made no model calls of its own
+        yield {**flight.final, 'usage': LLMUsageTracker().summary()}
 
-        for item in self.graph.stream(inputs, config, stream_mode='values'):
-            message = item['messages'][-1]
-            if (
-                isinstance(message, AIMessage)
-                and message.tool_calls
-                and len(message.tool_calls) > 0
-            ):
-                yield {
-                    'is_task_complete': False,
-                    'require_user_input': False,
-                    'content': 'Searching for information...',
-                }
-            elif isinstance(message, ToolMessage):
+    async def _stream_graph(self, query, context_id) -> AsyncIterable[dict[str, Any]]:
+        inputs = {'messages': [('user', query)]}
+        tracker = LLMUsageTracker()
+        config = {'configurable': {'thread_id': context_id}, 'callbacks': [tracker]}
+        answer_id = None
+        new_answer = False
+        trailer = _StatusTrailerFilter()
+
+        async for mode, chunk in self.graph.astream(
+            inputs, config, stream_mode=['updates', 'messages']
+        ):
+            if mode == 'messages':
+                message, metadata = chunk
+                if (
+                    metadata.get('langgraph_node') != 'agent'
+                    or not isinstance(message, AIMessageChunk)
+                    or message.tool_call_chunks
+                    or not isinstance(message.content, str)
+                    or not message.content
+                ):
+                    continue
+                if message.id != answer_id:
+                    answer_id = message.id
+                    new_answer = True
+                    trailer.reset()
+                text = trailer.feed(message.content)
+                if not text:
+                    continue
                 yield {
                     'is_task_complete': False,
                     'require_user_input': False,
-                    'content': 'Processing the results...',
+                    'content': text,
+                    'answer_delta': True,
+                    'new_answer': new_answer,
                 }
+                new_answer = False
+                continue
 
-        yield self.get_agent_response(config)
+            for node, update in chunk.items():
+                messages = (update or {}).get('messages') or []
+                if node == 'agent' and messages and getattr(messages[-1], 'tool_calls', None):
+                    yield {
+                        'is_task_complete': False,
+                        'require_user_input': False,
+                        'content': 'Searching for information...',
+                    }
+                elif node == 'action' and any(isinstance(m, ToolMessage) for m in messages):
+                    yield {
+                        'is_task_complete': False,
+                        'require_user_input': False,
+                        'content': 'Processing the results...',
+                    }
+
+        flush = getattr(self.checkpointer, 'aflush', None)
+        if flush is not None:
+            # Commit the finished turn so the next one can run on any server worker
+            await flush()
+        current_state = await self.graph.aget_state(config)
+        response = self._response_from_state(current_state.values)
+        response['usage'] = tracker.summary()
+        yield response
+
+    async def discard_incomplete_turn(self, context_id):
+        """Answers tool calls left pending by a cancelled run, so the thread stays valid.
+
+        A run cancelled between the agent's tool call and the tool results
+        would otherwise leave an AIMessage whose tool calls have no
+        ToolMessages, which the model API rejects on the next turn.
+        """
+        config = {'configurable': {'thread_id': context_id}}
+        state = await self.graph.aget_state(config)
+        messages = state.values.get('messages') or []
+        if not messages or not isinstance(messages[-1], AIMessage) or not messages[-1].tool_calls:
+            return
+        cancelled = [
+            ToolMessage(content='Cancelled by the client.', tool_call_id=call['id'])
+            for call in messages[-1].tool_calls
+        ]
+        await self.graph.aupdate_state(config, {'messages': cancelled}, as_node='action')
+        flush = getattr(self.checkpointer, 'aflush', None)
+        if flush is not None:
+            await flush()
 
     def get_agent_response(self, config):
         current_state = self.graph.get_state(config)
-        structured_response = current_state.values.get('structured_response')
+        return self._response_from_state(current_state.values)
+
+    @staticmethod
+    def _response_from_state(values):
+        structured_response = values.get('structured_response')
         if structured_response and isinstance(
             structured_response, ResponseFormat
         ):
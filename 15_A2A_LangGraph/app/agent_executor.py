@@ -1,4 +1,8 @@
+import asyncio
 import logging
+import time
+
+from uuid import uuid4
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
@@ -7,9 +11,9 @@ from a2a.types import (
     InternalError,
     InvalidParamsError,
     Part,
+    TaskNotCancelableError,
     TaskState,
     TextPart,
-    UnsupportedOperationError,
 )
 from a2a.utils import (
     new_agent_text_message,
@@ -17,7 +21,9 @@ from a2a.utils import (
 )
 from a2a.utils.errors import ServerError
 
+from app.admission import AdmissionController, QueueFullError
 from app.agent import Agent
+from app.notifications import StatusCoalescer
 
 
 logging.basicConfig(level=logging.INFO)
@@ -27,8 +33,18 @@ logger = logging.getLogger(__name__)
 class GeneralAgentExecutor(AgentExecutor):
     """General Purpose AgentExecutor with A2A Protocol Support."""
 
-    def __init__(self):
+    # How long cancel() waits for the interrupted run to unwind before replying
+    CANCEL_GRACE_S = 5.0
+
+    def __init__(self, admission: AdmissionController | None = None, status_interval_s: float = 0.25):
         self.agent = Agent()
+        # Caps concurrent graph runs and queues the overflow; None runs everything at once
+        self.admission = admission
+        # Minimum gap between a task's 'working' status updates (and so their push notifications)
+        self.status_interval_s = status_interval_s
+        # Running executions by task id, so cancel() can interrupt them
+        self._running: dict[str, asyncio.Task] = {}
+        self._cancel_requested: set[str] = set()
 
     async def execute(
         self,
@@ -45,23 +61,60 @@ class GeneralAgentExecutor(AgentExecutor):
             task = new_task(context.message)  # type: ignore
             await event_queue.enqueue_event(task)
         updater = TaskUpdater(event_queue, task.id, task.context_id)
+        progress = StatusCoalescer(updater, self.status_interval_s)
+        # Answer tokens stream as chunks of one 'result' artifact; the final
+        # structured response replaces them as its last chunk.
+        artifact_id = str(uuid4())
+        streamed = False
+        self._running[task.id] = asyncio.current_task()
+        admitted_at = None
         try:
+            if self.admission is not None:
+                queued_s = await self.admission.acquire(self._priority(context))
+                admitted_at = time.monotonic()
+                if queued_s:
+                    logger.info(f'Task {task.id} waited {queued_s * 1000:.0f} ms for an execution slot')
             logger.info(f"Starting agent stream for query: {query}")
             async for item in self.agent.stream(query, task.context_id):
                 is_task_complete = item['is_task_complete']
                 require_user_input = item['require_user_input']
+
+                if item.get('answer_delta'):
+                    await updater.add_artifact(
+                        [Part(root=TextPart(text=item['content']))],
+                        artifact_id=artifact_id,
+                        name='result',
+                        append=streamed and not item.get('new_answer'),
+                        last_chunk=False,
+                    )
+                    streamed = True
+                    continue
+
                 logger.info(f"Stream item - complete: {is_task_complete}, requires_input: {require_user_input}")
 
                 if not is_task_complete and not require_user_input:
-                    await updater.update_status(
-                        TaskState.working,
+                    await progress.working(
                         new_agent_text_message(
                             item['content'],
                             task.context_id,
                             task.id,
                         ),
                     )
-                elif require_user_input:
+                    continue
+
+                # The final status supersedes any progress update still waiting for its slot
+                await progress.close()
+                if require_user_input:
+                    if streamed:
+                        # Close the partially streamed artifact with the final text
+                        await updater.add_artifact(
+                            [Part(root=TextPart(text=item['content']))],
+                            artifact_id=artifact_id,
+                            name='result',
+                            metadata=self._usage_metadata(item),
+                            append=False,
+                            last_chunk=True,
+                        )
                     await updater.update_status(
                         TaskState.input_required,
                         new_agent_text_message(
@@ -75,14 +128,59 @@ class GeneralAgentExecutor(AgentExecutor):
                 else:
                     await updater.add_artifact(
                         [Part(root=TextPart(text=item['content']))],
+                        artifact_id=artifact_id,
                         name='result',
+                        metadata=self._usage_metadata(item),
+                        append=False,
+                        last_chunk=True,
                     )
                     await updater.complete()
                     break
 
+        except QueueFullError as e:
+            logger.warning(f'Rejecting task {task.id}: {e}')
+            # On the message too, since the stored task keeps the status message but not the event metadata
+            retry = {'retry_after_s': e.retry_after_s}
+            message = new_agent_text_message(str(e), task.context_id, task.id)
+            message.metadata = retry
+            await updater.update_status(TaskState.rejected, message, final=True, metadata=retry)
+        except asyncio.CancelledError:
+            if task.id not in self._cancel_requested:
+                raise
+            # Cancelled by cancel(): the graph, its model and tool calls are unwound.
+            # Finish normally so the handler closes the queue after the final event.
+            asyncio.current_task().uncancel()
+            await progress.close()
+            await self.agent.discard_incomplete_turn(task.context_id)
+            await updater.cancel()
+            logger.info(f'Task {task.id} canceled')
         except Exception as e:
             logger.error(f'An error occurred while streaming the response: {e}')
             raise ServerError(error=InternalError()) from e
+        finally:
+            await progress.close()
+            if admitted_at is not None:
+                self.admission.release(time.monotonic() - admitted_at)
+            self._running.pop(task.id, None)
+            self._cancel_requested.discard(task.id)
+
+    @staticmethod
+    def _priority(context: RequestContext) -> int:
+        """Queue priority from the message metadata (`priority`, lower runs first); default 0."""
+        metadata = (context.message.metadata if context.message else None) or {}
+        try:
+            return int(metadata.get('priority', 0))
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def _usage_metadata(item: dict) -> dict | None:
+        """LLM calls and tokens spent on the task, attached to the final artifact."""
+        usage = item.get('usage')
+        if usage is None:
+            return None
+        logger.info(f"Task usage: {usage['llm_calls']} LLM calls, {usage['total_tokens']} tokens")
+        return {'usage': usage}
 
     def _validate_request(self, context: RequestContext) -> bool:
         return False
@@ -90,4 +188,27 @@ class GeneralAgentExecutor(AgentExecutor):
     async def cancel(
         self, context: RequestContext, event_queue: EventQueue
     ) -> None:
-        raise ServerError(error=UnsupportedOperationError())
+        """Interrupts the task's running graph and reports it as canceled.
+
+        The execution emits `canceled` on its own queue, which reaches both
+        the original client and the cancel request. A task waiting for input
+        has nothing running and is marked canceled directly. A task that is
+        working but not running in this process belongs to another worker
+        (`--workers`); marking it canceled in the shared store would be
+        overwritten by that worker's later updates, so it is refused.
+        """
+        running = self._running.get(context.task_id)
+        if running is None or running.done():
+            state = context.current_task.status.state if context.current_task else None
+            if state not in (TaskState.input_required, TaskState.auth_required):
+                raise ServerError(
+                    error=TaskNotCancelableError(
+                        message=f'Task {context.task_id} is {state.value if state else "unknown"} '
+                        'and not running in this worker'
+                    )
+                )
+            await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
+            return
+        self._cancel_requested.add(context.task_id)
+        running.cancel()
+        await asyncio.wait({running}, timeout=self.CANCEL_GRACE_S)
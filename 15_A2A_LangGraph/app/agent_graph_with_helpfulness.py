@@ -1,18 +1,30 @@
 """Agent graph with a post-response helpfulness check loop for A2A protocol compatibility.
 
-After the agent responds, a secondary node evaluates helpfulness ('Y'/'N').
+After the agent responds, a secondary node evaluates helpfulness ('Y'/'N')
+with a tiered evaluator: cached verdicts and clear-cut heuristic cases skip
+the LLM judge entirely (see app.helpfulness).
 If helpful, end; otherwise, continue the loop or terminate after a safe limit.
 """
 from __future__ import annotations
 
-from typing import Dict, Any, Annotated, TypedDict, List
+import logging
+import re
+from typing import Dict, Any, Annotated, TypedDict, List, Tuple
 
+from langchain_core.runnables import RunnableLambda
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, SystemMessage
+
+from app.compaction import compactor_from_env
+from app.helpfulness import HelpfulnessEvaluator
+
+
+logger = logging.getLogger(__name__)
 
 
 class AgentState(TypedDict):
@@ -35,6 +47,24 @@ def call_model(state: Dict[str, Any], model) -> Dict[str, Any]:
     return {"messages": [response]}
 
 
+STATUS_INSTRUCTION = (
+    "When you give a final answer (no tool calls), end it with one last line that is exactly "
+    "'STATUS: completed', 'STATUS: input_required' or 'STATUS: error'."
+)
+
+_STATUS_LINE = re.compile(r"\n?[ \t]*STATUS:[ \t]*(completed|input_required|error)[ \t.]*$", re.IGNORECASE)
+
+
+def parse_status(content: Any) -> Tuple[str, str] | None:
+    """Split a final answer into (status, message text), or None if it has no status line."""
+    if not isinstance(content, str):
+        return None
+    match = _STATUS_LINE.search(content.rstrip())
+    if match is None:
+        return None
+    return match.group(1).lower(), content.rstrip()[: match.start()].rstrip()
+
+
 def route_to_action_or_helpfulness(state: Dict[str, Any]):
     """Decide whether to execute tools or run the helpfulness evaluator."""
     last_message = state["messages"][-1]
@@ -43,23 +73,14 @@ def route_to_action_or_helpfulness(state: Dict[str, Any]):
     return "helpfulness"
 
 
-def helpfulness_node(state: Dict[str, Any], model) -> Dict[str, Any]:
-    """Evaluate helpfulness of the latest response relative to the initial query."""
-    # If we've exceeded loop limit, short-circuit with END decision marker
-    if len(state["messages"]) > 10:
-        return {"messages": [AIMessage(content="HELPFULNESS:END")]}    
-
-    initial_query = state["messages"][0]
-    final_response = state["messages"][-1]
-
-    prompt_template = """
+HELPFULNESS_PROMPT = """
   Given an initial query and a final response, determine if the final response is extremely helpful or not. 
   A helpful response should:
   - Provide accurate and relevant information
   - Be complete and address the user's specific need
   - Use appropriate tools when necessary
   
-  Please indicate helpfulness with a 'Y' and unhelpfulness as an 'N'.
+  Please indicate helpfulness with a 'Y' and unhelpfulness as an 'N'. Reply with the single letter only.
 
   Initial Query:
   {initial_query}
@@ -67,19 +88,38 @@ def helpfulness_node(state: Dict[str, Any], model) -> Dict[str, Any]:
   Final Response:
   {final_response}"""
 
-    helpfulness_prompt_template = PromptTemplate.from_template(prompt_template)
-    helpfulness_chain = (
-        helpfulness_prompt_template | model | StrOutputParser()
-    )
 
-    helpfulness_response = helpfulness_chain.invoke(
-        {
-            "initial_query": initial_query.content,
-            "final_response": final_response.content,
-        }
-    )
+def build_helpfulness_evaluator(model) -> HelpfulnessEvaluator:
+    """Return a tiered evaluator whose LLM judge is `model` capped at one output token."""
+    helpfulness_prompt_template = PromptTemplate.from_template(HELPFULNESS_PROMPT)
+    judge = helpfulness_prompt_template | model.bind(max_tokens=1) | StrOutputParser()
+    return HelpfulnessEvaluator(judge)
+
+
+def helpfulness_node(state: Dict[str, Any], evaluator: HelpfulnessEvaluator) -> Dict[str, Any]:
+    """Evaluate helpfulness of the latest response relative to the initial query."""
+    # If we've exceeded loop limit, short-circuit with END decision marker
+    if len(state["messages"]) > 10:
+        return {"messages": [AIMessage(content="HELPFULNESS:END")]}    
+
+    initial_query = state["messages"][0]
+    final_response = state["messages"][-1]
+
+    decision = evaluator.evaluate(initial_query.content, final_response.content)
+    logger.info(f"Helpfulness {decision}; evaluator metrics: {evaluator.metrics()}")
+    return {"messages": [AIMessage(content=f"HELPFULNESS:{decision}")]}
 
-    decision = "Y" if "Y" in helpfulness_response else "N"
+
+async def ahelpfulness_node(state: Dict[str, Any], evaluator: HelpfulnessEvaluator) -> Dict[str, Any]:
+    """Async variant of `helpfulness_node`; only an escalated judge call is awaited."""
+    if len(state["messages"]) > 10:
+        return {"messages": [AIMessage(content="HELPFULNESS:END")]}
+
+    initial_query = state["messages"][0]
+    final_response = state["messages"][-1]
+
+    decision = await evaluator.aevaluate(initial_query.content, final_response.content)
+    logger.info(f"Helpfulness {decision}; evaluator metrics: {evaluator.metrics()}")
     return {"messages": [AIMessage(content=f"HELPFULNESS:{decision}")]}
 
 
@@ -97,54 +137,99 @@ def helpfulness_decision(state: Dict[str, Any]):
 
 
 def build_agent_graph_with_helpfulness(model, system_instruction, format_instruction, checkpointer=None):
-    """Build an agent graph with an auxiliary helpfulness evaluation subgraph."""
+    """Build an agent graph with an auxiliary helpfulness evaluation subgraph.
+
+    Nodes have sync and async implementations; `Agent.stream` runs the graph
+    with `astream`, so model and judge calls never block the server's event loop.
+    """
     from app.tools import get_tool_belt
     from app.agent import ResponseFormat
-    
+
+    # Bounds the history resent on every step; HISTORY_SUMMARIZE=1 summarizes with `model`
+    compactor = compactor_from_env(lambda: model)
+    model_with_tools = build_model_with_tools(model)
+    # Fallback only: used when a final answer lacks a parseable status line.
+    # Tagged nostream so the JSON it generates is not mistaken for answer tokens.
+    model_with_format = model.with_structured_output(
+        ResponseFormat,
+        method="json_schema",
+        include_raw=False
+    ).with_config(tags=[TAG_NOSTREAM])
+    system_message = SystemMessage(
+        content=f"{system_instruction}\n\n{format_instruction}\n\n{STATUS_INSTRUCTION}"
+    )
+
+    def _format_messages(messages: List) -> List:
+        # Add system and format instructions
+        return [system_message] + messages
+
+    def _finalized(response: AIMessage, parsed) -> Dict[str, Any]:
+        status, text = parsed
+        # Keep the status line out of the conversation and the helpfulness check
+        clean = response.model_copy(update={"content": text})
+        return {"messages": [clean], "structured_response": ResponseFormat(status=status, message=text)}
+
     # Create model-bound functions
     def _call_model(state: AgentState) -> Dict[str, Any]:
-        """Wrapper to pass model to call_model."""
-        model_with_tools = build_model_with_tools(model)
-        messages = state["messages"]
-        response = model_with_tools.invoke(messages)
-        
-        # If there are no tool calls, try to extract structured response
-        if not getattr(response, "tool_calls", None):
-            try:
-                # Apply response format to the model
-                model_with_format = model.with_structured_output(
-                    ResponseFormat,
-                    method="json_schema",
-                    include_raw=False
-                )
-                
-                # Add system and format instructions
-                formatted_messages = [("system", f"{system_instruction}\n\n{format_instruction}")] + state["messages"]
-                structured_response = model_with_format.invoke(formatted_messages)
-                
-                return {
-                    "messages": [response],
-                    "structured_response": structured_response
-                }
-            except:
-                # If structured output fails, just return the response
-                return {"messages": [response]}
-        else:
-            # If there are tool calls, just return the response
+        """Wrapper to pass model to call_model.
+
+        One generation both answers and states the status; the separate
+        structured-output call only runs if the status line is missing.
+        """
+        messages, _ = compactor.compact(state["messages"])
+        response = model_with_tools.invoke(_format_messages(messages))
+
+        # If there are tool calls, just return the response
+        if getattr(response, "tool_calls", None):
             return {"messages": [response]}
-    
+        parsed = parse_status(response.content)
+        if parsed is not None:
+            return _finalized(response, parsed)
+        logger.info("Final answer had no status line; falling back to structured output")
+        try:
+            structured_response = model_with_format.invoke(_format_messages(messages + [response]))
+        except Exception:
+            # If structured output fails, just return the response
+            return {"messages": [response]}
+        return {"messages": [response], "structured_response": structured_response}
+
+    async def _acall_model(state: AgentState) -> Dict[str, Any]:
+        """Async variant of `_call_model`, used when the graph runs via ainvoke/astream."""
+        messages, _ = await compactor.acompact(state["messages"])
+        response = await model_with_tools.ainvoke(_format_messages(messages))
+
+        if getattr(response, "tool_calls", None):
+            return {"messages": [response]}
+        parsed = parse_status(response.content)
+        if parsed is not None:
+            return _finalized(response, parsed)
+        logger.info("Final answer had no status line; falling back to structured output")
+        try:
+            structured_response = await model_with_format.ainvoke(_format_messages(messages + [response]))
+        except Exception:
+            return {"messages": [response]}
+        return {"messages": [response], "structured_response": structured_response}
+
+    evaluator = build_helpfulness_evaluator(model)
+
     def _helpfulness_node(state: AgentState) -> Dict[str, Any]:
-        """Wrapper to pass model to helpfulness_node."""
-        return helpfulness_node(state, model)
-    
+        """Wrapper to pass the evaluator to helpfulness_node."""
+        return helpfulness_node(state, evaluator)
+
+    async def _ahelpfulness_node(state: AgentState) -> Dict[str, Any]:
+        return await ahelpfulness_node(state, evaluator)
+
     graph = StateGraph(AgentState)
     tool_node = ToolNode(get_tool_belt())
-    
-    graph.add_node("agent", _call_model)
+
+    graph.add_node("agent", RunnableLambda(_call_model, afunc=_acall_model, name="agent"))
     graph.add_node("action", tool_node)
-    graph.add_node("helpfulness", _helpfulness_node)
+    graph.add_node(
+        "helpfulness",
+        RunnableLambda(_helpfulness_node, afunc=_ahelpfulness_node, name="helpfulness"),
+    )
     graph.set_entry_point("agent")
-    
+
     graph.add_conditional_edges(
         "agent",
         route_to_action_or_helpfulness,
@@ -156,5 +241,5 @@ def build_agent_graph_with_helpfulness(model, system_instruction, format_instruc
         {"continue": "agent", "end": END, END: END},
     )
     graph.add_edge("action", "agent")
-    
+
     return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,547 @@
+"""Bounded, persistent checkpointer for A2A conversation threads.
+
+`MemorySaver` keeps every checkpoint of every `context_id` thread in process
+memory for the life of the server. `BoundedSQLiteSaver` stores them in SQLite
+instead:
+
+- only the latest `keep_latest` checkpoints per thread and namespace are kept,
+  along with their pending writes; older history is pruned on flush;
+- threads idle for longer than `ttl_s` are deleted, and beyond `max_threads`
+  the least recently used threads are evicted;
+- `put`/`put_writes` only queue rows in memory. A background thread commits
+  them in batches every `flush_interval_s`, so a graph step never waits on disk.
+
+Reads merge the queue with the database, so a run always sees its own writes.
+Rows still queued when the process dies are lost. That is at most
+`flush_interval_s` of checkpoints, and a conversation loses only its latest turn.
+
+Select it with `CHECKPOINTER=sqlite` (see `checkpointer_from_env`).
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import os
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.sqlite_support import connect
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINTER_TYPES = ("memory", "sqlite")
+DEFAULT_DB_PATH = "a2a_checkpoints.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    checkpoint_type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    value_type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_by_access ON threads (last_access);
+"""
+
+# (thread_id, checkpoint_ns, checkpoint_id)
+CheckpointKey = Tuple[str, str, str]
+# (parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata)
+CheckpointRow = Tuple[Optional[str], str, bytes, str, bytes]
+# (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+WriteKey = Tuple[str, str, str, str, int]
+# (channel, value_type, value, task_path)
+WriteRow = Tuple[str, str, bytes, str]
+
+
+class BoundedSQLiteSaver(BaseCheckpointSaver[str]):
+    """SQLite checkpointer with latest-N retention, TTL/LRU thread eviction and write-behind."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        *,
+        keep_latest: int = 5,
+        ttl_s: float = 24 * 3600,
+        max_threads: int = 10_000,
+        flush_interval_s: float = 0.05,
+        evict_interval_s: float = 60.0,
+        serde=None,
+    ) -> None:
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep_latest = max(1, keep_latest)
+        self.ttl_s = ttl_s
+        self.max_threads = max_threads
+        self.flush_interval_s = flush_interval_s
+        self.evict_interval_s = evict_interval_s
+
+        self._lock = threading.Lock()  # guards the queues below
+        self._write_lock = threading.Lock()  # serializes use of the writer connection
+        self._pending_checkpoints: Dict[CheckpointKey, CheckpointRow] = {}
+        self._pending_writes: Dict[WriteKey, WriteRow] = {}
+        self._touched: Dict[str, float] = {}
+        self._stats = {"flushes": 0, "flushed_checkpoints": 0, "pruned_checkpoints": 0, "evicted_threads": 0}
+
+        self._writer = connect(path)
+        self._writer.executescript(_SCHEMA)
+        self._local = threading.local()
+        self._readers: List[Any] = []
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._last_evict = time.monotonic()
+        self._flusher = threading.Thread(target=self._run, name="checkpoint-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # Reads
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+
+    def _touch(self, thread_id: str) -> None:
+        """Record a use of an existing or just-written thread for eviction."""
+        with self._lock:
+            self._touched[thread_id] = time.time()
+
+    def _checkpoint_rows(
+        self, thread_id: str, checkpoint_ns: Optional[str], checkpoint_id: Optional[str] = None
+    ) -> Dict[CheckpointKey, CheckpointRow]:
+        """Queued and stored checkpoints of a thread, queued rows taking precedence."""
+        # Snapshot the queue before querying: rows leave it only after they are committed
+        with self._lock:
+            pending = {
+                key: row
+                for key, row in self._pending_checkpoints.items()
+                if key[0] == thread_id
+                and (checkpoint_ns is None or key[1] == checkpoint_ns)
+                and (checkpoint_id is None or key[2] == checkpoint_id)
+            }
+        query = (
+            "SELECT checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints WHERE thread_id = ?"
+        )
+        params: List[Any] = [thread_id]
+        if checkpoint_ns is not None:
+            query += " AND checkpoint_ns = ?"
+            params.append(checkpoint_ns)
+        if checkpoint_id is not None:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        rows = {(thread_id, ns, cid): tuple(rest) for ns, cid, *rest in self._reader().execute(query, params)}
+        rows.update(pending)
+        return rows
+
+    def _write_rows(self, key: CheckpointKey) -> List[Tuple[str, str, Any]]:
+        with self._lock:
+            pending = {k: row for k, row in self._pending_writes.items() if k[:3] == key}
+        stored = self._reader().execute(
+            "SELECT task_id, idx, channel, value_type, value, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            key,
+        )
+        writes = {(*key, task_id, idx): (channel, value_type, value, task_path)
+                  for task_id, idx, channel, value_type, value, task_path in stored}
+        writes.update(pending)
+        return [
+            (k[3], channel, self.serde.loads_typed((value_type, value)))
+            for k, (channel, value_type, value, _) in sorted(writes.items(), key=lambda item: item[0][3:])
+        ]
+
+    def _tuple(self, key: CheckpointKey, row: CheckpointRow, metadata: Any = None) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id = key
+        parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata_blob = row
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((checkpoint_type, checkpoint)),
+            metadata=metadata if metadata is not None else self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=self._write_rows(key),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Return the requested checkpoint, or the thread's latest one if no id is given."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        rows = self._checkpoint_rows(thread_id, checkpoint_ns, get_checkpoint_id(config))
+        if not rows:
+            # Probing an unknown thread must not create a threads row for it
+            return None
+        self._touch(thread_id)
+        # Checkpoint ids are time-ordered, so the largest is the latest
+        key = max(rows)
+        return self._tuple(key, rows[key])
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: Dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List a thread's retained checkpoints, newest first.
+
+        Only the latest `keep_latest` per thread survive a flush, so this is a
+        short window of history, not the full timeline. Listing across all
+        threads (`config=None`) is not supported.
+        """
+        if config is None:
+            raise ValueError("BoundedSQLiteSaver.list requires a thread_id")
+        thread_id = config["configurable"]["thread_id"]
+        rows = self._checkpoint_rows(thread_id, config["configurable"].get("checkpoint_ns"), get_checkpoint_id(config))
+        if rows:
+            self._touch(thread_id)
+        before_id = get_checkpoint_id(before) if before else None
+        for key in sorted(rows, key=lambda k: k[2], reverse=True):
+            if before_id and key[2] >= before_id:
+                continue
+            metadata = self.serde.loads_typed(rows[key][3:])
+            if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield self._tuple(key, rows[key], metadata)
+
+    # Writes (queued; committed by the flusher)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        row = (
+            config["configurable"].get("checkpoint_id"),  # parent
+            *self.serde.dumps_typed(checkpoint),
+            *self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+        )
+        with self._lock:
+            self._pending_checkpoints[(thread_id, checkpoint_ns, checkpoint["id"])] = row
+            self._touched[thread_id] = time.time()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = {
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx)): (
+                channel,
+                *self.serde.dumps_typed(value),
+                task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        }
+        with self._lock:
+            for key, row in rows.items():
+                # Regular writes are first-wins; special (negative idx) writes replace
+                if key[4] >= 0 and key in self._pending_writes:
+                    continue
+                self._pending_writes[key] = row
+            self._touched[thread_id] = time.time()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete a thread's checkpoints and writes, queued and stored, immediately."""
+        with self._write_lock:
+            with self._lock:
+                for key in [k for k in self._pending_checkpoints if k[0] == thread_id]:
+                    del self._pending_checkpoints[key]
+                for key in [k for k in self._pending_writes if k[0] == thread_id]:
+                    del self._pending_writes[key]
+                self._touched.pop(thread_id, None)
+            with self._writer:
+                self._delete_threads([thread_id])
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # Same scheme as MemorySaver: a zero-padded counter plus a random tiebreak
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # Async API: queueing never blocks, reads run in a worker thread
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: Dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # Background flushing, retention and eviction
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_evict >= self.evict_interval_s:
+                    self.evict()
+            except Exception:
+                logger.exception("Checkpoint flush failed; will retry")
+                time.sleep(min(1.0, self.flush_interval_s * 10))
+
+    def flush(self) -> int:
+        """Commit queued rows and prune old checkpoints; return the number of checkpoints written."""
+        with self._write_lock:
+            with self._lock:
+                checkpoints = dict(self._pending_checkpoints)
+                writes = dict(self._pending_writes)
+                touched = dict(self._touched)
+                self._touched.clear()
+            if not (checkpoints or writes or touched):
+                return 0
+            with self._writer:
+                self._writer.executemany(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(*key, *row) for key, row in checkpoints.items()],
+                )
+                self._writer.executemany(
+                    "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(*key, *row) for key, row in writes.items() if key[4] >= 0],
+                )
+                self._writer.executemany(
+                    "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(*key, *row) for key, row in writes.items() if key[4] < 0],
+                )
+                self._writer.executemany(
+                    "INSERT INTO threads VALUES (?, ?) "
+                    "ON CONFLICT (thread_id) DO UPDATE SET last_access = MAX(last_access, excluded.last_access)",
+                    list(touched.items()),
+                )
+                pruned = self._prune({key[:2] for key in checkpoints})
+            with self._lock:
+                # Drop only what was committed; a newer row under the same key stays queued
+                for key, row in checkpoints.items():
+                    if self._pending_checkpoints.get(key) is row:
+                        del self._pending_checkpoints[key]
+                for key, row in writes.items():
+                    if self._pending_writes.get(key) is row:
+                        del self._pending_writes[key]
+                self._stats["flushes"] += 1
+                self._stats["flushed_checkpoints"] += len(checkpoints)
+                self._stats["pruned_checkpoints"] += pruned
+        return len(checkpoints)
+
+    async def aflush(self) -> int:
+        """`flush` off the event loop; called when a turn ends so other workers see it."""
+        return await asyncio.to_thread(self.flush)
+
+    def _prune(self, threads: set) -> int:
+        """Keep the latest `keep_latest` checkpoints of each (thread, namespace) and their writes."""
+        pruned = 0
+        for thread_id, checkpoint_ns in threads:
+            cursor = self._writer.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ("
+                " SELECT MIN(checkpoint_id) FROM ("
+                "  SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                "  ORDER BY checkpoint_id DESC LIMIT ?))",
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_latest),
+            )
+            if cursor.rowcount > 0:
+                pruned += cursor.rowcount
+                self._writer.execute(
+                    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ("
+                    " SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)",
+                    (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+                )
+        return pruned
+
+    def _delete_threads(self, thread_ids: List[str]) -> None:
+        params = [(thread_id,) for thread_id in thread_ids]
+        for table in ("checkpoints", "writes", "threads"):
+            self._writer.executemany(f"DELETE FROM {table} WHERE thread_id = ?", params)
+
+    def evict(self) -> int:
+        """Delete threads idle past `ttl_s`, then the least recently used beyond `max_threads`."""
+        self._last_evict = time.monotonic()
+        with self._write_lock:
+            with self._lock:
+                # Threads with queued rows are active; never evict them mid-run
+                active = {key[0] for key in self._pending_checkpoints} | set(self._touched)
+            expired = [
+                thread_id
+                for (thread_id,) in self._writer.execute(
+                    "SELECT thread_id FROM threads WHERE last_access < ?", (time.time() - self.ttl_s,)
+                )
+            ]
+            overflow = [
+                thread_id
+                for (thread_id,) in self._writer.execute(
+                    "SELECT thread_id FROM threads WHERE last_access >= ? ORDER BY last_access DESC LIMIT -1 OFFSET ?",
+                    (time.time() - self.ttl_s, self.max_threads),
+                )
+            ]
+            victims = [thread_id for thread_id in expired + overflow if thread_id not in active]
+            if victims:
+                with self._writer:
+                    self._delete_threads(victims)
+                logger.info(
+                    f"Evicted {len(victims)} checkpoint threads ({len(expired)} idle, {len(overflow)} over limit)"
+                )
+            with self._lock:
+                self._stats["evicted_threads"] += len(victims)
+        return len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """Row counts, queue depth, database size and flush/prune/evict counters."""
+        conn = self._reader()
+        threads, checkpoints = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM threads), (SELECT COUNT(*) FROM checkpoints)"
+        ).fetchone()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        with self._lock:
+            return {
+                "threads": threads,
+                "checkpoints": checkpoints,
+                "pending_checkpoints": len(self._pending_checkpoints),
+                "pending_writes": len(self._pending_writes),
+                "db_bytes": page_size * page_count,
+                **self._stats,
+            }
+
+    def close(self) -> None:
+        """Stop the flusher, commit what is queued and close all connections."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        with self._lock:
+            readers, self._readers = self._readers, []
+        for conn in readers + [self._writer]:
+            conn.close()
+
+
+def checkpointer_from_env() -> BaseCheckpointSaver:
+    """Build the agent's checkpointer from CHECKPOINTER and the CHECKPOINT_* settings."""
+    kind = os.getenv("CHECKPOINTER", "memory").lower()
+    if kind not in CHECKPOINTER_TYPES:
+        raise ValueError(f"CHECKPOINTER must be one of {CHECKPOINTER_TYPES}, got {kind!r}")
+    if kind == "memory":
+        return MemorySaver()
+    saver = BoundedSQLiteSaver(
+        os.getenv("CHECKPOINT_DB_PATH", DEFAULT_DB_PATH),
+        keep_latest=int(os.getenv("CHECKPOINT_KEEP_LATEST", "5")),
+        ttl_s=float(os.getenv("CHECKPOINT_THREAD_TTL_S", str(24 * 3600))),
+        max_threads=int(os.getenv("CHECKPOINT_MAX_THREADS", "10000")),
+        flush_interval_s=float(os.getenv("CHECKPOINT_FLUSH_MS", "50")) / 1000,
+    )
+    logger.info(
+        f"Using SQLite checkpointer at {saver.path} (keep {saver.keep_latest} per thread, "
+        f"TTL {saver.ttl_s:.0f}s, max {saver.max_threads} threads)"
+    )
+    return saver
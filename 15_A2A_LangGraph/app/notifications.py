@@ -0,0 +1,177 @@
+"""Fewer, cheaper task updates: status coalescing and pooled push delivery.
+
+The executor reports progress with a `working` status per graph step, and the
+request handler calls the push sender after every event, including every
+streamed answer chunk. `BasePushNotificationSender` POSTs each of those to
+every webhook inline, so a slow webhook also slows the client's stream.
+
+- `StatusCoalescer` sends a task's `working` statuses at most once per
+  `min_interval_s`. A status that arrives inside the window waits for the
+  window to end, and a newer one replaces it, so only the latest goes out.
+- `PooledPushNotificationSender` returns at once and delivers in the
+  background. Each task keeps only its newest snapshot while a delivery is in
+  flight. Deliveries share one pooled HTTP client with keep-alive connections
+  per endpoint, run concurrently up to `max_in_flight`, and retry transport
+  errors, 429 and 5xx with exponential backoff. `metrics()` reports counts and
+  delivery latency.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import httpx
+from a2a.server.tasks import PushNotificationConfigStore, PushNotificationSender, TaskUpdater
+from a2a.types import Message, PushNotificationConfig, Task, TaskState
+
+logger = logging.getLogger(__name__)
+
+
+class StatusCoalescer:
+    """Rate-limits one task's `working` status updates, delivering the latest in each window."""
+
+    def __init__(self, updater: TaskUpdater, min_interval_s: float = 0.25) -> None:
+        self.updater = updater
+        self.min_interval_s = min_interval_s
+        self.sent = 0
+        self.dropped = 0
+        self._last_sent = float("-inf")
+        self._pending: Optional[Message] = None
+        self._timer: Optional[asyncio.Task] = None
+
+    async def working(self, message: Message) -> None:
+        wait = self._last_sent + self.min_interval_s - time.monotonic()
+        if wait <= 0 and self._timer is None:
+            await self._send(message)
+            return
+        if self._pending is not None:
+            self.dropped += 1
+        self._pending = message
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._send_later(wait))
+
+    async def _send_later(self, wait: float) -> None:
+        await asyncio.sleep(max(0.0, wait))
+        message, self._pending = self._pending, None
+        self._timer = None
+        if message is not None:
+            await self._send(message)
+
+    async def _send(self, message: Message) -> None:
+        self._last_sent = time.monotonic()
+        self.sent += 1
+        await self.updater.update_status(TaskState.working, message)
+
+    async def close(self) -> None:
+        """Drop any pending status; call before the final status, which supersedes it."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending is not None:
+            self.dropped += 1
+            self._pending = None
+
+
+class PooledPushNotificationSender(PushNotificationSender):
+    """Background, latest-wins push delivery over a shared connection pool, with retries."""
+
+    def __init__(
+        self,
+        config_store: PushNotificationConfigStore,
+        httpx_client: httpx.AsyncClient | None = None,
+        *,
+        max_in_flight: int = 64,
+        max_attempts: int = 4,
+        backoff_s: float = 0.25,
+        timeout_s: float = 10.0,
+        window: int = 1000,
+    ) -> None:
+        self._config_store = config_store
+        self._owns_client = httpx_client is None
+        self._client = httpx_client or httpx.AsyncClient(
+            timeout=timeout_s,
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+        )
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_s = backoff_s
+        # Newest undelivered snapshot per task, and the worker draining it
+        self._latest: Dict[str, Task] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._counts = {"requested": 0, "superseded": 0, "delivered": 0, "failed": 0, "retries": 0}
+
+    async def send_notification(self, task: Task) -> None:
+        self._counts["requested"] += 1
+        if task.id in self._latest:
+            self._counts["superseded"] += 1
+        # Copy, since the task manager keeps mutating the task it passed in
+        self._latest[task.id] = task.model_copy(deep=True)
+        if task.id not in self._workers:
+            self._workers[task.id] = asyncio.create_task(self._drain(task.id))
+
+    async def _drain(self, task_id: str) -> None:
+        try:
+            while task_id in self._latest:
+                task = self._latest.pop(task_id)
+                configs = await self._config_store.get_info(task_id)
+                if configs:
+                    payload = task.model_dump(mode="json", exclude_none=True)
+                    await asyncio.gather(*(self._deliver(task_id, payload, config) for config in configs))
+        finally:
+            self._workers.pop(task_id, None)
+
+    async def _deliver(self, task_id: str, payload: dict, config: PushNotificationConfig) -> None:
+        headers = {"X-A2A-Notification-Token": config.token} if config.token else None
+        start = time.monotonic()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with self._slots:
+                    response = await self._client.post(config.url, json=payload, headers=headers)
+                if response.status_code != 429 and response.status_code < 500:
+                    response.raise_for_status()
+                    self._counts["delivered"] += 1
+                    self._latencies.append(time.monotonic() - start)
+                    return
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = repr(e)
+            except httpx.HTTPStatusError as e:
+                # Other 4xx: the endpoint will not accept it on retry either
+                logger.warning("Push notification for task %s to %s rejected: %s", task_id, config.url, e)
+                break
+            if attempt < self.max_attempts:
+                self._counts["retries"] += 1
+                await asyncio.sleep(self.backoff_s * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        else:
+            logger.warning("Push notification for task %s to %s failed: %s", task_id, config.url, error)
+        self._counts["failed"] += 1
+
+    async def drain(self, timeout_s: float = 10.0) -> None:
+        """Wait for queued deliveries, e.g. before shutdown."""
+        deadline = time.monotonic() + timeout_s
+        while self._workers and time.monotonic() < deadline:
+            await asyncio.wait(list(self._workers.values()), timeout=deadline - time.monotonic())
+
+    async def aclose(self, timeout_s: float = 10.0) -> None:
+        await self.drain(timeout_s)
+        if self._owns_client:
+            await self._client.aclose()
+
+    def metrics(self) -> Dict[str, float]:
+        latencies = sorted(self._latencies)
+
+        def pct(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+
+        return {
+            **self._counts,
+            "pending_tasks": len(self._workers),
+            "delivery_p50_ms": pct(0.50),
+            "delivery_p95_ms": pct(0.95),
+            "delivery_max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        }
@@ -3,28 +3,44 @@
 This module builds an in-memory RAG pipeline that:
 - Loads PDF documents from `RAG_DATA_DIR` (default: "data").
 - Splits documents into chunks using a token-aware splitter.
-- Embeds chunks with OpenAI and stores vectors in an in-memory Qdrant store.
+- Embeds chunks with OpenAI and stores vectors in an in-memory Qdrant store,
+  or, when `RAG_INDEX_DIR` is set, in a prebuilt on-disk index that every
+  server worker memory-maps read-only (see `build_shared_index`).
 - Exposes a LangChain Tool `retrieve_information` that retrieves relevant
   context and generates a response constrained to that context.
 """
 from __future__ import annotations
 
+import hashlib
+import json
+import logging
 import os
+import threading
 from functools import lru_cache
-from typing import Annotated, List
+from pathlib import Path
+from typing import Annotated, Any, List
 
+import numpy as np
 import tiktoken
 from langchain_community.document_loaders import DirectoryLoader, PyMuPDFLoader
 from langchain_community.vectorstores import Qdrant
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.retrievers import BaseRetriever
 from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
 from langchain_openai.embeddings import OpenAIEmbeddings
 from langgraph.graph import START, StateGraph
+from pydantic import ConfigDict
 from typing_extensions import TypedDict
 
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+CHUNK_SIZE = 750
+
 
 def _tiktoken_len(text: str) -> int:
     """Return token length using tiktoken; used for chunk length measurement."""
@@ -39,17 +55,8 @@ class _RAGState(TypedDict):
     response: str
 
 
-def _build_rag_graph(data_dir: str):
-    """Construct and compile a minimal RAG graph.
-
-    Steps:
-    1) Load PDFs from `data_dir` recursively (best-effort).
-    2) Split documents into token-aware chunks.
-    3) Create embeddings and an in-memory Qdrant vector store retriever.
-    4) Define a chat prompt and generation model.
-    5) Wire a two-node graph: retrieve -> generate.
-    """
-    # Load PDFs from data directory (recursive)
+def _load_chunks(data_dir: str) -> List[Document]:
+    """Load PDFs from `data_dir` recursively (best-effort) and split them into token-aware chunks."""
     try:
         directory_loader = DirectoryLoader(
             data_dir, glob="**/*.pdf", loader_cls=PyMuPDFLoader
@@ -58,7 +65,6 @@ def _build_rag_graph(data_dir: str):
     except Exception:
         documents = []
 
-    # Split documents
     try:
         from langchain_text_splitters import RecursiveCharacterTextSplitter
     except Exception:
@@ -68,16 +74,116 @@ def _build_rag_graph(data_dir: str):
         )
 
     text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=750, chunk_overlap=0, length_function=_tiktoken_len
+        chunk_size=CHUNK_SIZE, chunk_overlap=0, length_function=_tiktoken_len
     )
-    chunks = text_splitter.split_documents(documents) if documents else []
+    return text_splitter.split_documents(documents) if documents else []
+
+
+def _fingerprint(data_dir: str) -> str:
+    """Hash of the PDF files (path, size, mtime) and the chunk/embedding settings."""
+    digest = hashlib.sha256(f"{EMBEDDING_MODEL}:{CHUNK_SIZE}".encode())
+    root = Path(data_dir)
+    for path in sorted(root.rglob("*.pdf")) if root.is_dir() else []:
+        stat = path.stat()
+        digest.update(f"{path.relative_to(root)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
 
-    # Embeddings and vector store (in-memory Qdrant)
-    embedding_model = OpenAIEmbeddings(model="text-embedding-3-small")
-    qdrant_vectorstore = Qdrant.from_documents(
-        documents=chunks, embedding=embedding_model, location=":memory:"
+
+def build_shared_index(data_dir: str | None = None, index_dir: str | None = None, embeddings=None) -> Path:
+    """Build the on-disk index once, before the server forks its workers.
+
+    Writes `vectors.npy` (unit-normalized float32), `chunks.json` and a
+    `manifest.json` fingerprint to `index_dir`. It is a no-op when the manifest
+    already matches the data, so restarts do not re-embed.
+    """
+    data_dir = data_dir or os.environ.get("RAG_DATA_DIR", "data")
+    index_path = Path(index_dir or os.environ.get("RAG_INDEX_DIR", ".rag_index"))
+    fingerprint = _fingerprint(data_dir)
+    manifest_path = index_path / "manifest.json"
+    if manifest_path.exists() and json.loads(manifest_path.read_text()).get("fingerprint") == fingerprint:
+        return index_path
+
+    chunks = _load_chunks(data_dir)
+    if chunks:
+        embeddings = embeddings or OpenAIEmbeddings(model=EMBEDDING_MODEL)
+        vectors = np.asarray(embeddings.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    else:
+        vectors = np.zeros((0, 0), dtype=np.float32)
+
+    index_path.mkdir(parents=True, exist_ok=True)
+    # Write to per-process temporary names and rename, manifest last, so workers
+    # building at once never clobber each other and a reader never sees a
+    # half-written file
+    tmp = f"{os.getpid()}.{threading.get_ident()}.tmp"
+    np.save(index_path / f"vectors.{tmp}.npy", vectors)
+    (index_path / f"chunks.{tmp}.json").write_text(
+        json.dumps([{"page_content": c.page_content, "metadata": c.metadata} for c in chunks])
     )
-    retriever = qdrant_vectorstore.as_retriever()
+    (index_path / f"manifest.{tmp}.json").write_text(json.dumps({"fingerprint": fingerprint, "chunks": len(chunks)}))
+    os.replace(index_path / f"vectors.{tmp}.npy", index_path / "vectors.npy")
+    os.replace(index_path / f"chunks.{tmp}.json", index_path / "chunks.json")
+    os.replace(index_path / f"manifest.{tmp}.json", manifest_path)
+    logger.info(f"Built shared RAG index in {index_path}: {len(chunks)} chunks")
+    return index_path
+
+
+class MmapRetriever(BaseRetriever):
+    """Cosine top-k over a prebuilt index whose vectors are memory-mapped read-only.
+
+    The OS page cache holds one copy of `vectors.npy` however many workers map it.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectors: Any
+    documents: List[Document]
+    embeddings: Any
+    k: int = 4
+
+    @classmethod
+    def load(cls, index_dir: str | Path, embeddings, k: int = 4) -> "MmapRetriever":
+        index_path = Path(index_dir)
+        vectors = np.load(index_path / "vectors.npy", mmap_mode="r")
+        documents = [Document(**item) for item in json.loads((index_path / "chunks.json").read_text())]
+        return cls(vectors=vectors, documents=documents, embeddings=embeddings, k=k)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        if not self.documents:
+            return []
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+        scores = self.vectors @ query_vector
+        k = min(self.k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [self.documents[i] for i in top[np.argsort(-scores[top])]]
+
+
+def _build_rag_graph(data_dir: str):
+    """Construct and compile a minimal RAG graph.
+
+    Steps:
+    1) Load PDFs from `data_dir` recursively (best-effort).
+    2) Split documents into token-aware chunks.
+    3) Create embeddings and an in-memory Qdrant vector store retriever, or
+       map the shared index when `RAG_INDEX_DIR` is set.
+    4) Define a chat prompt and generation model.
+    5) Wire a two-node graph: retrieve -> generate.
+    """
+    embedding_model = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+    index_dir = os.environ.get("RAG_INDEX_DIR")
+    if index_dir:
+        # Normally prebuilt by the server before it starts workers; then this only checks the manifest
+        retriever = MmapRetriever.load(build_shared_index(data_dir, index_dir), embedding_model)
+    else:
+        # Embeddings and vector store (in-memory Qdrant)
+        chunks = _load_chunks(data_dir)
+        qdrant_vectorstore = Qdrant.from_documents(
+            documents=chunks, embedding=embedding_model, location=":memory:"
+        )
+        retriever = qdrant_vectorstore.as_retriever()
 
     # Prompt and model
     human_template = (
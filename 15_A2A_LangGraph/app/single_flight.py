@@ -0,0 +1,125 @@
+"""Single-flight deduplication of identical first-turn agent runs.
+
+During an incident many clients ask the same question within seconds, and
+each one triggers a full tool-using graph run. `StreamSingleFlight` lets the
+first request for a key (the leader) run the graph. Identical requests that
+arrive while it runs subscribe to its item stream: they receive the progress
+and answer items already published, then the rest as they come. Requests
+within `reuse_window_s` after the leader finishes replay its items without any
+model or tool call.
+
+Only a new context's first turn is coalesced. The key is the normalized query
+plus a fingerprint of the agent's model and instructions, so the answer cannot
+depend on per-user history. If the leader fails or is cancelled, its followers
+run the graph themselves.
+
+Configured by env vars (see `single_flight_from_env`):
+- SINGLE_FLIGHT=0 disables deduplication.
+- SINGLE_FLIGHT_REUSE_S sets the reuse window (default 0 = in-flight only).
+  A window replays answers, including tool results such as Tavily searches,
+  that may be stale by then.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+
+class FlightAbandoned(Exception):
+    """The leader stopped without a final response; followers must run on their own."""
+
+
+class Flight:
+    """One leader run's items, broadcast to any number of followers."""
+
+    def __init__(self) -> None:
+        self.items: List[Dict[str, Any]] = []
+        self.final: Optional[Dict[str, Any]] = None
+        # The leader thread's final graph state, copied into each follower's thread
+        self.state: Optional[Dict[str, Any]] = None
+        self.abandoned = False
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Event()
+
+    def _wake(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish(self, item: Dict[str, Any]) -> None:
+        self.items.append(item)
+        self._wake()
+
+    def finish(self, final: Dict[str, Any], state: Dict[str, Any]) -> None:
+        self.final, self.state = final, state
+        self.finished_at = time.monotonic()
+        self._wake()
+
+    def abandon(self) -> None:
+        if self.final is None:
+            self.abandoned = True
+            self.finished_at = time.monotonic()
+            self._wake()
+
+    async def follow(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every published item from the start; return once the final response exists."""
+        seen = 0
+        while True:
+            while seen < len(self.items):
+                yield self.items[seen]
+                seen += 1
+            if self.final is not None:
+                return
+            if self.abandoned:
+                raise FlightAbandoned()
+            await self._changed.wait()
+
+
+class StreamSingleFlight:
+    """Maps query keys to the run in flight (or just finished); single event loop, no locking."""
+
+    def __init__(self, reuse_window_s: float = 0.0, *, enabled: bool = True) -> None:
+        self.reuse_window_s = reuse_window_s
+        self.enabled = enabled
+        self._flights: Dict[str, Flight] = {}
+        self._counts = {"leaders": 0, "coalesced": 0, "reused": 0, "abandoned": 0}
+
+    @staticmethod
+    def key(query: str, *context: Any) -> str:
+        """Fingerprint of the normalized query plus `context` (model, instructions)."""
+        normalized = " ".join(query.lower().split())
+        payload = json.dumps([normalized, list(context)], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _expired(self, flight: Flight, now: float) -> bool:
+        if flight.abandoned:
+            return True
+        return flight.finished_at is not None and now - flight.finished_at > self.reuse_window_s
+
+    def join(self, key: str) -> Tuple[bool, Flight]:
+        """Return (True, new flight) for a leader, or (False, flight) to follow."""
+        now = time.monotonic()
+        for stale in [k for k, f in self._flights.items() if self._expired(f, now)]:
+            if self._flights[stale].abandoned:
+                self._counts["abandoned"] += 1
+            del self._flights[stale]
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._counts["reused" if flight.final is not None else "coalesced"] += 1
+            return False, flight
+        flight = self._flights[key] = Flight()
+        self._counts["leaders"] += 1
+        return True, flight
+
+    def stats(self) -> Dict[str, int]:
+        """Counters: leaders (graph runs), coalesced (joined in flight), reused (within the window), abandoned."""
+        return {**self._counts, "tracked": len(self._flights)}
+
+
+def single_flight_from_env() -> StreamSingleFlight:
+    """Build a `StreamSingleFlight` from SINGLE_FLIGHT and SINGLE_FLIGHT_REUSE_S."""
+    enabled = os.environ.get("SINGLE_FLIGHT", "1").lower() not in ("0", "false", "no")
+    return StreamSingleFlight(float(os.environ.get("SINGLE_FLIGHT_REUSE_S", "0")), enabled=enabled)
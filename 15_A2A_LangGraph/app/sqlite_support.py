@@ -0,0 +1,26 @@
+"""Shared SQLite setup for the server's persistent stores.
+
+Every store opens its connections through `connect`, so they all get the same
+settings. WAL lets readers work while a background writer commits.
+`synchronous=NORMAL` fsyncs only at checkpoints. Under WAL this can lose the
+last transactions on power failure, but it never corrupts the database.
+"""
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+DEFAULT_CACHE_KIB = 8 * 1024
+
+
+def connect(path: str | Path, *, cache_kib: int = DEFAULT_CACHE_KIB) -> sqlite3.Connection:
+    """Open `path` in WAL mode; the connection may be handed between threads."""
+    if str(path) != ":memory:":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    # Negative cache_size is in KiB; it bounds the page cache per connection
+    conn.execute(f"PRAGMA cache_size=-{int(cache_kib)}")
+    return conn
@@ -0,0 +1,267 @@
+"""SQLite-backed task and push-notification config stores for the A2A server.
+
+`InMemoryTaskStore` keeps every task, with all of its artifacts, for the life
+of the process. `SQLiteTaskStore` keeps tasks in a WAL-mode SQLite file instead:
+
+- `save` only queues the serialized task. A background thread commits the
+  queue in one transaction every `flush_interval_s`. The task manager saves on
+  every streamed chunk, and all saves of one task in an interval collapse into
+  a single row write.
+- A save that leaves the task waiting on the client (terminal, input or auth
+  required) is committed before `save` returns. Whichever server worker the
+  client calls next then sees the finished task.
+- `get` checks the queue and then does a primary-key lookup, so it costs the
+  same however many tasks are stored.
+- Tasks in a terminal state (completed, canceled, failed, rejected) expire
+  `retention_s` after their last update. Tasks left unfinished (e.g. waiting
+  for input) expire after `stale_retention_s`. An indexed `expires_at` column
+  makes the purge a range delete.
+
+`SQLitePushNotificationConfigStore` stores webhook configs in the same file.
+They are written rarely, so each change is committed directly, off the event
+loop. A config expires `retention_s` after it was set, and expired configs are
+purged whenever a new one is stored.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import time
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import PushNotificationConfigStore, TaskStore
+from a2a.types import PushNotificationConfig, Task, TaskState
+
+from app.sqlite_support import connect
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = 'a2a_tasks.sqlite'
+DEFAULT_RETENTION_S = 7 * 24 * 3600
+
+TERMINAL_STATES = {
+    TaskState.completed,
+    TaskState.canceled,
+    TaskState.failed,
+    TaskState.rejected,
+}
+
+_TASK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    context_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    task TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_by_expiry ON tasks (expires_at);
+"""
+
+_PUSH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS push_configs (
+    task_id TEXT NOT NULL,
+    config_id TEXT NOT NULL,
+    config TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (task_id, config_id)
+);
+CREATE INDEX IF NOT EXISTS push_configs_by_expiry ON push_configs (expires_at);
+"""
+
+# States in which the client acts next, so the task must be visible to every worker
+_WRITE_THROUGH_STATES = TERMINAL_STATES | {TaskState.input_required, TaskState.auth_required}
+
+# Marks a queued delete, so a pending get knows not to fall back to the database
+_DELETED = object()
+
+
+class SQLiteTaskStore(TaskStore):
+    """TaskStore on SQLite with coalesced write-behind and retention-based expiry."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        *,
+        retention_s: float = DEFAULT_RETENTION_S,
+        stale_retention_s: float | None = None,
+        flush_interval_s: float = 0.05,
+        purge_interval_s: float = 300.0,
+    ) -> None:
+        self.path = path
+        self.retention_s = retention_s
+        self.stale_retention_s = stale_retention_s if stale_retention_s is not None else retention_s
+        self.flush_interval_s = flush_interval_s
+        self.purge_interval_s = purge_interval_s
+
+        self._lock = threading.Lock()  # guards _pending
+        self._write_lock = threading.Lock()  # serializes use of the writer connection
+        self._pending: dict[str, tuple | object] = {}
+        self._stats = {'saves': 0, 'flushes': 0, 'rows_written': 0, 'expired': 0}
+
+        self._writer = connect(path)
+        self._writer.executescript(_TASK_SCHEMA)
+        # Reads are primary-key lookups, cheap enough to run on the event loop thread
+        self._reader = connect(path)
+
+        self._stop = threading.Event()
+        self._last_purge = time.monotonic()
+        self._flusher = threading.Thread(target=self._run, name='task-store-flusher', daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    async def save(
+        self, task: Task, context: ServerCallContext | None = None
+    ) -> None:
+        """Queues the task; the flusher writes its latest version unless the client acts next."""
+        now = time.time()
+        state = task.status.state
+        keep_s = self.retention_s if state in TERMINAL_STATES else self.stale_retention_s
+        row = (task.id, task.context_id, state.value, task.model_dump_json(), now, now + keep_s)
+        with self._lock:
+            self._pending[task.id] = row
+            self._stats['saves'] += 1
+        if state in _WRITE_THROUGH_STATES:
+            await asyncio.to_thread(self.flush)
+
+    async def get(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> Task | None:
+        """Returns the queued version of the task if any, else the stored one."""
+        with self._lock:
+            row = self._pending.get(task_id)
+        if row is _DELETED:
+            return None
+        if row is not None:
+            return Task.model_validate_json(row[3])
+        found = self._reader.execute(
+            'SELECT task FROM tasks WHERE id = ? AND expires_at > ?', (task_id, time.time())
+        ).fetchone()
+        return Task.model_validate_json(found[0]) if found else None
+
+    async def delete(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> None:
+        with self._lock:
+            self._pending[task_id] = _DELETED
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval_s):
+            try:
+                self.flush()
+                if time.monotonic() - self._last_purge >= self.purge_interval_s:
+                    self.purge_expired()
+            except Exception:
+                logger.exception('Task store flush failed; will retry')
+
+    def flush(self) -> int:
+        """Commits queued saves and deletes in one transaction; returns the rows written."""
+        with self._write_lock:
+            with self._lock:
+                batch = dict(self._pending)
+            if not batch:
+                return 0
+            upserts = [row for row in batch.values() if row is not _DELETED]
+            deletes = [(task_id,) for task_id, row in batch.items() if row is _DELETED]
+            with self._writer:
+                self._writer.executemany(
+                    'INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?)', upserts
+                )
+                self._writer.executemany('DELETE FROM tasks WHERE id = ?', deletes)
+            with self._lock:
+                # Keep anything re-queued while the batch was being written
+                for task_id, row in batch.items():
+                    if self._pending.get(task_id) is row:
+                        del self._pending[task_id]
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += len(batch)
+        return len(batch)
+
+    def purge_expired(self) -> int:
+        """Deletes tasks past their retention; returns how many were removed."""
+        self._last_purge = time.monotonic()
+        with self._write_lock:
+            with self._writer:
+                removed = self._writer.execute(
+                    'DELETE FROM tasks WHERE expires_at <= ?', (time.time(),)
+                ).rowcount
+        if removed:
+            logger.info(f'Expired {removed} tasks past retention')
+        with self._lock:
+            self._stats['expired'] += removed
+        return removed
+
+    def stats(self) -> dict:
+        """Stored and queued task counts, database size and write counters."""
+        stored = self._reader.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+        page_size = self._reader.execute('PRAGMA page_size').fetchone()[0]
+        page_count = self._reader.execute('PRAGMA page_count').fetchone()[0]
+        with self._lock:
+            return {
+                'tasks': stored,
+                'pending': len(self._pending),
+                'db_bytes': page_size * page_count,
+                **self._stats,
+            }
+
+    def close(self) -> None:
+        """Stops the flusher, commits what is queued and closes the connections."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        self._reader.close()
+        self._writer.close()
+
+
+class SQLitePushNotificationConfigStore(PushNotificationConfigStore):
+    """PushNotificationConfigStore on SQLite; configs expire `retention_s` after they are set."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, *, retention_s: float = DEFAULT_RETENTION_S) -> None:
+        self.path = path
+        self.retention_s = retention_s
+        self._conn = connect(path)
+        self._conn.executescript(_PUSH_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _execute(self, query: str, params: tuple) -> list:
+        with self._lock, self._conn:
+            return self._conn.execute(query, params).fetchall()
+
+    def _store(self, task_id: str, config: PushNotificationConfig) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM push_configs WHERE expires_at <= ?', (now,))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO push_configs VALUES (?, ?, ?, ?)',
+                (task_id, config.id, config.model_dump_json(), now + self.retention_s),
+            )
+
+    async def set_info(
+        self, task_id: str, notification_config: PushNotificationConfig
+    ) -> None:
+        if notification_config.id is None:
+            notification_config.id = task_id
+        await asyncio.to_thread(self._store, task_id, notification_config)
+
+    async def get_info(self, task_id: str) -> list[PushNotificationConfig]:
+        rows = await asyncio.to_thread(
+            self._execute,
+            'SELECT config FROM push_configs WHERE task_id = ? AND expires_at > ? ORDER BY rowid',
+            (task_id, time.time()),
+        )
+        return [PushNotificationConfig.model_validate_json(config) for (config,) in rows]
+
+    async def delete_info(
+        self, task_id: str, config_id: str | None = None
+    ) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            'DELETE FROM push_configs WHERE task_id = ? AND config_id = ?',
+            (task_id, config_id if config_id is not None else task_id),
+        )
+
+    def close(self) -> None:
+        self._conn.close()
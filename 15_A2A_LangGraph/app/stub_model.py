@@ -0,0 +1,163 @@
+"""Offline stand-in for the chat model, used by benchmarks and concurrency tests.
+
+`StubChatModel` never touches the network. It waits `latency_s` before the first
+token, then streams a deterministic reply word by word with `token_latency_s`
+between words. The async path sleeps without blocking the event loop. The
+reply echoes the last user message, so a longer question gives a longer answer.
+`capacity` simulates a provider that slows every call down once too many are
+in flight.
+When the system prompt asks for a trailing `STATUS:` line the reply ends with
+one, like a compliant model. Usage metadata counts words as tokens.
+Select it for the A2A agent with `USE_STUB_MODEL=1`.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, ClassVar, Iterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+_FILLER = (
+    "This is a deterministic stub response used for offline benchmarking. It "
+    "restates the question so routing and helpfulness checks behave like a real, "
+    "on-topic answer without calling any model provider."
+)
+
+
+class StubChatModel(BaseChatModel):
+    """Deterministic, streaming chat model with simulated latency and no tool calls."""
+
+    latency_s: float = 0.05
+    token_latency_s: float = 0.0
+    # Simulated provider capacity: with more async calls in flight than this, each
+    # one slows down proportionally, like a shared rate limit. 0 means unlimited.
+    capacity: int = 0
+
+    # Async generations currently in flight across all instances; cancellation tests watch it
+    in_flight: ClassVar[int] = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "StubChatModel":
+        # The stub never calls tools, so binding is a no-op
+        return self
+
+    def with_structured_output(self, schema: Any, **kwargs: Any):
+        """Return a runnable that fills `schema` as a completed answer echoing the query."""
+
+        def _fill(messages: Any) -> Any:
+            return schema(status="completed", message=self._text(self._convert_input(messages).to_messages()))
+
+        return RunnableLambda(_fill)
+
+    @staticmethod
+    def _text(messages: List[BaseMessage]) -> str:
+        query = next(
+            (m.content for m in reversed(messages) if isinstance(m, HumanMessage)),
+            "",
+        )
+        return f"Answer to: {query}\n\n{_FILLER}"
+
+    def _words(self, messages: List[BaseMessage]) -> List[str]:
+        text = self._text(messages)
+        if any(isinstance(m, SystemMessage) and "STATUS:" in str(m.content) for m in messages):
+            text += "\nSTATUS: completed"
+        words = text.split(" ")
+        return [w + " " for w in words[:-1]] + words[-1:]
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], words: List[str]) -> dict:
+        input_tokens = sum(len(str(m.content).split()) for m in messages)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": len(words),
+            "total_tokens": input_tokens + len(words),
+        }
+
+    def _slowdown(self) -> float:
+        return max(1.0, StubChatModel.in_flight / self.capacity) if self.capacity else 1.0
+
+    def _chunk(self, messages: List[BaseMessage], words: List[str], i: int) -> AIMessageChunk:
+        # Usage rides on the last chunk, as OpenAI reports it with stream_usage
+        usage = self._usage(messages, words) if i == len(words) - 1 else None
+        return AIMessageChunk(content=words[i], usage_metadata=usage)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        words = self._words(messages)
+        time.sleep(self.latency_s + self.token_latency_s * len(words))
+        message = AIMessage(content="".join(words), usage_metadata=self._usage(messages, words))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        words = self._words(messages)
+        StubChatModel.in_flight += 1
+        try:
+            await asyncio.sleep((self.latency_s + self.token_latency_s * len(words)) * self._slowdown())
+        finally:
+            StubChatModel.in_flight -= 1
+        message = AIMessage(content="".join(words), usage_metadata=self._usage(messages, words))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency_s)
+        words = self._words(messages)
+        for i, word in enumerate(words):
+            time.sleep(self.token_latency_s)
+            chunk = ChatGenerationChunk(message=self._chunk(messages, words, i))
+            if run_manager:
+                run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        StubChatModel.in_flight += 1
+        try:
+            await asyncio.sleep(self.latency_s * self._slowdown())
+            words = self._words(messages)
+            for i, word in enumerate(words):
+                await asyncio.sleep(self.token_latency_s * self._slowdown())
+                chunk = ChatGenerationChunk(message=self._chunk(messages, words, i))
+                if run_manager:
+                    await run_manager.on_llm_new_token(word, chunk=chunk)
+                yield chunk
+        finally:
+            StubChatModel.in_flight -= 1
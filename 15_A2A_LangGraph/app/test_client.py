@@ -1,16 +1,30 @@
+import asyncio
+import csv
+import json
 import logging
+import os
+import socket
+import subprocess
+import sys
+import time
 
+from dataclasses import asdict, dataclass, field, replace
 from typing import Any
 from uuid import uuid4
 
+import click
 import httpx
 
 from a2a.client import A2ACardResolver, A2AClient
 from a2a.types import (
     AgentCard,
+    JSONRPCErrorResponse,
     MessageSendParams,
     SendMessageRequest,
     SendStreamingMessageRequest,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskStatusUpdateEvent,
 )
 from a2a.utils.constants import (
     AGENT_CARD_WELL_KNOWN_PATH,
@@ -18,15 +32,13 @@ from a2a.utils.constants import (
 )
 
 
-async def main() -> None:
+async def main(base_url: str = 'http://localhost:10000') -> None:
     # Configure logging to show INFO level messages
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)  # Get a logger instance
 
     # --8<-- [start:A2ACardResolver]
 
-    base_url = 'http://localhost:10000'
-
     # Increase timeout for LLM responses (default is 5 seconds, which is too short)
     async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as httpx_client:
         # Initialize A2ACardResolver
@@ -185,7 +197,272 @@ async def main() -> None:
         # --8<-- [end:send_message_streaming]
 
 
-if __name__ == '__main__':
-    import asyncio
+# Benchmark mode: N concurrent clients over the same A2ACardResolver/A2AClient
+
+
+@dataclass
+class BenchConfig:
+    url: str
+    clients: int = 8
+    conversations: int = 32
+    turns: int = 1
+    modes: list[str] = field(default_factory=lambda: ['send', 'stream'])
+    query: str = 'What do the policy documents say about student loans?'
+    timeout_s: float = 120.0
+    output: str | None = None
+    label: str = ''
+    stub: bool = False
+
+
+@dataclass
+class RequestResult:
+    """Timings of one request, in ms from sending it; ttfs/tta are only observable when streaming."""
+
+    mode: str
+    conversation: int
+    turn: int
+    ttfs_ms: float | None = None
+    tta_ms: float | None = None
+    e2e_ms: float | None = None
+    state: str = ''
+    error: str = ''
+
+
+# Final task states that count as a served request; anything else (rejected, failed, canceled) is an error
+OK_STATES = ('completed', 'input-required')
+
+
+def _message(text: str, context_id: str | None) -> MessageSendParams:
+    message: dict[str, Any] = {
+        'role': 'user',
+        'parts': [{'kind': 'text', 'text': text}],
+        'message_id': uuid4().hex,
+    }
+    if context_id:
+        message['context_id'] = context_id
+    return MessageSendParams(message=message)
+
+
+async def _send(client: A2AClient, result: RequestResult, params: MessageSendParams) -> str | None:
+    start = time.perf_counter()
+    response = await client.send_message(SendMessageRequest(id=str(uuid4()), params=params))
+    result.e2e_ms = (time.perf_counter() - start) * 1000
+    if isinstance(response.root, JSONRPCErrorResponse):
+        result.error = response.root.error.message or 'error'
+        return None
+    task = response.root.result
+    if isinstance(task, Task):
+        result.state = task.status.state.value
+    return task.context_id
+
+
+async def _stream(client: A2AClient, result: RequestResult, params: MessageSendParams) -> str | None:
+    start = time.perf_counter()
+    context_id = None
+    request = SendStreamingMessageRequest(id=str(uuid4()), params=params)
+    async for response in client.send_message_streaming(request):
+        elapsed = (time.perf_counter() - start) * 1000
+        if isinstance(response.root, JSONRPCErrorResponse):
+            result.error = response.root.error.message or 'error'
+            break
+        event = response.root.result
+        context_id = getattr(event, 'context_id', None) or context_id
+        if isinstance(event, Task | TaskStatusUpdateEvent):
+            if result.ttfs_ms is None:
+                result.ttfs_ms = elapsed
+            result.state = event.status.state.value
+        elif isinstance(event, TaskArtifactUpdateEvent) and result.tta_ms is None:
+            result.tta_ms = elapsed
+    result.e2e_ms = (time.perf_counter() - start) * 1000
+    return context_id
+
+
+async def _conversation(client: A2AClient, config: BenchConfig, mode: str, index: int) -> list[RequestResult]:
+    results = []
+    context_id = None
+    for turn in range(config.turns):
+        result = RequestResult(mode=mode, conversation=index, turn=turn)
+        text = config.query if turn == 0 else f'Follow-up {turn}: can you expand on that?'
+        try:
+            request = _send if mode == 'send' else _stream
+            context_id = await request(client, result, _message(text, context_id))
+        except Exception as e:
+            result.error = repr(e)
+        if not result.error and result.state not in OK_STATES:
+            result.error = f'task {result.state or "ended without a state"}'
+        results.append(result)
+        # A rejected or failed turn leaves nothing to follow up on
+        if result.error:
+            break
+    return results
+
+
+def _percentile(values: list[float], p: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
 
-    asyncio.run(main())
+def _summarize(mode: str, results: list[RequestResult], wall_s: float) -> dict[str, Any]:
+    ok = [r for r in results if not r.error]
+    summary: dict[str, Any] = {
+        'mode': mode,
+        'requests': len(results),
+        'errors': len(results) - len(ok),
+        # Rejections by admission control are fast; counted apart so overload does not look like speed
+        'rejected': sum(1 for r in results if r.state == 'rejected'),
+        'throughput_rps': len(ok) / wall_s if wall_s else 0.0,
+    }
+    for metric in ('ttfs_ms', 'tta_ms', 'e2e_ms'):
+        values = [getattr(r, metric) for r in ok if getattr(r, metric) is not None]
+        for p in (50, 90, 95, 99):
+            summary[f'{metric[:-3]}_p{p}_ms'] = _percentile(values, p)
+    return summary
+
+
+def _write_output(config: BenchConfig, summaries: list[dict], results: list[RequestResult]) -> None:
+    rows = [{'label': config.label, **asdict(r)} for r in results]
+    if config.output.endswith('.json'):
+        settings = {k: v for k, v in asdict(config).items() if k != 'output'}
+        with open(config.output, 'w') as f:
+            json.dump({'label': config.label, 'config': settings, 'summary': summaries, 'requests': rows}, f, indent=2)
+    else:
+        with open(config.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['label'])
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def _start_stub_server(port: int) -> subprocess.Popen:
+    """Starts `python -m app` on the offline stub model; no API keys or network needed."""
+    env = {
+        **os.environ,
+        'OPENAI_API_KEY': os.environ.get('OPENAI_API_KEY', 'sk-stub'),
+        'TAVILY_API_KEY': os.environ.get('TAVILY_API_KEY', 'tvly-stub'),
+        'USE_STUB_MODEL': '1',
+        # Every conversation sends the same query; measure the graph, not single-flight dedup
+        'SINGLE_FLIGHT': '0',
+    }
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(
+        [sys.executable, '-m', 'app', '--host', '127.0.0.1', '--port', str(port)],
+        cwd=project_root,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def _resolve_card(resolver: A2ACardResolver, wait_s: float) -> AgentCard:
+    deadline = time.monotonic() + wait_s
+    while True:
+        try:
+            return await resolver.get_agent_card()
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+async def run_benchmark(config: BenchConfig) -> list[dict]:
+    server = None
+    if config.stub:
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        server = _start_stub_server(port)
+        config.url = f'http://127.0.0.1:{port}'
+    summaries: list[dict] = []
+    results: list[RequestResult] = []
+    try:
+        limits = httpx.Limits(max_connections=config.clients, max_keepalive_connections=config.clients)
+        async with httpx.AsyncClient(timeout=httpx.Timeout(config.timeout_s), limits=limits) as httpx_client:
+            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=config.url)
+            card = await _resolve_card(resolver, 60 if server else 0)
+            client = A2AClient(httpx_client=httpx_client, agent_card=card)
+            # One untimed conversation, so imports and graph compilation are not measured
+            await _conversation(client, replace(config, turns=1), 'send', -1)
+            for mode in config.modes:
+                pending = iter(range(config.conversations))
+                mode_results: list[RequestResult] = []
+
+                async def worker() -> None:
+                    for index in pending:
+                        mode_results.extend(await _conversation(client, config, mode, index))
+
+                start = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(config.clients)))
+                summaries.append(_summarize(mode, mode_results, time.perf_counter() - start))
+                results.extend(mode_results)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def ms(value: float | None) -> str:
+        return '-' if value is None else f'{value:.0f}'
+
+    print(
+        f'{config.url}: {config.clients} clients, {config.conversations} conversations x {config.turns} turns'
+        + (f' [{config.label}]' if config.label else '')
+    )
+    print(f"{'mode':<8}{'req/s':>7}{'errors':>8}{'rejected':>10}{'ttfs p50/p95':>15}{'tta p50/p95':>15}{'e2e p50/p95/p99':>20}")
+    for s in summaries:
+        print(
+            f"{s['mode']:<8}{s['throughput_rps']:>7.1f}{s['errors']:>8}{s['rejected']:>10}"
+            f"{ms(s['ttfs_p50_ms']) + '/' + ms(s['ttfs_p95_ms']):>15}"
+            f"{ms(s['tta_p50_ms']) + '/' + ms(s['tta_p95_ms']):>15}"
+            f"{ms(s['e2e_p50_ms']) + '/' + ms(s['e2e_p95_ms']) + '/' + ms(s['e2e_p99_ms']):>20}"
+        )
+    if config.output:
+        _write_output(config, summaries, results)
+        print(f'Results written to {config.output}')
+    return summaries
+
+
+@click.group(invoke_without_command=True)
+@click.option('--url', default='http://localhost:10000', help='Base URL of the A2A server.')
+@click.pass_context
+def cli(ctx, url):
+    """Talks to the A2A agent; without a subcommand, runs the demo conversation."""
+    ctx.obj = {'url': url}
+    if ctx.invoked_subcommand is None:
+        asyncio.run(main(url))
+
+
+@cli.command()
+@click.option('--clients', default=8, help='Concurrent clients.')
+@click.option('--conversations', default=32, help='Conversations in total, shared among the clients.')
+@click.option('--turns', default=1, help='Turns per conversation; later turns reuse the context_id.')
+@click.option(
+    '--mode',
+    type=click.Choice(['send', 'stream', 'both']),
+    default='both',
+    help='message/send, message/stream, or one run of each.',
+)
+@click.option('--query', default='What do the policy documents say about student loans?')
+@click.option('--timeout', default=120.0, help='Per-request timeout in seconds.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write results to a .csv (per request) or .json file.')
+@click.option('--label', default='', help='Run name stored with the results, for comparing runs.')
+@click.option('--stub', is_flag=True, help='Start a local server on the offline stub model and benchmark it.')
+@click.pass_context
+def bench(ctx, clients, conversations, turns, mode, query, timeout, output, label, stub):
+    """Drives concurrent conversations and reports time-to-first-status, time-to-artifact and end-to-end latency."""
+    config = BenchConfig(
+        url=ctx.obj['url'],
+        clients=clients,
+        conversations=conversations,
+        turns=turns,
+        modes=['send', 'stream'] if mode == 'both' else [mode],
+        query=query,
+        timeout_s=timeout,
+        output=output,
+        label=label,
+        stub=stub,
+    )
+    asyncio.run(run_benchmark(config))
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,53 @@
+"""Per-task accounting of LLM calls and tokens.
+
+`LLMUsageTracker` is a callback handler passed in the run config for a single
+task. Every chat-model call made while the task's graph runs reports to it: the
+agent turns, a structured-output fallback, an escalated helpfulness judge, and
+the RAG tool's own generation. The result is exact per-task call and token
+counts without threading counters through graph state.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+
+class LLMUsageTracker(BaseCallbackHandler):
+    """Counts LLM calls and input/output tokens reported by `on_llm_end`."""
+
+    # Called on the event loop directly instead of via a thread pool; the work is tiny
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None) or {}
+                input_tokens += usage.get('input_tokens', 0)
+                output_tokens += usage.get('output_tokens', 0)
+        if not (input_tokens or output_tokens):
+            token_usage = (response.llm_output or {}).get('token_usage') or {}
+            input_tokens = token_usage.get('prompt_tokens', 0)
+            output_tokens = token_usage.get('completion_tokens', 0)
+        with self._lock:
+            self.llm_calls += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'llm_calls': self.llm_calls,
+                'input_tokens': self.input_tokens,
+                'output_tokens': self.output_tokens,
+                'total_tokens': self.input_tokens + self.output_tokens,
+            }
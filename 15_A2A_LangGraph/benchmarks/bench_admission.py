@@ -0,0 +1,117 @@
+"""Burst behaviour with and without admission control.
+
+Sends `--burst` requests at once to the in-process A2A request handler on the
+stub model. The stub is configured with a provider capacity
+(`--provider-capacity`): with more model calls in flight than that, every
+call slows down proportionally, as a shared rate limit does.
+
+- unlimited: every request runs at once, so all of them slow down together.
+- admission: `--max-concurrency` run at once and `--max-queue` wait in line.
+  The rest are rejected immediately with a retry-after hint.
+
+For each mode the script reports completed and rejected counts, completion
+latency percentiles, how many completed within the client timeout
+`--timeout-s`, and how long rejections took.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_admission --burst 100 --provider-capacity 8
+"""
+import argparse
+import asyncio
+import os
+import time
+from uuid import uuid4
+
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+os.environ.setdefault('TAVILY_API_KEY', 'tvly-benchmark')
+os.environ['USE_STUB_MODEL'] = '1'
+# Scenarios repeat the same questions; keep single-flight from answering them
+os.environ['SINGLE_FLIGHT'] = '0'
+
+import numpy as np  # noqa: E402
+from a2a.server.request_handlers import DefaultRequestHandler  # noqa: E402
+from a2a.server.tasks import InMemoryTaskStore  # noqa: E402
+from a2a.types import Message, MessageSendParams, Part, Role, Task, TaskState, TextPart  # noqa: E402
+
+from app.admission import AdmissionController  # noqa: E402
+from app.agent_executor import GeneralAgentExecutor  # noqa: E402
+
+
+async def _request(handler, i: int) -> tuple[TaskState, float, dict]:
+    message = Message(
+        role=Role.user,
+        parts=[Part(root=TextPart(text=f'Question {i} about loan limits?'))],
+        message_id=str(uuid4()),
+    )
+    start = time.perf_counter()
+    task = await handler.on_message_send(MessageSendParams(message=message))
+    assert isinstance(task, Task), task
+    hint = (task.status.message.metadata if task.status.message else None) or {}
+    return task.status.state, time.perf_counter() - start, hint
+
+
+async def _burst(admission, args) -> dict:
+    handler = DefaultRequestHandler(
+        agent_executor=GeneralAgentExecutor(admission=admission),
+        task_store=InMemoryTaskStore(),
+    )
+    start = time.perf_counter()
+    results = await asyncio.gather(*(_request(handler, i) for i in range(args.burst)))
+    wall = time.perf_counter() - start
+    done = [latency for state, latency, _ in results if state == TaskState.completed]
+    rejected = [(latency, meta) for state, latency, meta in results if state == TaskState.rejected]
+    return {
+        'completed': len(done),
+        'rejected': len(rejected),
+        'in_timeout': sum(1 for latency in done if latency <= args.timeout_s),
+        'p50': np.percentile(done, 50) * 1000 if done else float('nan'),
+        'p95': np.percentile(done, 95) * 1000 if done else float('nan'),
+        'max': max(done) * 1000 if done else float('nan'),
+        'reject_max': max(latency for latency, _ in rejected) * 1000 if rejected else float('nan'),
+        'retry_after': sorted({meta.get('retry_after_s') for _, meta in rejected}),
+        'wall': wall,
+        'metrics': admission.metrics() if admission else None,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--burst', type=int, default=100)
+    parser.add_argument('--provider-capacity', type=int, default=8, help='model calls before the stub slows down')
+    parser.add_argument('--max-concurrency', type=int, default=8)
+    parser.add_argument('--max-queue', type=int, default=32)
+    parser.add_argument('--timeout-s', type=float, default=5.0, help='client timeout used for the in-timeout count')
+    parser.add_argument('--token-latency-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    os.environ['STUB_MODEL_LATENCY_MS'] = '50'
+    os.environ['STUB_MODEL_TOKEN_LATENCY_MS'] = str(args.token_latency_ms)
+    os.environ['STUB_MODEL_CAPACITY'] = str(args.provider_capacity)
+
+    print(
+        f'burst of {args.burst}; provider capacity {args.provider_capacity}; '
+        f'admission {args.max_concurrency} running + {args.max_queue} queued; client timeout {args.timeout_s:g}s'
+    )
+    header = f"{'mode':<11}{'done':>6}{'in time':>9}{'rejected':>10}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'reject ms':>11}"
+    print(header)
+    modes = (
+        ('unlimited', None),
+        ('admission', AdmissionController(args.max_concurrency, args.max_queue)),
+    )
+    for name, admission in modes:
+        r = await _burst(admission, args)
+        print(
+            f"{name:<11}{r['completed']:>6}{r['in_timeout']:>9}{r['rejected']:>10}"
+            f"{r['p50']:>9.0f}{r['p95']:>9.0f}{r['max']:>9.0f}{r['reject_max']:>11.0f}"
+        )
+        if r['metrics']:
+            m = r['metrics']
+            print(
+                f"{'':<11}queue wait p50 {m['queue_wait_p50_ms']:.0f} ms, p95 {m['queue_wait_p95_ms']:.0f} ms; "
+                f"retry-after hints {r['retry_after']} s"
+            )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
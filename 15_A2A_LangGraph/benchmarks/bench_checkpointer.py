@@ -0,0 +1,103 @@
+"""Checkpointer memory over time: MemorySaver vs BoundedSQLiteSaver.
+
+Drives the agent graph in-process on the stub model (no network) with
+synthetic multi-thread traffic. Each step picks a conversation at random from
+`--threads` and sends it one more turn, with `--concurrency` turns in flight.
+Every `--sample-every` turns it records Python heap usage (tracemalloc) and,
+for SQLite, the database size and row counts.
+
+MemorySaver keeps every checkpoint of every thread, so its heap grows with the
+total number of turns. BoundedSQLiteSaver keeps only the latest checkpoints on
+disk, so its heap should stay flat.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_checkpointer --threads 200 --turns 2000
+"""
+import argparse
+import asyncio
+import gc
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+os.environ.setdefault('TAVILY_API_KEY', 'tvly-benchmark')
+os.environ['USE_STUB_MODEL'] = '1'
+os.environ['STUB_MODEL_LATENCY_MS'] = '0'
+
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+
+from app.agent import Agent  # noqa: E402
+from app.checkpointer import BoundedSQLiteSaver  # noqa: E402
+
+
+async def _traffic(agent, saver, args, baseline: int) -> tuple[list[tuple], list[float]]:
+    rng = random.Random(args.seed)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    samples, latencies = [], []
+    done = 0
+
+    async def turn(i: int):
+        nonlocal done
+        context_id = f'ctx-{rng.randrange(args.threads)}'
+        async with semaphore:
+            start = time.perf_counter()
+            config = {'configurable': {'thread_id': context_id}}
+            await agent.graph.ainvoke({'messages': [('user', f'Turn {i}: ' + 'word ' * args.words)]}, config)
+            latencies.append(time.perf_counter() - start)
+        done += 1
+        if done % args.sample_every == 0:
+            heap = tracemalloc.get_traced_memory()[0] - baseline
+            stats = saver.stats() if isinstance(saver, BoundedSQLiteSaver) else {}
+            samples.append((done, heap, stats.get('db_bytes'), stats.get('checkpoints')))
+
+    await asyncio.gather(*(turn(i) for i in range(args.turns)))
+    return samples, latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=200, help='distinct A2A conversations')
+    parser.add_argument('--turns', type=int, default=2000, help='total turns across all threads')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--words', type=int, default=40, help='words per user message')
+    parser.add_argument('--keep-latest', type=int, default=5)
+    parser.add_argument('--sample-every', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_checkpointer_')
+    print(f'{args.threads} threads, {args.turns} turns, concurrency {args.concurrency}; db in {workdir}')
+    for name in ('memory', 'sqlite'):
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        if name == 'memory':
+            saver = MemorySaver()
+        else:
+            saver = BoundedSQLiteSaver(os.path.join(workdir, 'checkpoints.sqlite'), keep_latest=args.keep_latest)
+        agent = Agent(checkpointer=saver)
+        start = time.perf_counter()
+        samples, latencies = await _traffic(agent, saver, args, baseline)
+        wall = time.perf_counter() - start
+        latencies.sort()
+        print(
+            f'\n{name}: {args.turns / wall:.0f} turns/s, turn p50 {statistics.median(latencies) * 1000:.1f} ms, '
+            f'p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f} ms'
+        )
+        print(f"  {'turns':>7}{'heap MiB':>11}{'db MiB':>9}{'rows':>8}")
+        for done, heap, db_bytes, rows in samples:
+            db = f'{db_bytes / 2**20:.1f}' if db_bytes is not None else '-'
+            print(f"  {done:>7}{heap / 2**20:>11.1f}{db:>9}{rows if rows is not None else '-':>8}")
+        if isinstance(saver, BoundedSQLiteSaver):
+            saver.close()
+        del agent, saver
+        tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
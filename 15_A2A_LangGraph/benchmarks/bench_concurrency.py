@@ -0,0 +1,131 @@
+"""Does one long A2A request delay the others? Async streaming vs the old blocking loop.
+
+Runs `GeneralAgentExecutor.execute` in-process against the streaming stub model
+(no network). One long request (a long question, so a long streamed answer)
+starts first. While it is in flight, `--short` short requests arrive together.
+For each short request the script records time to the first answer chunk and
+to completion, measured from when it was sent. It compares them with the same
+short requests run without the long one.
+
+- async: the current `Agent.stream` (graph.astream, async nodes).
+- blocking: the previous implementation, iterating the sync `graph.stream`
+  inside the async generator, so every model call blocks the event loop.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_concurrency --short 10 --token-latency-ms 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from uuid import uuid4
+
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+os.environ.setdefault('TAVILY_API_KEY', 'tvly-benchmark')
+os.environ['USE_STUB_MODEL'] = '1'
+# Scenarios repeat the same questions; keep single-flight from answering them
+os.environ['SINGLE_FLIGHT'] = '0'
+
+from a2a.server.agent_execution import RequestContext  # noqa: E402
+from a2a.types import Message, MessageSendParams, Part, Role, TaskArtifactUpdateEvent, TextPart  # noqa: E402
+
+from app.agent import Agent  # noqa: E402
+from app.agent_executor import GeneralAgentExecutor  # noqa: E402
+from langchain_core.messages import AIMessage, ToolMessage  # noqa: E402
+
+
+class _BlockingAgent(Agent):
+    """The pre-async `Agent.stream`: sync graph iteration inside an async generator."""
+
+    async def stream(self, query, context_id):
+        inputs = {'messages': [('user', query)]}
+        config = {'configurable': {'thread_id': context_id}}
+        for item in self.graph.stream(inputs, config, stream_mode='values'):
+            message = item['messages'][-1]
+            if isinstance(message, AIMessage) and message.tool_calls:
+                yield {'is_task_complete': False, 'require_user_input': False, 'content': 'Searching for information...'}
+            elif isinstance(message, ToolMessage):
+                yield {'is_task_complete': False, 'require_user_input': False, 'content': 'Processing the results...'}
+        yield self.get_agent_response(config)
+
+
+class _TimingQueue:
+    """Stands in for EventQueue and records when the first answer chunk arrives."""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.first_chunk_s = None
+
+    async def enqueue_event(self, event):
+        if self.first_chunk_s is None and isinstance(event, TaskArtifactUpdateEvent):
+            self.first_chunk_s = time.perf_counter() - self.start
+
+
+async def _request(executor, question: str, issued_at: float) -> tuple[float, float]:
+    """Run one request; latencies are measured from `issued_at`, when the client sent it."""
+    message = Message(
+        role=Role.user,
+        parts=[Part(root=TextPart(text=question))],
+        message_id=str(uuid4()),
+        context_id=str(uuid4()),
+    )
+    queue = _TimingQueue(issued_at)
+    await executor.execute(RequestContext(request=MessageSendParams(message=message)), queue)
+    total = time.perf_counter() - issued_at
+    return queue.first_chunk_s or total, total
+
+
+async def _scenario(executor, short: int, long_words: int, with_long: bool) -> list[tuple[float, float]]:
+    long_task = None
+    # Short requests are sent 100 ms after the long one, whether or not the loop is free to take them
+    issued_at = time.perf_counter() + 0.1
+    if with_long:
+        long_question = 'Explain in detail ' + ' '.join(f'point{i}' for i in range(long_words))
+        long_task = asyncio.create_task(_request(executor, long_question, time.perf_counter()))
+    await asyncio.sleep(max(0.0, issued_at - time.perf_counter()))
+    results = await asyncio.gather(
+        *(_request(executor, f'Short question {i} about loans?', issued_at) for i in range(short))
+    )
+    if long_task:
+        await long_task
+    return list(results)
+
+
+def _executor(agent_cls, model_latency_ms: float, token_latency_ms: float) -> GeneralAgentExecutor:
+    os.environ['STUB_MODEL_LATENCY_MS'] = str(model_latency_ms)
+    os.environ['STUB_MODEL_TOKEN_LATENCY_MS'] = str(token_latency_ms)
+    executor = GeneralAgentExecutor()
+    executor.agent = agent_cls()
+    return executor
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--short', type=int, default=10, help='short requests issued during the long one')
+    parser.add_argument('--long-words', type=int, default=300, help='length of the long question')
+    parser.add_argument('--latency-ms', type=float, default=50, help='stub time to first token')
+    parser.add_argument('--token-latency-ms', type=float, default=10, help='stub delay per streamed word')
+    args = parser.parse_args()
+
+    print(
+        f'stub: {args.latency_ms:.0f} ms to first token, {args.token_latency_ms:.0f} ms/word; '
+        f'{args.short} short requests'
+    )
+    print(f"{'agent':<10}{'long request':>14}{'first chunk p50/max ms':>26}{'complete p50/max ms':>24}")
+    for name, agent_cls in (('async', Agent), ('blocking', _BlockingAgent)):
+        executor = _executor(agent_cls, args.latency_ms, args.token_latency_ms)
+        for with_long in (False, True):
+            results = await _scenario(executor, args.short, args.long_words, with_long)
+            first = [r[0] * 1000 for r in results]
+            total = [r[1] * 1000 for r in results]
+            print(
+                f"{name:<10}{'yes' if with_long else 'no':>14}"
+                f'{statistics.median(first):>16.0f} / {max(first):<7.0f}'
+                f'{statistics.median(total):>14.0f} / {max(total):<7.0f}'
+            )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
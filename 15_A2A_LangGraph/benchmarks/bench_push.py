@@ -0,0 +1,173 @@
+"""Push-notification traffic and delivery: inline sender vs pooled sender.
+
+Runs `--tasks` concurrent streaming requests against the in-process A2A
+request handler on the stub model. Each request registers a push webhook.
+The webhook is simulated in-process (`httpx.MockTransport`). It takes
+`--webhook-latency-ms` per POST and answers 503 to a `--failure-rate`
+fraction of them.
+
+For each sender the script reports:
+
+- the POSTs the webhook received;
+- how many tasks' final `completed` state reached the webhook;
+- the POSTs the webhook rejected;
+- stream duration percentiles, i.e. how much webhook time the clients waited for.
+
+It also sends a burst of `working` statuses through `StatusCoalescer`, with
+and without a minimum interval, and counts how many reach the event queue.
+
+    uv run python -m benchmarks.bench_push --tasks 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from uuid import uuid4
+
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+os.environ.setdefault('TAVILY_API_KEY', 'tvly-benchmark')
+os.environ['USE_STUB_MODEL'] = '1'
+# Scenarios repeat the same questions; keep single-flight from answering them
+os.environ['SINGLE_FLIGHT'] = '0'
+
+import httpx  # noqa: E402
+from a2a.server.events import EventQueue  # noqa: E402
+from a2a.server.request_handlers import DefaultRequestHandler  # noqa: E402
+from a2a.server.tasks import (  # noqa: E402
+    BasePushNotificationSender,
+    InMemoryPushNotificationConfigStore,
+    InMemoryTaskStore,
+    TaskUpdater,
+)
+from a2a.types import (  # noqa: E402
+    Message,
+    MessageSendConfiguration,
+    MessageSendParams,
+    Part,
+    PushNotificationConfig,
+    Role,
+    TextPart,
+)
+from a2a.utils import new_agent_text_message  # noqa: E402
+
+from app.agent_executor import GeneralAgentExecutor  # noqa: E402
+from app.notifications import PooledPushNotificationSender, StatusCoalescer  # noqa: E402
+
+
+class Webhook:
+    """In-process webhook endpoint with latency and random 503s; records the last state per task."""
+
+    def __init__(self, latency_s: float, failure_rate: float):
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self.posts = 0
+        self.failures = 0
+        self.last_state: dict[str, str] = {}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.posts += 1
+        await asyncio.sleep(self.latency_s)
+        if random.random() < self.failure_rate:
+            self.failures += 1
+            return httpx.Response(503)
+        task = json.loads(request.content)
+        self.last_state[task['id']] = task['status']['state']
+        return httpx.Response(200)
+
+
+async def _stream(handler, i: int) -> float:
+    message = Message(
+        role=Role.user,
+        parts=[Part(root=TextPart(text=f'Question {i} about loan limits?'))],
+        message_id=str(uuid4()),
+    )
+    configuration = MessageSendConfiguration(
+        push_notification_config=PushNotificationConfig(url='http://webhook.local/a2a', token='bench'),
+    )
+    start = time.perf_counter()
+    async for _ in handler.on_message_send_stream(MessageSendParams(message=message, configuration=configuration)):
+        pass
+    return time.perf_counter() - start
+
+
+async def _run(kind: str, args) -> dict:
+    random.seed(0)
+    webhook = Webhook(args.webhook_latency_ms / 1000, args.failure_rate)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(webhook))
+    config_store = InMemoryPushNotificationConfigStore()
+    if kind == 'inline':
+        sender = BasePushNotificationSender(httpx_client=client, config_store=config_store)
+    else:
+        sender = PooledPushNotificationSender(config_store, client, backoff_s=0.05)
+    handler = DefaultRequestHandler(
+        agent_executor=GeneralAgentExecutor(),
+        task_store=InMemoryTaskStore(),
+        push_config_store=config_store,
+        push_sender=sender,
+    )
+    durations = sorted(await asyncio.gather(*(_stream(handler, i) for i in range(args.tasks))))
+    if kind == 'pooled':
+        await sender.drain()
+    await client.aclose()
+    return {
+        'posts': webhook.posts,
+        'finals': sum(1 for state in webhook.last_state.values() if state == 'completed'),
+        'rejected': webhook.failures,
+        'p50': statistics.median(durations) * 1000,
+        'max': durations[-1] * 1000,
+        'metrics': sender.metrics() if kind == 'pooled' else None,
+    }
+
+
+async def _status_burst(interval_s: float, updates: int, gap_s: float) -> int:
+    queue = EventQueue()
+    coalescer = StatusCoalescer(TaskUpdater(queue, 'task', 'context'), interval_s)
+    for i in range(updates):
+        await coalescer.working(new_agent_text_message(f'step {i}', 'context', 'task'))
+        await asyncio.sleep(gap_s)
+    await asyncio.sleep(interval_s)
+    return coalescer.sent
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=20)
+    parser.add_argument('--webhook-latency-ms', type=float, default=50)
+    parser.add_argument('--failure-rate', type=float, default=0.05)
+    parser.add_argument('--token-latency-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    # The inline sender logs a traceback per failed POST
+    logging.getLogger('a2a.server.tasks.base_push_notification_sender').setLevel(logging.CRITICAL)
+    os.environ['STUB_MODEL_LATENCY_MS'] = '20'
+    os.environ['STUB_MODEL_TOKEN_LATENCY_MS'] = str(args.token_latency_ms)
+
+    print(
+        f'{args.tasks} streaming tasks; webhook {args.webhook_latency_ms:.0f} ms per POST, '
+        f'{args.failure_rate:.0%} answered 503'
+    )
+    print(f"{'sender':<8}{'POSTs':>7}{'finals':>9}{'503s':>7}{'stream p50 ms':>15}{'max ms':>9}")
+    for kind in ('inline', 'pooled'):
+        r = await _run(kind, args)
+        print(
+            f"{kind:<8}{r['posts']:>7}{r['finals']:>5}/{args.tasks:<3}{r['rejected']:>7}{r['p50']:>15.0f}{r['max']:>9.0f}"
+        )
+        if r['metrics']:
+            m = r['metrics']
+            print(
+                f"{'':<8}{m['requested']} notifications requested, {m['superseded']} superseded, "
+                f"{m['retries']} retries, {m['failed']} failed; delivery p50 {m['delivery_p50_ms']:.0f} ms, p95 {m['delivery_p95_ms']:.0f} ms"
+            )
+
+    updates, gap_s = 50, 0.01
+    for interval_s in (0.0, 0.25):
+        sent = await _status_burst(interval_s, updates, gap_s)
+        print(f'status burst: {updates} updates {gap_s * 1000:.0f} ms apart, interval {interval_s:g}s -> {sent} sent')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
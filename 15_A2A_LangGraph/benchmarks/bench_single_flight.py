@@ -0,0 +1,110 @@
+"""Graph runs saved by single-flight deduplication of identical first turns.
+
+Sends `--burst` concurrent `message/stream` requests with the same question
+(different capitalization and spacing), each in a new context, to the
+in-process A2A request handler on the stub model. It then sends a second
+burst inside the reuse window, and a follow-up turn in every context of the
+first burst. Each scenario runs with single-flight off and on. The script
+reports wall time and the LLM calls spent (summed from the `usage` metadata
+on each task's final artifact). It also checks that every stream got the full
+answer and that every follow-up turn saw the first turn's history.
+
+    uv run python -m benchmarks.bench_single_flight --burst 50
+"""
+import argparse
+import asyncio
+import os
+import time
+from uuid import uuid4
+
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+os.environ.setdefault('TAVILY_API_KEY', 'tvly-benchmark')
+os.environ['USE_STUB_MODEL'] = '1'
+os.environ.setdefault('SINGLE_FLIGHT_REUSE_S', '5')
+
+from a2a.server.request_handlers import DefaultRequestHandler  # noqa: E402
+from a2a.server.tasks import InMemoryTaskStore  # noqa: E402
+from a2a.types import (  # noqa: E402
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+from app.agent_executor import GeneralAgentExecutor  # noqa: E402
+
+QUESTION = 'What is the maximum Direct Loan amount for a dependent undergraduate?'
+
+
+def _variant(i: int) -> str:
+    """The same question as different users type it."""
+    return [QUESTION, QUESTION.lower(), '  ' + QUESTION.upper(), QUESTION.replace(' ', '  ')][i % 4]
+
+
+async def _stream(handler, text: str, context_id: str) -> tuple[bool, dict]:
+    """Stream one turn; return (completed with an answer, usage from the final artifact)."""
+    message = Message(
+        role=Role.user,
+        parts=[Part(root=TextPart(text=text))],
+        message_id=str(uuid4()),
+        context_id=context_id,
+    )
+    answer, usage, state = '', {}, None
+    async for event in handler.on_message_send_stream(MessageSendParams(message=message)):
+        if isinstance(event, TaskArtifactUpdateEvent) and event.last_chunk:
+            answer = event.artifact.parts[0].root.text
+            usage = (event.artifact.metadata or {}).get('usage') or {}
+        elif isinstance(event, TaskStatusUpdateEvent) and event.final:
+            state = event.status.state
+    return state == TaskState.completed and answer.startswith('Answer to:'), usage
+
+
+async def _burst(handler, turns: list[tuple[str, str]]) -> dict:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(_stream(handler, text, context_id) for text, context_id in turns))
+    return {
+        'wall': time.perf_counter() - start,
+        'llm_calls': sum(usage.get('llm_calls', 0) for _, usage in results),
+        'input_tokens': [usage.get('input_tokens', 0) for _, usage in results],
+        'answered': sum(1 for ok, _ in results if ok),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--burst', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=200, help='stub delay before each answer')
+    parser.add_argument('--token-latency-ms', type=float, default=5)
+    args = parser.parse_args()
+    os.environ['STUB_MODEL_LATENCY_MS'] = str(args.latency_ms)
+    os.environ['STUB_MODEL_TOKEN_LATENCY_MS'] = str(args.token_latency_ms)
+
+    executor = GeneralAgentExecutor()
+    handler = DefaultRequestHandler(agent_executor=executor, task_store=InMemoryTaskStore())
+    flight = executor.agent.single_flight
+
+    print(f'bursts of {args.burst} concurrent first turns, stub {args.latency_ms:.0f} ms + {args.token_latency_ms:.0f} ms/word')
+    print(f"{'scenario':<20}{'single-flight':>15}{'wall ms':>9}{'LLM calls':>11}{'answered':>10}{'history':>9}")
+    for enabled in (False, True):
+        flight.enabled = enabled
+        contexts = [str(uuid4()) for _ in range(args.burst)]
+        first = await _burst(handler, [(_variant(i), c) for i, c in enumerate(contexts)])
+        again = await _burst(handler, [(_variant(i), str(uuid4())) for i in range(args.burst)])
+        follow_up = await _burst(handler, [('And for an independent student?', c) for c in contexts])
+        # The follow-up prompt includes the first turn only if the thread kept it
+        history = sum(1 for tokens in follow_up['input_tokens'] if tokens > max(first['input_tokens']))
+        for name, r in (('identical burst', first), ('again, in window', again), ('follow-up turns', follow_up)):
+            print(
+                f"{name:<20}{'on' if enabled else 'off':>15}{r['wall'] * 1000:>9.0f}{r['llm_calls']:>11}"
+                f"{r['answered']:>6}/{args.burst:<3}"
+                + (f"{history:>5}/{args.burst}" if r is follow_up else '')
+            )
+    print(f'single-flight counters: {flight.stats()}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,159 @@
+"""A2A server throughput with 1 vs N uvicorn workers.
+
+For each worker count, starts `python -m app --workers N` on the stub model
+(no network), with shared SQLite task and checkpoint stores in a temp
+directory. It then runs `--conversations` concurrent conversations of
+`--turns` `message/send` calls each, all sharing one `contextId`, and reports
+throughput, latency percentiles and two cross-worker checks:
+
+- continuity: each turn's prompt is longer than the previous turn's (from the
+  usage in the final artifact's metadata), so the conversation history was
+  found whichever worker served the turn;
+- visibility: `tasks/get` for every finished task succeeds.
+
+The stub is CPU-light, so this measures the server's own per-request work
+(JSON-RPC, graph bookkeeping, serialization), which is what extra workers
+parallelize. Expect scaling only up to the number of cores.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_workers --workers 1 4 --conversations 32 --turns 4
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+import httpx
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _start_server(workers: int, port: int, workdir: str, stub_latency_ms: float) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        'OPENAI_API_KEY': os.environ.get('OPENAI_API_KEY', 'sk-benchmark'),
+        'TAVILY_API_KEY': os.environ.get('TAVILY_API_KEY', 'tvly-benchmark'),
+        'USE_STUB_MODEL': '1',
+        # Conversations share their opening question; measure full runs, not single-flight replays
+        'SINGLE_FLIGHT': '0',
+        'STUB_MODEL_LATENCY_MS': str(stub_latency_ms),
+        'CHECKPOINTER': 'sqlite',
+        'CHECKPOINT_DB_PATH': os.path.join(workdir, 'checkpoints.sqlite'),
+        'RAG_DATA_DIR': os.path.join(workdir, 'data'),
+        'RAG_INDEX_DIR': os.path.join(workdir, 'rag_index'),
+    }
+    command = [
+        sys.executable, '-m', 'app',
+        '--host', '127.0.0.1', '--port', str(port),
+        '--workers', str(workers),
+        '--store', 'sqlite', '--store-path', os.path.join(workdir, 'tasks.sqlite'),
+    ]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout_s: float = 60) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get('/.well-known/agent-card.json')).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+async def _rpc(client: httpx.AsyncClient, method: str, params: dict) -> dict:
+    response = await client.post('/', json={'jsonrpc': '2.0', 'id': str(uuid4()), 'method': method, 'params': params})
+    body = response.json()
+    if 'error' in body:
+        raise RuntimeError(body['error'])
+    return body['result']
+
+
+async def _conversation(client, turns: int, latencies: list, task_ids: list) -> bool:
+    """Run one multi-turn conversation; True if every turn saw a longer history than the last."""
+    context_id = str(uuid4())
+    previous_input = -1
+    continuous = True
+    for turn in range(turns):
+        message = {
+            'role': 'user',
+            'parts': [{'kind': 'text', 'text': f'Turn {turn}: what did I ask before?'}],
+            'messageId': str(uuid4()),
+            'contextId': context_id,
+        }
+        start = time.perf_counter()
+        task = await _rpc(client, 'message/send', {'message': message})
+        latencies.append(time.perf_counter() - start)
+        task_ids.append(task['id'])
+        usage = ((task.get('artifacts') or [{}])[-1].get('metadata') or {}).get('usage') or {}
+        input_tokens = usage.get('input_tokens', 0)
+        continuous &= input_tokens > previous_input
+        previous_input = input_tokens
+    return continuous
+
+
+async def _run(workers: int, args) -> dict:
+    workdir = tempfile.mkdtemp(prefix=f'bench_workers_{workers}_')
+    port = _free_port()
+    server = _start_server(workers, port, workdir, args.stub_latency_ms)
+    try:
+        limits = httpx.Limits(max_connections=args.conversations)
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=120, limits=limits) as client:
+            await _wait_ready(client)
+            # Warm every worker's graph and imports before timing
+            await asyncio.gather(*(_conversation(client, 1, [], []) for _ in range(workers * 2)))
+            latencies, task_ids = [], []
+            start = time.perf_counter()
+            continuity = await asyncio.gather(
+                *(_conversation(client, args.turns, latencies, task_ids) for _ in range(args.conversations))
+            )
+            wall = time.perf_counter() - start
+            found = await asyncio.gather(*(_rpc(client, 'tasks/get', {'id': task_id}) for task_id in task_ids))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    latencies.sort()
+    return {
+        'workers': workers,
+        'throughput': len(latencies) / wall,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        'continuous': sum(continuity),
+        'visible': sum(1 for task in found if task.get('id')),
+        'tasks': len(task_ids),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 2])
+    parser.add_argument('--conversations', type=int, default=32, help='concurrent conversations')
+    parser.add_argument('--turns', type=int, default=4, help='turns per conversation')
+    parser.add_argument('--stub-latency-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    print(f'{os.cpu_count()} CPUs; {args.conversations} conversations x {args.turns} turns, stub {args.stub_latency_ms:.0f} ms')
+    print(f"{'workers':>8}{'turns/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'continuous':>12}{'tasks/get':>11}")
+    for workers in args.workers:
+        r = await _run(workers, args)
+        print(
+            f"{r['workers']:>8}{r['throughput']:>10.1f}{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}"
+            f"{r['continuous']:>6}/{args.conversations:<5}{r['visible']:>5}/{r['tasks']:<5}"
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
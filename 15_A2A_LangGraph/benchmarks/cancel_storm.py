@@ -0,0 +1,129 @@
+"""Cancel storm: does capacity come back as soon as clients give up?
+
+Runs the A2A request handler in-process with `GeneralAgentExecutor` on the
+streaming stub model (no network):
+
+1. times a short request on an idle server (baseline);
+2. starts `--tasks` long streaming requests and waits until all are streaming;
+3. cancels them all at once with `tasks/cancel` (the storm);
+4. right after the storm, checks that no graph run or model call is still in
+   flight and times the same short request again.
+
+It exits non-zero if any check fails, so it can serve as a regression test:
+
+    uv run python -m benchmarks.cancel_storm --tasks 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+os.environ.setdefault('TAVILY_API_KEY', 'tvly-benchmark')
+os.environ['USE_STUB_MODEL'] = '1'
+# Every request here asks the same question; each must run its own graph to be cancelled
+os.environ['SINGLE_FLIGHT'] = '0'
+
+from a2a.server.request_handlers import DefaultRequestHandler  # noqa: E402
+from a2a.server.tasks import InMemoryTaskStore  # noqa: E402
+from a2a.types import (  # noqa: E402
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskState,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+from app.agent_executor import GeneralAgentExecutor  # noqa: E402
+from app.stub_model import StubChatModel  # noqa: E402
+
+
+def _params(text: str) -> MessageSendParams:
+    message = Message(role=Role.user, parts=[Part(root=TextPart(text=text))], message_id=str(uuid4()))
+    return MessageSendParams(message=message)
+
+
+async def _short_request(handler) -> float:
+    start = time.perf_counter()
+    result = await handler.on_message_send(_params('Short question about loans?'))
+    assert isinstance(result, Task) and result.status.state == TaskState.completed, result
+    return time.perf_counter() - start
+
+
+async def _long_request(handler, task_ids: list, streaming: asyncio.Event, total: int) -> TaskState | None:
+    """Stream a long answer; return the final state the client saw."""
+    final_state = None
+    async for event in handler.on_message_send_stream(_params('Explain in detail ' + 'point ' * 400)):
+        if isinstance(event, Task):
+            task_ids.append(event.id)
+        elif isinstance(event, TaskArtifactUpdateEvent) and len(task_ids) == total:
+            streaming.set()
+        elif isinstance(event, TaskStatusUpdateEvent) and event.final:
+            final_state = event.status.state
+    return final_state
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=50, help='long requests to start and cancel')
+    parser.add_argument('--token-latency-ms', type=float, default=20, help='stub delay per streamed word')
+    args = parser.parse_args()
+
+    os.environ['STUB_MODEL_LATENCY_MS'] = '20'
+    os.environ['STUB_MODEL_TOKEN_LATENCY_MS'] = str(args.token_latency_ms)
+    executor = GeneralAgentExecutor()
+    handler = DefaultRequestHandler(agent_executor=executor, task_store=InMemoryTaskStore())
+
+    baseline = statistics.median([await _short_request(handler) for _ in range(5)])
+
+    task_ids: list = []
+    streaming = asyncio.Event()
+    clients = [
+        asyncio.create_task(_long_request(handler, task_ids, streaming, args.tasks)) for _ in range(args.tasks)
+    ]
+    await asyncio.wait_for(streaming.wait(), timeout=60)
+    await asyncio.sleep(0.2)
+    before = (len(executor._running), StubChatModel.in_flight)
+
+    async def cancel(task_id: str) -> tuple[float, TaskState]:
+        start = time.perf_counter()
+        task = await handler.on_cancel_task(TaskIdParams(id=task_id))
+        return time.perf_counter() - start, task.status.state
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(cancel(task_id) for task_id in task_ids))
+    storm_s = time.perf_counter() - start
+    after = (len(executor._running), StubChatModel.in_flight)
+    recovered = statistics.median([await _short_request(handler) for _ in range(5)])
+    client_states = await asyncio.wait_for(asyncio.gather(*clients), timeout=10)
+
+    cancel_ms = sorted(r[0] * 1000 for r in results)
+    checks = {
+        'every cancel returned canceled': all(state == TaskState.canceled for _, state in results),
+        'every streaming client saw canceled': all(state == TaskState.canceled for state in client_states),
+        'no graph runs left': after[0] == 0,
+        'no model calls left in flight': after[1] == 0,
+        'short request back to baseline (< 2x)': recovered < 2 * baseline,
+    }
+    print(f'{args.tasks} long streaming tasks; before the storm: {before[0]} runs, {before[1]} model calls in flight')
+    print(
+        f'storm: {storm_s * 1000:.0f} ms total, per cancel p50 {statistics.median(cancel_ms):.0f} ms, '
+        f'max {cancel_ms[-1]:.0f} ms'
+    )
+    print(f'after the storm: {after[0]} runs, {after[1]} model calls in flight')
+    print(f'short request: baseline {baseline * 1000:.0f} ms, right after the storm {recovered * 1000:.0f} ms')
+    for name, ok in checks.items():
+        print(f"  [{'ok' if ok else 'FAIL'}] {name}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""Bulk lookup latency of the embedding cache: LocalFileStore vs SQLiteByteStore.
+
+Fills both stores with `--entries` embeddings serialized the way langchain's
+CacheBackedEmbeddings stores them (JSON float lists under namespaced hash
+keys), then measures:
+
+- write: filling the store in batches of 32, like `embed_documents`.
+- lookup: random `mget` batches of `--batch` keys through a fresh store
+  instance, with p50/p95 per batch.
+- bulk read: `mget` of every key in batches of 1000.
+- scan: listing every key.
+- files on disk and bytes used, migration of the file store into SQLite, and
+  compaction after deleting half the entries.
+
+Run from the project root:
+
+    python -m benchmarks.bench_embedding_store --entries 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+
+from langchain.storage import LocalFileStore
+
+from langgraph_agent_lib.stores import SQLiteByteStore, migrate_local_file_store
+
+
+def _disk_usage(path: str) -> tuple:
+    """(files, bytes allocated) under path."""
+    files = used = 0
+    for directory, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            used += os.stat(os.path.join(directory, name)).st_blocks * 512
+    return files, used
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _lookups(store, keys, batch: int, rounds: int, rng: random.Random) -> list:
+    latencies = []
+    for _ in range(rounds):
+        sample = rng.sample(keys, batch)
+        start = time.perf_counter()
+        values = store.mget(sample)
+        latencies.append(time.perf_counter() - start)
+        assert all(v is not None for v in values)
+    return latencies
+
+
+def _percentile(values, q: float) -> float:
+    return statistics.quantiles(values, n=100)[int(q) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=512, help="embedding dimensions per entry")
+    parser.add_argument("--batch", type=int, default=32, help="keys per lookup")
+    parser.add_argument("--rounds", type=int, default=500, help="lookup batches to time")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    namespace = "0" * 32
+    keys = [f"{namespace}{uuid.UUID(int=rng.getrandbits(128))}" for _ in range(args.entries)]
+    values = [json.dumps([rng.uniform(-1, 1) for _ in range(args.dim)]).encode() for _ in range(args.entries)]
+    pairs = list(zip(keys, values))
+    root = tempfile.mkdtemp(prefix="bench_embedding_store_")
+    file_dir, db_path = os.path.join(root, "files"), os.path.join(root, "packed", "embeddings.sqlite")
+
+    def fill(store):
+        for i in range(0, len(pairs), 32):
+            store.mset(pairs[i:i + 32])
+
+    results = {}
+    for name, factory in (("LocalFileStore", lambda: LocalFileStore(file_dir)), ("SQLiteByteStore", lambda: SQLiteByteStore(db_path))):
+        write_s = _timed(lambda: fill(factory()))
+        # A fresh instance, as a new process would open it
+        store = factory()
+        latencies = _lookups(store, keys, args.batch, args.rounds, rng)
+        bulk_s = _timed(lambda: [store.mget(keys[i:i + 1000]) for i in range(0, len(keys), 1000)])
+        scan_s = _timed(lambda: sum(1 for _ in store.yield_keys()))
+        files, used = _disk_usage(os.path.dirname(db_path) if name == "SQLiteByteStore" else file_dir)
+        results[name] = (write_s, latencies, bulk_s, scan_s, files, used)
+        if isinstance(store, SQLiteByteStore):
+            store.close()
+
+    print(f"{args.entries} entries of {args.dim} dims (~{len(values[0]) / 1024:.1f} KiB each)")
+    print(f"{'store':<18}{'write s':>9}{f'mget {args.batch} p50 ms':>17}{'p95 ms':>9}{'bulk read s':>13}{'scan s':>8}{'files':>8}{'MiB':>8}")
+    for name, (write_s, latencies, bulk_s, scan_s, files, used) in results.items():
+        print(
+            f"{name:<18}{write_s:>9.2f}{statistics.median(latencies) * 1000:>17.2f}"
+            f"{_percentile(latencies, 95) * 1000:>9.2f}{bulk_s:>13.2f}{scan_s:>8.2f}{files:>8}{used / 2**20:>8.1f}"
+        )
+
+    migrated_path = os.path.join(root, "migrated", "embeddings.sqlite")
+    migrated = SQLiteByteStore(migrated_path)
+    start = time.perf_counter()
+    count = migrate_local_file_store(file_dir, migrated)
+    migrate_s = time.perf_counter() - start
+    identical = migrated.mget(keys[:1000]) == values[:1000]
+    print(f"migration: {count} entries in {migrate_s:.2f} s; values identical: {identical}")
+
+    migrated.mdelete(keys[::2])
+    before = migrated.size_bytes()
+    reclaimed = migrated.compact()
+    print(f"compaction after deleting half: {before / 2**20:.1f} MiB -> {(before - reclaimed) / 2**20:.1f} MiB, {len(migrated)} entries left")
+    migrated.close()
+    shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
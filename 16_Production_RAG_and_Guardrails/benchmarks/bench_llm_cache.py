@@ -0,0 +1,143 @@
+"""Hit rate, memory and latency of each `setup_llm_cache` type on one workload.
+
+Replays `--requests` chat calls against a fake chat model that takes
+`--model-latency-ms` per call. Questions are drawn from `--unique` distinct
+questions with a Zipf-like popularity, and `--paraphrase-rate` of requests
+reword the question (case, filler words, word order) the way different users
+would. Each cache type gets a fresh cache. Reports hit rate, total time,
+lookup p50/p95, entries, bytes held, and answers that differ from what the
+model would have said (a semantic cache's false matches).
+
+The semantic cache uses a bag-of-words hashing embedding, so it runs offline.
+
+Run from the project root:
+
+    python -m benchmarks.bench_llm_cache --requests 1000
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import time
+from typing import Any, List, Optional
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain_core.globals import set_llm_cache  # noqa: E402
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, BaseMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+
+from langgraph_agent_lib import setup_llm_cache  # noqa: E402
+
+FILLER = {"please", "tell", "me", "can", "you", "i", "want", "to", "know"}
+VOCABULARY = [f"term{i}" for i in range(400)]
+
+
+def _canonical(text: str) -> str:
+    """The question a prompt asks, ignoring case, filler and word order."""
+    words = {w.strip("?.,:").lower() for w in text.split()} - FILLER
+    return " ".join(sorted(w for w in words if w))
+
+
+class SlowAnswerModel(BaseChatModel):
+    """Answers from the question's canonical form after a fixed delay, like a remote LLM."""
+
+    latency_s: float = 0.01
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-answer"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency_s)
+        answer = "answer:" + hashlib.sha1(_canonical(messages[-1].content).encode()).hexdigest()[:12]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer))])
+
+
+class BagOfWordsEmbedding(Embeddings):
+    """Hashed bag-of-words vectors: rewordings of a question land close together."""
+
+    def __init__(self, size: int = 256):
+        self.size = size
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.strip("?.,:").encode()).hexdigest(), 16) % self.size] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def _workload(args, rng: random.Random) -> List[str]:
+    questions = [" ".join(rng.sample(VOCABULARY, 6)) + "?" for _ in range(args.unique)]
+    weights = [1.0 / (rank + 1) ** 1.1 for rank in range(args.unique)]
+    prompts = []
+    for question in rng.choices(questions, weights=weights, k=args.requests):
+        if rng.random() < args.paraphrase_rate:
+            words = question.rstrip("?").split()
+            rng.shuffle(words)
+            question = "Please tell me: " + " ".join(words).upper() + "?"
+        prompts.append(question)
+    return prompts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--unique", type=int, default=300)
+    parser.add_argument("--paraphrase-rate", type=float, default=0.3)
+    parser.add_argument("--model-latency-ms", type=float, default=10)
+    parser.add_argument("--max-entries", type=int, default=100, help="bound for lru, bounded_sqlite and semantic")
+    parser.add_argument("--threshold", type=float, default=0.9, help="semantic similarity threshold")
+    args = parser.parse_args()
+
+    prompts = _workload(args, random.Random(0))
+    model = SlowAnswerModel(latency_s=args.model_latency_ms / 1000)
+    expected = {p: "answer:" + hashlib.sha1(_canonical(p).encode()).hexdigest()[:12] for p in prompts}
+    tmp = tempfile.mkdtemp(prefix="bench_llm_cache_")
+    configs = [
+        ("none", None),
+        ("memory", {}),
+        ("lru", {"max_entries": args.max_entries}),
+        ("sqlite", {"cache_path": os.path.join(tmp, "llm_cache.db")}),
+        ("bounded_sqlite", {"cache_path": os.path.join(tmp, "bounded.db"), "max_entries": args.max_entries, "evict_interval_s": 0.5}),
+        ("semantic", {"max_entries": args.max_entries, "embeddings": BagOfWordsEmbedding(), "similarity_threshold": args.threshold}),
+    ]
+
+    print(
+        f"{args.requests} requests over {args.unique} questions, {args.paraphrase_rate:.0%} reworded, "
+        f"model {args.model_latency_ms:.0f} ms, bounded caches hold {args.max_entries}"
+    )
+    print(f"{'cache':<16}{'hit rate':>9}{'total s':>9}{'lookup p50 ms':>15}{'p95 ms':>8}{'entries':>9}{'KiB':>8}{'wrong':>7}")
+    for name, options in configs:
+        cache = setup_llm_cache(name, **options) if options is not None else None
+        if cache is None:
+            set_llm_cache(None)
+        wrong = 0
+        start = time.perf_counter()
+        for prompt in prompts:
+            wrong += model.invoke(prompt).content != expected[prompt]
+        total = time.perf_counter() - start
+        if cache is None:
+            print(f"{name:<16}{'-':>9}{total:>9.2f}{'-':>15}{'-':>8}{'-':>9}{'-':>8}{wrong:>7}")
+            continue
+        if name == "bounded_sqlite":
+            cache.evict()
+        s = cache.stats()
+        print(
+            f"{name:<16}{s['hit_rate']:>9.1%}{total:>9.2f}{s['lookup_p50_ms']:>15.3f}{s['lookup_p95_ms']:>8.3f}"
+            f"{s['entries']:>9}{s['bytes'] / 1024:>8.1f}{wrong:>7}"
+        )
+    set_llm_cache(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Retrieval latency of ProductionRAGChain with and without cached query embeddings.
+
+Builds the chain on one PDF with fake embeddings that take `--query-latency-ms`
+per query, like a remote embedding API, then times `retriever.invoke` for:
+
+- first ask: every question misses the cache and calls the model.
+- repeat: the same questions again, answered from the in-process LRU.
+- repeat, cold memory: the LRU is cleared, as after a restart, so vectors come
+  from the on-disk store.
+
+Prints p50/p95 latency per phase and the query cache's hit/miss counters.
+
+Run from the project root:
+
+    python -m benchmarks.bench_query_cache --pdf data/The_Direct_Loan_Program.pdf
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from benchmarks.bench_rag_index import SlowFakeEmbedding  # noqa: E402
+from langgraph_agent_lib import ProductionRAGChain  # noqa: E402
+
+QUESTIONS = [
+    "What is the interest rate on a Direct Subsidized Loan?",
+    "Who is eligible for a Direct PLUS Loan?",
+    "How is the loan period determined?",
+    "What are the annual loan limits for dependent undergraduates?",
+    "When does the grace period begin?",
+    "How are loan fees calculated?",
+    "What happens if a student drops below half-time enrollment?",
+    "What is the cost of attendance used for?",
+]
+
+
+class SlowQueryEmbedding(SlowFakeEmbedding):
+    """Fake embeddings whose embed_query also waits, like one remote API round trip."""
+
+    query_latency_s: float = 0.15
+
+    def embed_query(self, text):
+        time.sleep(self.query_latency_s)
+        return super().embed_query(text)
+
+
+def _phase(retriever, questions) -> list:
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        retriever.invoke(question)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", default="data/The_Direct_Loan_Program.pdf")
+    parser.add_argument("--query-latency-ms", type=float, default=150)
+    parser.add_argument("--rounds", type=int, default=5, help="times each question is repeated")
+    args = parser.parse_args()
+
+    embeddings = SlowQueryEmbedding(size=1536, batch_latency_s=0.0, query_latency_s=args.query_latency_ms / 1000)
+    chain = ProductionRAGChain(args.pdf, cache_dir=tempfile.mkdtemp(prefix="bench_query_cache_"), base_embeddings=embeddings)
+    retriever = chain.get_retriever()
+    query_cache = chain.cached_embeddings.query_embeddings
+
+    phases = [("first ask", _phase(retriever, QUESTIONS))]
+    phases.append(("repeat", _phase(retriever, QUESTIONS * args.rounds)))
+    query_cache.clear_memory()
+    phases.append(("repeat, cold memory", _phase(retriever, QUESTIONS)))
+
+    print(f"{len(QUESTIONS)} questions, embed_query latency {args.query_latency_ms:.0f} ms; retriever.invoke latency")
+    print(f"{'phase':<22}{'calls':>7}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, latencies in phases:
+        p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) > 1 else latencies[0]
+        print(f"{name:<22}{len(latencies):>7}{statistics.median(latencies) * 1000:>9.2f}{p95 * 1000:>9.2f}")
+    print(f"query cache: {chain.cached_embeddings.query_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Construction time of ProductionRAGChain: cold start vs reopening the persisted index.
+
+Builds the chain for one PDF in a fresh cache directory under four conditions:
+
+- cold: no embedding cache and no index, so the chain parses, splits, embeds
+  and indexes.
+- rebuild: `persist=False`, the old behaviour. Embeddings come from the cache,
+  but parsing, splitting and indexing repeat.
+- warm: `persist=True` again in the same process, which reopens the collection.
+- warm, new process: the same construction in a fresh interpreter, which reopens
+  the on-disk Qdrant store.
+
+By default the embeddings are langchain's `DeterministicFakeEmbedding` with a
+simulated per-batch latency, so the script runs offline. Pass `--embeddings
+openai` to use the real model (OPENAI_API_KEY required).
+
+Run from the project root:
+
+    python -m benchmarks.bench_rag_index --pdf data/The_Direct_Loan_Program.pdf
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+
+from langgraph_agent_lib import ProductionRAGChain  # noqa: E402
+
+
+class SlowFakeEmbedding(DeterministicFakeEmbedding):
+    """Deterministic vectors with a fixed delay per batch of 32 texts, like a remote embedding API."""
+
+    batch_latency_s: float = 0.3
+
+    def embed_documents(self, texts):
+        time.sleep(self.batch_latency_s * ((len(texts) + 31) // 32))
+        return super().embed_documents(texts)
+
+
+def _build(args, cache_dir: str, persist: bool = True) -> ProductionRAGChain:
+    base = None
+    if args.embeddings == "fake":
+        base = SlowFakeEmbedding(size=1536, batch_latency_s=args.batch_latency_ms / 1000)
+    return ProductionRAGChain(args.pdf, cache_dir=cache_dir, persist=persist, base_embeddings=base)
+
+
+def _child(args):
+    """Build once in this fresh process and print the timings as JSON."""
+    chain = _build(args, args.child)
+    print(json.dumps({"timings": chain.timings, "reused": chain.index_reused}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", default="data/The_Direct_Loan_Program.pdf")
+    parser.add_argument("--embeddings", choices=["fake", "openai"], default="fake")
+    parser.add_argument("--batch-latency-ms", type=float, default=300, help="fake embedding delay per 32 texts")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args)
+        return
+
+    cache_dir = tempfile.mkdtemp(prefix="bench_rag_index_")
+    rows = []
+    cold = _build(args, cache_dir)
+    rows.append(("cold", cold.timings, cold.index_reused))
+    rebuild = _build(args, cache_dir, persist=False)
+    rows.append(("rebuild (persist=False)", rebuild.timings, rebuild.index_reused))
+    warm = _build(args, cache_dir)
+    rows.append(("warm", warm.timings, warm.index_reused))
+
+    command = [sys.executable, "-m", "benchmarks.bench_rag_index", "--pdf", args.pdf,
+               "--embeddings", args.embeddings, "--batch-latency-ms", str(args.batch_latency_ms)]
+    # The parent's client holds the store's lock; a second process needs its own copy
+    child_dir = tempfile.mkdtemp(prefix="bench_rag_index_child_")
+    subprocess.run(["cp", "-r", os.path.join(cache_dir, "."), child_dir], check=True)
+    result = subprocess.run(command + ["--child", child_dir], capture_output=True, text=True, check=True)
+    child = json.loads(result.stdout.strip().splitlines()[-1])
+    rows.append(("warm, new process", child["timings"], child["reused"]))
+
+    question = "What is the interest rate on a Direct Subsidized Loan?"
+    same = [d.page_content for d in cold.get_retriever().invoke(question)] == [
+        d.page_content for d in warm.get_retriever().invoke(question)
+    ]
+
+    print(f"{args.pdf}: {args.embeddings} embeddings; chain construction times (s)")
+    stages = ("total_s", "fingerprint_s", "open_s", "load_s", "split_s", "embed_s", "index_s")
+    print(f"{'start':<26}" + "".join(f"{stage[:-2]:>13}" for stage in stages) + f"{'reused':>8}")
+    for name, t, reused in rows:
+        cells = "".join(f"{t.get(k, 0.0):>13.3f}" for k in stages)
+        print(f"{name:<26}{cells}{'yes' if reused else 'no':>8}")
+    print(f"cold and warm chains retrieve the same passages: {same}")
+
+
+if __name__ == "__main__":
+    main()
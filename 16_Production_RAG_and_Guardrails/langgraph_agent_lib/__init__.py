@@ -4,16 +4,27 @@ A library for LangGraph agents with caching, monitoring, and agent integration.
 """
 
 from .agents import create_langgraph_agent
-from .caching import CacheBackedEmbeddings, setup_llm_cache
+from .caching import CacheBackedEmbeddings, TieredQueryEmbeddings, setup_llm_cache
+from .llm_cache import BoundedSQLiteLLMCache, LRULLMCache, SemanticLLMCache
 from .rag import ProductionRAGChain
+from .stores import SQLiteByteStore, migrate_local_file_store
 from .models import get_openai_model
+from .tool_node import ParallelToolNode, ToolResultCache
 
 __version__ = "0.1.0"
 __all__ = [
     "create_langgraph_agent",
     "CacheBackedEmbeddings",
+    "TieredQueryEmbeddings",
     "setup_llm_cache",
+    "LRULLMCache",
+    "BoundedSQLiteLLMCache",
+    "SemanticLLMCache",
     "ProductionRAGChain",
+    "SQLiteByteStore",
+    "migrate_local_file_store",
     "get_openai_model",
+    "ParallelToolNode",
+    "ToolResultCache",
 ]
 
@@ -4,7 +4,6 @@ from typing import Dict, Any, List, Optional
 import os
 
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 from langchain_core.messages import BaseMessage, AIMessage
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
@@ -16,6 +15,7 @@ from langgraph.graph.message import add_messages
 
 from .models import get_openai_model
 from .rag import ProductionRAGChain
+from .tool_node import ParallelToolNode
 
 
 class AgentState(TypedDict):
@@ -67,15 +67,25 @@ def create_langgraph_agent(
     model_name: str = "gpt-4",
     temperature: float = 0.1,
     tools: Optional[List] = None,
-    rag_chain: Optional[ProductionRAGChain] = None
+    rag_chain: Optional[ProductionRAGChain] = None,
+    tool_timeouts: Optional[Dict[str, float]] = None,
+    default_tool_timeout: float = 30.0,
+    tool_cache_ttl: float = 600.0,
 ):
     """Create a simple LangGraph agent.
     
+    Tool calls emitted together run concurrently, each under its own deadline,
+    and successful results are cached by (tool, normalized args) for
+    `tool_cache_ttl` seconds.
+    
     Args:
         model_name: OpenAI model name
         temperature: Model temperature
         tools: List of tools to bind to the model
         rag_chain: Optional RAG chain to include as a tool
+        tool_timeouts: Optional per-tool deadlines in seconds, keyed by tool name
+        default_tool_timeout: Deadline for tools without an explicit timeout
+        tool_cache_ttl: Seconds to reuse a tool result; 0 disables caching
         
     Returns:
         Compiled LangGraph agent
@@ -102,10 +112,15 @@ def create_langgraph_agent(
     
     # Build graph
     graph = StateGraph(AgentState)
-    tool_node = ToolNode(tools)
+    tool_node = ParallelToolNode(
+        tools,
+        timeouts=tool_timeouts,
+        default_timeout_s=default_tool_timeout,
+        cache_ttl_s=tool_cache_ttl,
+    )
     
     graph.add_node("agent", call_model)
-    graph.add_node("action", tool_node)
+    graph.add_node("action", tool_node.as_runnable("action"))
     graph.set_entry_point("agent")
     graph.add_conditional_edges("agent", should_continue, {"action": "action", END: END})
     graph.add_edge("action", "agent")
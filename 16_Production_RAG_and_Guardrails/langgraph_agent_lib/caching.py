@@ -1,16 +1,175 @@
 """Production caching utilities for embeddings and LLM calls."""
 
 import hashlib
+import json
+import logging
 import os
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 from langchain.embeddings import CacheBackedEmbeddings as LangChainCacheBackedEmbeddings
 from langchain.storage import LocalFileStore
-from langchain_core.caches import InMemoryCache
-from langchain_community.cache import SQLiteCache
-from langchain_core.globals import set_llm_cache
+from langchain_core.embeddings import Embeddings
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.stores import ByteStore
 from langchain_openai.embeddings import OpenAIEmbeddings
 
+from .llm_cache import (
+    BoundedSQLiteLLMCache,
+    InstrumentedLLMCache,
+    InstrumentedSQLiteCache,
+    LRULLMCache,
+    SemanticLLMCache,
+)
+from .stores import SQLiteByteStore, migrate_local_file_store
+
+logger = logging.getLogger(__name__)
+
+SQLITE_STORE_FILENAME = "embeddings.sqlite"
+
+
+class TieredQueryEmbeddings(Embeddings):
+    """Embeddings whose query vectors are cached in an in-process LRU in front of a byte store.
+
+    `embed_query` looks in the memory tier, then the persistent store, and only
+    then calls the underlying embeddings; a store hit is promoted to memory.
+    Entries older than `ttl_s` count as misses in both tiers. Document
+    embeddings pass straight through to `embeddings`.
+    """
+    
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        store: Optional[ByteStore],
+        namespace: str,
+        max_entries: int = 1024,
+        ttl_s: Optional[float] = None
+    ):
+        """Initialize the query cache.
+        
+        Args:
+            embeddings: Embeddings for documents and for query cache misses
+            store: Persistent tier, or None for memory only
+            namespace: Key prefix in the store; keep it to [a-zA-Z0-9_.-] for LocalFileStore
+            max_entries: Capacity of the memory tier (0 disables it)
+            ttl_s: Seconds a cached query vector stays valid (None: no expiry)
+        """
+        self.embeddings = embeddings
+        self.store = store
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._memory: OrderedDict[str, Tuple[float, List[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"memory_hits": 0, "store_hits": 0, "misses": 0, "expired": 0}
+    
+    def _key(self, text: str) -> str:
+        return f"{self.namespace}{hashlib.sha256(text.encode()).hexdigest()}"
+    
+    def _fresh(self, created: float) -> bool:
+        return self.ttl_s is None or time.time() - created <= self.ttl_s
+    
+    def _count_miss(self, expired: bool) -> None:
+        with self._lock:
+            self._counts["misses"] += 1
+            if expired:
+                self._counts["expired"] += 1
+    
+    def _remember(self, key: str, created: float, vector: List[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (created, vector)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+    
+    def _from_memory(self, key: str) -> Tuple[Optional[List[float]], bool]:
+        """Return (vector or None, whether a stale entry was dropped)."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None, False
+            if not self._fresh(entry[0]):
+                del self._memory[key]
+                return None, True
+            self._memory.move_to_end(key)
+            self._counts["memory_hits"] += 1
+            return list(entry[1]), False
+    
+    def _from_stored(self, key: str, raw: Optional[bytes]) -> Tuple[Optional[List[float]], bool]:
+        """Return (vector or None, whether the stored entry was stale) for a store value."""
+        if raw is None:
+            return None, False
+        entry = json.loads(raw)
+        if not self._fresh(entry["created"]):
+            return None, True
+        with self._lock:
+            self._counts["store_hits"] += 1
+        self._remember(key, entry["created"], entry["vector"])
+        return list(entry["vector"]), False
+    
+    def _stored_value(self, key: str, vector: List[float]) -> Optional[Tuple[str, bytes]]:
+        created = time.time()
+        self._remember(key, created, vector)
+        if self.store is None:
+            return None
+        return key, json.dumps({"created": created, "vector": vector}).encode()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, from the memory tier, the store, or the underlying embeddings."""
+        key = self._key(text)
+        vector, expired = self._from_memory(key)
+        if vector is None and self.store is not None:
+            vector, stale = self._from_stored(key, self.store.mget([key])[0])
+            expired = expired or stale
+        if vector is not None:
+            return vector
+        self._count_miss(expired)
+        vector = self.embeddings.embed_query(text)
+        item = self._stored_value(key, vector)
+        if item is not None:
+            self.store.mset([item])
+        return vector
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async embed_query; store reads and writes run through the store's async API."""
+        key = self._key(text)
+        vector, expired = self._from_memory(key)
+        if vector is None and self.store is not None:
+            vector, stale = self._from_stored(key, (await self.store.amget([key]))[0])
+            expired = expired or stale
+        if vector is not None:
+            return vector
+        self._count_miss(expired)
+        vector = await self.embeddings.aembed_query(text)
+        item = self._stored_value(key, vector)
+        if item is not None:
+            await self.store.amset([item])
+        return vector
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+    
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters, hit rate and the memory tier's size; `expired` misses found a stale entry."""
+        with self._lock:
+            counts = dict(self._counts)
+            size = len(self._memory)
+        hits = counts["memory_hits"] + counts["store_hits"]
+        lookups = hits + counts["misses"]
+        return {**counts, "hit_rate": hits / lookups if lookups else 0.0, "memory_entries": size}
+    
+    def clear_memory(self) -> None:
+        """Drop the memory tier; the persistent store is untouched."""
+        with self._lock:
+            self._memory.clear()
+
 
 class CacheBackedEmbeddings:
     """Production cache-backed embeddings using OpenAI."""
@@ -19,7 +178,13 @@ class CacheBackedEmbeddings:
         self, 
         model: str = "text-embedding-3-small",
         cache_dir: str = "./cache/embeddings",
-        batch_size: int = 32
+        batch_size: int = 32,
+        base_embeddings=None,
+        store_type: str = "sqlite",
+        query_cache: bool = True,
+        query_cache_size: int = 1024,
+        query_cache_ttl_s: Optional[float] = None,
+        query_namespace: Optional[str] = None
     ):
         """Initialize cache-backed embeddings.
         
@@ -27,44 +192,137 @@ class CacheBackedEmbeddings:
             model: OpenAI embedding model name
             cache_dir: Directory to store embedding cache
             batch_size: Batch size for embedding calls
+            base_embeddings: Embeddings to cache instead of OpenAIEmbeddings(model);
+                `model` still names the cache namespace
+            store_type: "sqlite" for one packed file ({cache_dir}/embeddings.sqlite),
+                or "file" for LocalFileStore's one file per embedding
+            query_cache: Cache query embeddings too (memory LRU in front of the store)
+            query_cache_size: Query vectors kept in memory
+            query_cache_ttl_s: Seconds a cached query vector stays valid (None: no expiry)
+            query_namespace: Store key prefix for query vectors (default: derived from model)
         """
         self.model = model
         self.cache_dir = cache_dir
         self.batch_size = batch_size
+        self.store_type = store_type
         
         # Create base embeddings
-        self.base_embeddings = OpenAIEmbeddings(model=model)
+        self.base_embeddings = base_embeddings or OpenAIEmbeddings(model=model)
         
         # Create safe namespace from model name
         safe_namespace = hashlib.md5(model.encode()).hexdigest()
         
-        # Set up file store and cached embeddings
-        store = LocalFileStore(cache_dir)
+        # Set up the byte store and cached embeddings
+        if store_type == "sqlite":
+            query_prefix = query_namespace if query_cache and query_namespace else None
+            store = self._open_sqlite_store(cache_dir, [safe_namespace, query_prefix])
+        elif store_type == "file":
+            store = LocalFileStore(cache_dir)
+        else:
+            raise ValueError(f"Unsupported store type: {store_type}")
+        self.store = store
         self.cached_embeddings = LangChainCacheBackedEmbeddings.from_bytes_store(
             self.base_embeddings, 
             store, 
             namespace=safe_namespace,
             batch_size=batch_size
         )
+        
+        # Query vectors get their own namespace, so their entries never collide with documents'
+        self.query_embeddings = None
+        if query_cache:
+            self.query_embeddings = TieredQueryEmbeddings(
+                self.cached_embeddings,
+                store,
+                namespace=query_namespace or f"{safe_namespace}-query-",
+                max_entries=query_cache_size,
+                ttl_s=query_cache_ttl_s
+            )
+    
+    @staticmethod
+    def _open_sqlite_store(cache_dir: str, namespaces: List[Optional[str]]) -> SQLiteByteStore:
+        """Open the packed store, importing each namespace's LocalFileStore entries left in cache_dir once.
+        
+        Completion is recorded per namespace in the store's meta table, so an
+        interrupted import is retried on the next start; only files named with
+        the namespace's key prefix are read, never unrelated files in cache_dir.
+        """
+        db_path = os.path.join(cache_dir, SQLITE_STORE_FILENAME)
+        store = SQLiteByteStore(db_path)
+        own_files = [db_path, f"{db_path}-wal", f"{db_path}-shm"]
+        for namespace in dict.fromkeys(n for n in namespaces if n):
+            marker = f"migrated_from_file_store:{namespace}"
+            if store.get_meta(marker) is not None:
+                continue
+            migrated = migrate_local_file_store(cache_dir, store, skip=own_files, prefix=namespace)
+            store.set_meta(marker, str(time.time()))
+            if migrated:
+                logger.info("Imported %d cached embeddings from the file store in %s", migrated, cache_dir)
+        return store
     
     def get_embeddings(self):
         """Get the cached embeddings instance."""
-        return self.cached_embeddings
+        return self.query_embeddings or self.cached_embeddings
+    
+    def query_cache_stats(self) -> Dict[str, float]:
+        """Hit/miss counters of the query cache (empty when it is disabled)."""
+        return self.query_embeddings.stats() if self.query_embeddings else {}
 
 
-def setup_llm_cache(cache_type: str = "memory", cache_path: Optional[str] = None):
+def setup_llm_cache(
+    cache_type: str = "memory",
+    cache_path: Optional[str] = None,
+    max_entries: int = 1000,
+    max_bytes: Optional[int] = None,
+    ttl_s: Optional[float] = None,
+    evict_interval_s: float = 30.0,
+    embeddings: Optional[Embeddings] = None,
+    similarity_threshold: float = 0.95
+) -> InstrumentedLLMCache:
     """Set up LLM caching.
     
     Args:
-        cache_type: Type of cache - "memory" or "sqlite"
+        cache_type: Type of cache - "memory" (unbounded), "lru" (bounded memory),
+            "sqlite" (unbounded file), "bounded_sqlite" (file capped at max_entries rows)
+            or "semantic" (matches similar prompts by embedding)
         cache_path: Path for SQLite cache file
+        max_entries: Maximum cached responses for "lru", "bounded_sqlite" and "semantic"
+        max_bytes: Maximum bytes held by "lru" (None: unbounded)
+        ttl_s: Seconds a response stays valid for "lru", "bounded_sqlite" and "semantic"
+        evict_interval_s: Seconds between "bounded_sqlite" eviction passes
+        embeddings: Embeddings for "semantic" (default: OpenAIEmbeddings)
+        similarity_threshold: Minimum cosine similarity for a "semantic" match
+    
+    Returns:
+        The installed cache; its stats() reports hit rate, bytes held and lookup latency
     """
     if cache_type == "memory":
-        set_llm_cache(InMemoryCache())
+        cache = LRULLMCache(max_entries=None)
+    elif cache_type == "lru":
+        cache = LRULLMCache(max_entries=max_entries, max_bytes=max_bytes, ttl_s=ttl_s)
     elif cache_type == "sqlite":
         db_path = cache_path or "./cache/llm_cache.db"
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        set_llm_cache(SQLiteCache(database_path=db_path))
+        cache = InstrumentedSQLiteCache(database_path=db_path)
+    elif cache_type == "bounded_sqlite":
+        cache = BoundedSQLiteLLMCache(
+            database_path=cache_path or "./cache/llm_cache_bounded.db",
+            max_rows=max_entries,
+            ttl_s=ttl_s,
+            evict_interval_s=evict_interval_s
+        )
+    elif cache_type == "semantic":
+        cache = SemanticLLMCache(
+            embeddings or OpenAIEmbeddings(model="text-embedding-3-small"),
+            similarity_threshold=similarity_threshold,
+            max_entries=max_entries,
+            ttl_s=ttl_s
+        )
     else:
         raise ValueError(f"Unsupported cache type: {cache_type}")
-
+    # Stop the eviction thread and close the connections of a cache set up earlier
+    previous = get_llm_cache()
+    if isinstance(previous, InstrumentedLLMCache) and previous is not cache:
+        previous.close()
+    set_llm_cache(cache)
+    return cache
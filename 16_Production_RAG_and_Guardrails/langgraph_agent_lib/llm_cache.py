@@ -0,0 +1,511 @@
+"""Bounded, instrumented LLM caches for `setup_llm_cache`.
+
+Every cache here records hits, misses and lookup latency, and reports the
+bytes it holds, through `stats()`:
+- `LRULLMCache`: in-memory, bounded by entry count and bytes, with an optional TTL.
+- `BoundedSQLiteLLMCache`: one SQLite file with a max row count; a background
+  thread evicts least recently used and expired rows.
+- `SemanticLLMCache`: in-memory LRU; a prompt whose embedding is close enough
+  to a cached prompt's (cosine similarity >= threshold) reuses its response.
+- `InstrumentedSQLiteCache`: the stock `SQLiteCache` with the same statistics.
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import numpy as np
+from langchain_community.cache import SQLiteCache
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.embeddings import Embeddings
+from langchain_core.load import dumps, loads
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def _serialize(return_val: RETURN_VAL_TYPE) -> str:
+    return json.dumps([dumps(generation) for generation in return_val])
+
+
+def _deserialize(payload: str) -> RETURN_VAL_TYPE:
+    return [loads(item) for item in json.loads(payload)]
+
+
+class InstrumentedLLMCache(BaseCache, ABC):
+    """Base class that counts hits and misses and times every lookup.
+
+    Subclasses implement `_lookup`, `_update`, `_clear`, `bytes_held` and `__len__`,
+    and override `close` if they hold resources.
+    """
+
+    def __init__(self, latency_window: int = 1000):
+        """Initialize the counters.
+
+        Args:
+            latency_window: Number of recent lookups kept for latency percentiles
+        """
+        self._stats_lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "updates": 0, "evictions": 0}
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+
+    @abstractmethod
+    def _lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return the cached response or None; timing and counting are done by `lookup`."""
+
+    @abstractmethod
+    def _update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store a response."""
+
+    @abstractmethod
+    def _clear(self) -> None:
+        """Drop every cached response."""
+
+    @abstractmethod
+    def bytes_held(self) -> int:
+        """Approximate bytes of cached prompts and responses."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of cached responses."""
+
+    def close(self) -> None:
+        """Release threads and connections; the cache must not be used afterwards."""
+
+    def __bool__(self) -> bool:
+        # langchain tests the global cache for truth; an empty cache must still count as set
+        return True
+
+    def _count_evictions(self, count: int) -> None:
+        if count:
+            with self._stats_lock:
+                self._counts["evictions"] += count
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        start = time.perf_counter()
+        result = self._lookup(prompt, llm_string)
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._counts["hits" if result is not None else "misses"] += 1
+            self._latencies.append(elapsed)
+        return result
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self._update(prompt, llm_string, return_val)
+        with self._stats_lock:
+            self._counts["updates"] += 1
+
+    def clear(self, **kwargs: Any) -> None:
+        self._clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit rate, counters, entries, bytes held and lookup latency percentiles (ms)."""
+        with self._stats_lock:
+            counts = dict(self._counts)
+            latencies = sorted(self._latencies)
+        lookups = counts["hits"] + counts["misses"]
+
+        def percentile(q: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+        return {
+            **counts,
+            "hit_rate": counts["hits"] / lookups if lookups else 0.0,
+            "entries": len(self),
+            "bytes": self.bytes_held(),
+            "lookup_p50_ms": percentile(0.50),
+            "lookup_p95_ms": percentile(0.95),
+        }
+
+
+class LRULLMCache(InstrumentedLLMCache):
+    """In-memory LLM cache bounded by entries and bytes, with an optional TTL."""
+
+    def __init__(self, max_entries: Optional[int] = 1000, max_bytes: Optional[int] = None, ttl_s: Optional[float] = None):
+        """Initialize the LRU cache.
+
+        Args:
+            max_entries: Maximum cached responses (None: unbounded)
+            max_bytes: Maximum bytes of prompts and serialized responses (None: unbounded)
+            ttl_s: Seconds a response stays valid (None: no expiry)
+        """
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[Tuple[str, str], Tuple[float, int, RETURN_VAL_TYPE]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = (prompt, llm_string)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl_s is not None and time.monotonic() - entry[0] > self.ttl_s:
+                del self._entries[key]
+                self._bytes -= entry[1]
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def _update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = (prompt, llm_string)
+        size = len(prompt) + len(llm_string) + len(_serialize(return_val))
+        evicted = 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (time.monotonic(), size, return_val)
+            self._bytes += size
+            while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, (_, dropped, _) = self._entries.popitem(last=False)
+                self._bytes -= dropped
+                evicted += 1
+        self._count_evictions(evicted)
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def bytes_held(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BoundedSQLiteLLMCache(InstrumentedLLMCache):
+    """SQLite LLM cache capped at `max_rows`, evicted by a background thread."""
+
+    def __init__(
+        self,
+        database_path: str = "./cache/llm_cache_bounded.db",
+        max_rows: int = 10000,
+        ttl_s: Optional[float] = None,
+        evict_interval_s: float = 30.0
+    ):
+        """Initialize the SQLite cache and start the eviction thread.
+
+        Args:
+            database_path: Path of the SQLite file
+            max_rows: Rows kept after each eviction pass; least recently used go first
+            ttl_s: Seconds a response stays valid (None: no expiry)
+            evict_interval_s: Seconds between eviction passes
+        """
+        super().__init__()
+        self.database_path = database_path
+        self.max_rows = max_rows
+        self.ttl_s = ttl_s
+        self.evict_interval_s = evict_interval_s
+        os.makedirs(os.path.dirname(os.path.abspath(database_path)), exist_ok=True)
+        self._conn = sqlite3.connect(database_path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+        self._stop = threading.Event()
+        self._evictor = threading.Thread(target=self._evict_loop, name="llm-cache-evictor", daemon=True)
+        self._evictor.start()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def _lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl_s is not None and now - row[1] > self.ttl_s:
+                # Left for the eviction pass to delete
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+        return _deserialize(row[0])
+
+    def _update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        response = _serialize(return_val)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (self._key(prompt, llm_string), response, len(prompt) + len(llm_string) + len(response), now, now),
+            )
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def evict(self) -> int:
+        """Delete expired rows, then the least recently used beyond max_rows.
+
+        Returns:
+            Number of rows deleted
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                deleted = 0
+                if self.ttl_s is not None:
+                    deleted += self._conn.execute(
+                        "DELETE FROM llm_cache WHERE created < ?", (time.time() - self.ttl_s,)
+                    ).rowcount
+                deleted += self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,),
+                ).rowcount
+        self._count_evictions(deleted)
+        return deleted
+
+    def _evict_loop(self) -> None:
+        while not self._stop.wait(self.evict_interval_s):
+            try:
+                self.evict()
+            except Exception:
+                logger.exception("LLM cache eviction failed for %s", self.database_path)
+
+    def bytes_held(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def close(self) -> None:
+        """Stop the eviction thread and close the connection."""
+        self._stop.set()
+        self._evictor.join()
+        with self._lock:
+            self._conn.close()
+
+
+class SemanticLLMCache(InstrumentedLLMCache):
+    """In-memory LLM cache that also matches prompts by embedding similarity."""
+
+    def __init__(self, embeddings: Embeddings, similarity_threshold: float = 0.95, max_entries: int = 1000, ttl_s: Optional[float] = None):
+        """Initialize the semantic cache.
+
+        Args:
+            embeddings: Embeddings for prompts; a cached one (e.g. CacheBackedEmbeddings)
+                keeps repeated lookups cheap
+            similarity_threshold: Minimum cosine similarity for a cached prompt to match
+            max_entries: Maximum cached responses per LLM configuration
+            ttl_s: Seconds a response stays valid (None: no expiry)
+        """
+        super().__init__()
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        # Per llm_string, a `_SemanticTable` of prompts, unit vectors and responses
+        self._tables: Dict[str, _SemanticTable] = {}
+        # Vectors embedded by a missed lookup, taken by the update that follows it
+        self._pending: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._ticks = itertools.count()
+        self._lock = threading.Lock()
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(prompt), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            table = self._tables.get(llm_string)
+            if table is None:
+                return None
+            exact = prompt in table.slots
+        # Exact repeats skip the embedding call; the model call runs outside the lock
+        vector = None if exact else self._embed(prompt)
+        now = time.monotonic()
+        with self._lock:
+            table = self._tables.get(llm_string)
+            if table is None or not table.slots:
+                return None
+            if vector is None:
+                slot = table.slots.get(prompt)
+                if slot is None:
+                    return None
+            else:
+                slot, similarity = table.nearest(vector)
+                if similarity < self.similarity_threshold:
+                    self._remember_vector(prompt, vector)
+                    return None
+            if self.ttl_s is not None and now - table.created[slot] > self.ttl_s:
+                table.free(slot)
+                if vector is not None:
+                    self._remember_vector(prompt, vector)
+                return None
+            table.accessed[slot] = next(self._ticks)
+            return table.responses[slot]
+
+    def _remember_vector(self, prompt: str, vector: np.ndarray) -> None:
+        """Keep a missed prompt's vector for its update; called with the lock held."""
+        self._pending[prompt] = vector
+        while len(self._pending) > 256:
+            self._pending.popitem(last=False)
+
+    def _update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        with self._lock:
+            vector = self._pending.pop(prompt, None)
+        if vector is None:
+            vector = self._embed(prompt)
+        size = len(prompt) + len(llm_string) + len(_serialize(return_val)) + vector.nbytes
+        with self._lock:
+            table = self._tables.get(llm_string)
+            if table is None:
+                table = self._tables[llm_string] = _SemanticTable(vector.shape[0], self.max_entries)
+            evicted = table.put(prompt, vector, return_val, size, time.monotonic(), next(self._ticks))
+        self._count_evictions(evicted)
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+            self._pending.clear()
+
+    def bytes_held(self) -> int:
+        with self._lock:
+            return sum(int(table.sizes.sum()) for table in self._tables.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(table.slots) for table in self._tables.values())
+
+
+class _SemanticTable:
+    """Cached prompts of one LLM configuration, stored in fixed slots.
+
+    Vectors live in one preallocated matrix whose rows are overwritten in place:
+    an insert fills a free slot or the least recently used one, and dropping an
+    entry only marks its slot free. The matrix doubles in capacity up to
+    `max_entries`, so no insert or eviction copies it otherwise. Not thread-safe;
+    `SemanticLLMCache` holds its lock around every call.
+    """
+
+    def __init__(self, dim: int, max_entries: int, initial_capacity: int = 64):
+        self.max_entries = max_entries
+        capacity = min(max_entries, initial_capacity)
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.used = np.zeros(capacity, dtype=bool)
+        self.created = np.zeros(capacity)
+        self.accessed = np.zeros(capacity, dtype=np.int64)
+        self.sizes = np.zeros(capacity, dtype=np.int64)
+        self.prompts: list = [None] * capacity
+        self.responses: list = [None] * capacity
+        self.slots: Dict[str, int] = {}
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def nearest(self, vector: np.ndarray) -> Tuple[int, float]:
+        """Slot of the most similar cached prompt and its cosine similarity."""
+        similarities = self.vectors @ vector
+        similarities[~self.used] = -np.inf
+        slot = int(np.argmax(similarities))
+        return slot, float(similarities[slot])
+
+    def free(self, slot: int) -> None:
+        del self.slots[self.prompts[slot]]
+        self.used[slot] = False
+        self.sizes[slot] = 0
+        self.prompts[slot] = self.responses[slot] = None
+        self._free.append(slot)
+
+    def _grow(self) -> None:
+        old = len(self.used)
+        new = min(self.max_entries, old * 2)
+        self.vectors = np.vstack([self.vectors, np.zeros((new - old, self.vectors.shape[1]), dtype=np.float32)])
+        self.used = np.concatenate([self.used, np.zeros(new - old, dtype=bool)])
+        self.created = np.concatenate([self.created, np.zeros(new - old)])
+        self.accessed = np.concatenate([self.accessed, np.zeros(new - old, dtype=np.int64)])
+        self.sizes = np.concatenate([self.sizes, np.zeros(new - old, dtype=np.int64)])
+        self.prompts.extend([None] * (new - old))
+        self.responses.extend([None] * (new - old))
+        self._free.extend(range(new - 1, old - 1, -1))
+
+    def put(self, prompt: str, vector: np.ndarray, response: Any, size: int, created: float, tick: int) -> int:
+        """Store a response, replacing the prompt's old entry; return entries evicted."""
+        evicted = 0
+        slot = self.slots.get(prompt)
+        if slot is None:
+            if not self._free and len(self.used) < self.max_entries:
+                self._grow()
+            if self._free:
+                slot = self._free.pop()
+            else:
+                # Least recently used slot, overwritten in place
+                slot = int(np.argmin(np.where(self.used, self.accessed, np.iinfo(np.int64).max)))
+                del self.slots[self.prompts[slot]]
+                evicted = 1
+            self.slots[prompt] = slot
+        self.vectors[slot] = vector
+        self.used[slot] = True
+        self.created[slot] = created
+        self.accessed[slot] = tick
+        self.sizes[slot] = size
+        self.prompts[slot] = prompt
+        self.responses[slot] = response
+        return evicted
+
+
+class InstrumentedSQLiteCache(InstrumentedLLMCache):
+    """langchain's unbounded `SQLiteCache` with hit, latency and size statistics."""
+
+    def __init__(self, database_path: str = "./cache/llm_cache.db"):
+        """Initialize the SQLite cache.
+
+        Args:
+            database_path: Path of the SQLite file
+        """
+        super().__init__()
+        self.database_path = database_path
+        self._cache = SQLiteCache(database_path=database_path)
+
+    def _lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self._cache.lookup(prompt, llm_string)
+
+    def _update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self._cache.update(prompt, llm_string, return_val)
+
+    def _clear(self) -> None:
+        self._cache.clear()
+
+    def bytes_held(self) -> int:
+        """Size of the database file."""
+        return sum(
+            os.path.getsize(path)
+            for path in (self.database_path, f"{self.database_path}-wal")
+            if os.path.exists(path)
+        )
+
+    def __len__(self) -> int:
+        # Through the cache's own engine: a bare sqlite3 connection per call would leak
+        with self._cache.engine.connect() as conn:
+            return conn.execute(text("SELECT COUNT(DISTINCT prompt || llm) FROM full_llm_cache")).scalar()
+
+    def close(self) -> None:
+        """Dispose of the SQLAlchemy engine's connections."""
+        self._cache.engine.dispose()
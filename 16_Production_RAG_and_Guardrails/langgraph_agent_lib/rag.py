@@ -1,6 +1,19 @@
-"""Production RAG chain implementation with caching."""
+"""Production RAG chain implementation with caching.
 
-from typing import List, Optional
+The chunked, embedded collection is persisted in a local on-disk Qdrant store
+(`QdrantClient(path=...)`). Its name is derived from a fingerprint of the PDF
+contents, the chunking settings and the embedding model, so a later
+construction with the same inputs reopens it instead of re-parsing, re-splitting
+and re-indexing the document. Any change to those inputs gets a new collection.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
 import uuid
 
 from langchain_community.document_loaders import PyMuPDFLoader
@@ -10,11 +23,71 @@ from langchain_core.runnables.passthrough import RunnablePassthrough
 from langchain_qdrant import QdrantVectorStore
 from operator import itemgetter
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
 
 from .caching import CacheBackedEmbeddings
 from .models import get_openai_model
 
+logger = logging.getLogger(__name__)
+
+# Bump when the chunk payload or metadata layout changes, so old collections are not reused
+INDEX_FORMAT_VERSION = 1
+
+_qdrant_clients: Dict[str, QdrantClient] = {}
+_qdrant_clients_lock = threading.Lock()
+# (index directory, collection name) of persisted collections chains in this process serve
+_open_collections: Set[Tuple[str, str]] = set()
+
+
+def get_qdrant_client(path: str) -> QdrantClient:
+    """Get the process-wide local Qdrant client for an index directory.
+
+    Local Qdrant storage allows one client per directory, so chains that share
+    an index directory also share its client. Only one process at a time can
+    open a directory: another process gets a RuntimeError from QdrantClient.
+
+    Args:
+        path: Directory of the on-disk Qdrant store
+
+    Returns:
+        The cached QdrantClient for that directory
+    """
+    path = os.path.abspath(path)
+    with _qdrant_clients_lock:
+        client = _qdrant_clients.get(path)
+        if client is None:
+            os.makedirs(path, exist_ok=True)
+            client = QdrantClient(path=path)
+            _qdrant_clients[path] = client
+        return client
+
+
+def index_fingerprint(file_path: str, chunk_size: int, chunk_overlap: int, embedding_model: str) -> str:
+    """Fingerprint of everything that determines a document's indexed chunks and vectors.
+
+    Args:
+        file_path: Path to the source document
+        chunk_size: Size of text chunks
+        chunk_overlap: Overlap between chunks
+        embedding_model: Embedding model name
+
+    Returns:
+        Hex SHA-256 digest of the file contents and settings
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    settings = {
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "embedding_model": embedding_model,
+        "format": INDEX_FORMAT_VERSION,
+    }
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
 class ProductionRAGChain:
     """Production-ready RAG chain with caching and optimizations."""
     
@@ -26,7 +99,10 @@ class ProductionRAGChain:
         embedding_model: str = "text-embedding-3-small",
         llm_model: str = "gpt-4.1-nano",
         cache_dir: str = "./cache",
-        collection_name: Optional[str] = None
+        collection_name: Optional[str] = None,
+        persist: bool = True,
+        index_dir: Optional[str] = None,
+        base_embeddings=None
     ):
         """Initialize the production RAG chain.
         
@@ -37,21 +113,49 @@ class ProductionRAGChain:
             embedding_model: OpenAI embedding model
             llm_model: OpenAI LLM model
             cache_dir: Directory for caching
-            collection_name: Name for the vector collection
+            collection_name: Name for the vector collection; with persist, a prefix
+                for the fingerprinted name
+            persist: Keep the indexed collection on disk and reuse it on later
+                constructions with the same file and settings. A local Qdrant store
+                can be opened by one process at a time; while another process holds
+                index_dir, this chain logs a warning and builds in memory instead
+            index_dir: Directory of the on-disk Qdrant store (default: {cache_dir}/vector_index)
+            base_embeddings: Embeddings to wrap with the cache instead of OpenAIEmbeddings
         """
+        start = time.perf_counter()
         self.file_path = file_path
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.embedding_model = embedding_model
         self.llm_model = llm_model
         self.cache_dir = cache_dir
-        self.collection_name = collection_name or f"pdf_collection_{uuid.uuid4().hex[:8]}"
+        self.persist = persist
+        self.index_dir = index_dir or f"{cache_dir}/vector_index"
+        self.base_embeddings = base_embeddings
+        self.timings: Dict[str, float] = {}
+        self.index_reused = False
+        if persist:
+            self.fingerprint = index_fingerprint(file_path, chunk_size, chunk_overlap, embedding_model)
+            self.collection_name = f"{collection_name or 'pdf_collection'}_{self.fingerprint[:16]}"
+            self.timings["fingerprint_s"] = time.perf_counter() - start
+        else:
+            self.fingerprint = None
+            self.collection_name = collection_name or f"pdf_collection_{uuid.uuid4().hex[:8]}"
         
         # Initialize components
         self._setup_text_splitter()
         self._setup_embeddings()
         self._setup_vectorstore()
         self._setup_chain()
+        self.timings["total_s"] = time.perf_counter() - start
+        logger.info(
+            "RAG chain for %s ready in %.2fs (%s index %s): %s",
+            file_path,
+            self.timings["total_s"],
+            "reused" if self.index_reused else "built",
+            self.collection_name,
+            {k: round(v, 3) for k, v in self.timings.items()},
+        )
     
     def _setup_text_splitter(self):
         """Set up the text splitter."""
@@ -64,26 +168,40 @@ class ProductionRAGChain:
         """Set up cache-backed embeddings."""
         self.cached_embeddings = CacheBackedEmbeddings(
             model=self.embedding_model,
-            cache_dir=f"{self.cache_dir}/embeddings"
+            cache_dir=f"{self.cache_dir}/embeddings",
+            base_embeddings=self.base_embeddings
         )
     
+    def _marker_path(self) -> str:
+        """Path of the file recording that the collection was fully built."""
+        return os.path.join(self.index_dir, f"{self.collection_name}.json")
+    
     def _setup_vectorstore(self):
-        """Set up the vector store and load documents."""
-        # Load and chunk documents
-        loader = PyMuPDFLoader(self.file_path)
-        documents = loader.load()
-        docs = self.text_splitter.split_documents(documents)
+        """Set up the vector store, reusing a persisted collection when one matches."""
+        client = None
+        if self.persist:
+            start = time.perf_counter()
+            try:
+                client = get_qdrant_client(self.index_dir)
+            except RuntimeError as e:
+                # Another process (a notebook, a second worker) holds the local store
+                logger.warning("Cannot open index at %s (%s); building in memory instead", self.index_dir, e)
+                self.persist = False
+            else:
+                # The marker is written last, so a build interrupted midway is never reused
+                if os.path.exists(self._marker_path()) and client.collection_exists(self.collection_name):
+                    self.index_reused = True
+                elif client.collection_exists(self.collection_name):
+                    client.delete_collection(self.collection_name)
+                with _qdrant_clients_lock:
+                    _open_collections.add((os.path.abspath(self.index_dir), self.collection_name))
+                self._prune_stale_collections(client)
+            self.timings["open_s"] = time.perf_counter() - start
+        if client is None:
+            client = QdrantClient(":memory:")
         
-        # Add metadata
-        for i, doc in enumerate(docs):
-            doc.metadata["source"] = f"source_{i}"
-        
-        # Set up in-memory Qdrant
-        client = QdrantClient(":memory:")
-        client.create_collection(
-            collection_name=self.collection_name,
-            vectors_config=VectorParams(size=1536, distance=Distance.COSINE),  # OpenAI embedding size
-        )
+        if not self.index_reused:
+            self._build_collection(client)
         
         # Create vector store
         self.vectorstore = QdrantVectorStore(
@@ -92,15 +210,113 @@ class ProductionRAGChain:
             embedding=self.cached_embeddings.get_embeddings()
         )
         
-        # Add documents
-        self.vectorstore.add_documents(docs)
-        
         # Create retriever
         self.retriever = self.vectorstore.as_retriever(
             search_type="mmr", 
             search_kwargs={"k": 3}
         )
     
+    def _prune_stale_collections(self, client: QdrantClient):
+        """Delete collections and markers built from an older version of this file.
+        
+        Only markers with this chain's chunking and embedding settings are
+        pruned, and never a collection another chain in this process serves.
+        
+        Args:
+            client: Qdrant client of the index directory
+        """
+        source = os.path.abspath(self.file_path)
+        settings = {
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "embedding_model": self.embedding_model,
+        }
+        with _qdrant_clients_lock:
+            in_use = {name for path, name in _open_collections if path == os.path.abspath(self.index_dir)}
+        for name in os.listdir(self.index_dir):
+            if not name.endswith(".json"):
+                continue
+            marker_path = os.path.join(self.index_dir, name)
+            try:
+                with open(marker_path) as f:
+                    marker = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if marker.get("file_path") != source or marker.get("fingerprint") == self.fingerprint:
+                continue
+            if any(marker.get(key) != value for key, value in settings.items()):
+                continue
+            collection = name[:-len(".json")]
+            if collection in in_use:
+                continue
+            if client.collection_exists(collection):
+                client.delete_collection(collection)
+            os.remove(marker_path)
+            logger.info("Pruned stale index %s for %s", collection, source)
+    
+    def _build_collection(self, client: QdrantClient):
+        """Load, chunk and embed the PDF, then index the chunks into a new collection.
+        
+        Args:
+            client: Qdrant client to create the collection in
+        """
+        # Load and chunk documents
+        start = time.perf_counter()
+        loader = PyMuPDFLoader(self.file_path)
+        documents = loader.load()
+        self.timings["load_s"] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        docs = self.text_splitter.split_documents(documents)
+        
+        # Add metadata
+        for i, doc in enumerate(docs):
+            doc.metadata["source"] = f"source_{i}"
+        self.timings["split_s"] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        vectors = self.cached_embeddings.get_embeddings().embed_documents([doc.page_content for doc in docs])
+        self.timings["embed_s"] = time.perf_counter() - start
+        
+        # Vector size comes from the model's output, so any embedding model fits;
+        # a PDF without text has no vectors to measure, so probe the model instead
+        start = time.perf_counter()
+        size = len(vectors[0]) if vectors else len(self.cached_embeddings.get_embeddings().embed_query(self.file_path))
+        client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config=VectorParams(size=size, distance=Distance.COSINE),
+        )
+        points = [
+            PointStruct(
+                id=str(uuid.uuid4()),
+                vector=vector,
+                payload={
+                    QdrantVectorStore.CONTENT_KEY: doc.page_content,
+                    QdrantVectorStore.METADATA_KEY: doc.metadata,
+                },
+            )
+            for doc, vector in zip(docs, vectors)
+        ]
+        for i in range(0, len(points), 256):
+            client.upsert(collection_name=self.collection_name, points=points[i:i + 256])
+        self.timings["index_s"] = time.perf_counter() - start
+        
+        if self.persist:
+            with open(self._marker_path(), "w") as f:
+                json.dump(
+                    {
+                        "file_path": os.path.abspath(self.file_path),
+                        "fingerprint": self.fingerprint,
+                        "chunk_size": self.chunk_size,
+                        "chunk_overlap": self.chunk_overlap,
+                        "embedding_model": self.embedding_model,
+                        "chunks": len(docs),
+                        "build_s": sum(self.timings[k] for k in ("load_s", "split_s", "embed_s", "index_s")),
+                    },
+                    f,
+                    indent=2,
+                )
+    
     def _setup_chain(self):
         """Set up the RAG chain."""
         # Create prompt template
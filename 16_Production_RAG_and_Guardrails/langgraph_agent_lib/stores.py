@@ -0,0 +1,233 @@
+"""Packed single-file byte store for the embedding cache.
+
+`LocalFileStore` writes one file per cached embedding: hundreds of thousands of
+chunks mean as many inodes, slow directory scans and an open/read/close per
+lookup. `SQLiteByteStore` keeps every key/value pair in one SQLite file:
+- `mget`/`mset`/`mdelete` run as a few batched statements in one transaction.
+- Reads go through SQLite's memory-mapped I/O (`mmap_size`), so hot pages are
+  served from the page cache without read syscalls.
+- Each thread reads through its own connection, and WAL journaling lets those
+  reads proceed while the single writer connection commits a batch.
+- `compact()` reclaims the space of deleted or overwritten entries offline.
+
+`migrate_local_file_store` copies an existing `LocalFileStore` directory into a
+`SQLiteByteStore`.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.stores import ByteStore
+
+logger = logging.getLogger(__name__)
+
+# Stay well below SQLite's bound-parameter limit on older builds (999)
+_MAX_PARAMS = 500
+
+
+class SQLiteByteStore(ByteStore):
+    """ByteStore backed by one SQLite file, with batched access and memory-mapped reads."""
+
+    def __init__(self, db_path: str, *, mmap_size: int = 256 * 1024 * 1024, cache_size_kb: int = 16 * 1024):
+        """Open (or create) the store.
+
+        Args:
+            db_path: Path of the SQLite file; parent directories are created
+            mmap_size: Bytes of the file SQLite may memory-map for reads (0 disables)
+            cache_size_kb: SQLite page cache size in KiB
+        """
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        # One writer connection shared across threads; the lock serializes writes on it
+        self._conn = self._connect()
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # A rowid table: values are KiB-sized, too large for WITHOUT ROWID's clustered pages
+            self._conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        # Readers get one connection per thread, so lookups never wait on each other or on a write
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size={-int(self.cache_size_kb)}")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Get the values for keys, None where missing.
+
+        Args:
+            keys: Keys to look up
+
+        Returns:
+            Values in the order of keys
+        """
+        found: Dict[str, bytes] = {}
+        unique = list(dict.fromkeys(keys))
+        conn = self._reader()
+        for i in range(0, len(unique), _MAX_PARAMS):
+            batch = unique[i:i + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            found.update(conn.execute(f"SELECT key, value FROM kv WHERE key IN ({placeholders})", batch))
+        return [found.get(key) for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
+        """Set values for keys in a single transaction.
+
+        Args:
+            key_value_pairs: (key, value) pairs to write
+        """
+        if not key_value_pairs:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", key_value_pairs)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        """Delete keys in a single transaction; missing keys are ignored.
+
+        Args:
+            keys: Keys to delete
+        """
+        if not keys:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("DELETE FROM kv WHERE key = ?", [(key,) for key in keys])
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        """Yield keys in sorted order, optionally only those starting with prefix.
+
+        Args:
+            prefix: Key prefix to filter on
+        """
+        if prefix:
+            # Range scan on the primary key instead of LIKE, which would need escaping
+            query, params = "SELECT key FROM kv WHERE key >= ? AND key < ? ORDER BY key", (prefix, prefix + "\U0010ffff")
+        else:
+            query, params = "SELECT key FROM kv ORDER BY key", ()
+        keys = [row[0] for row in self._reader().execute(query, params)]
+        yield from keys
+
+    def __len__(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def get_meta(self, name: str) -> Optional[str]:
+        """Read a bookkeeping value stored beside the entries (e.g. a completed migration)."""
+        row = self._reader().execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str) -> None:
+        """Write a bookkeeping value; it is not a key of the store."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def size_bytes(self) -> int:
+        """Bytes on disk, including the write-ahead log."""
+        return sum(
+            os.path.getsize(path)
+            for path in (self.db_path, f"{self.db_path}-wal")
+            if os.path.exists(path)
+        )
+
+    def compact(self) -> int:
+        """Checkpoint the WAL and rewrite the file without free pages.
+
+        Run it offline: VACUUM needs exclusive access and rewrites the whole file.
+
+        Returns:
+            Bytes reclaimed
+        """
+        before = self.size_bytes()
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        reclaimed = before - self.size_bytes()
+        logger.info("Compacted %s: reclaimed %d bytes", self.db_path, reclaimed)
+        return reclaimed
+
+    def close(self) -> None:
+        """Close the writer and every thread's reader connection."""
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_local_file_store(
+    root_path: str,
+    store: ByteStore,
+    batch_size: int = 1000,
+    skip: Sequence[str] = (),
+    prefix: Optional[str] = None,
+) -> int:
+    """Copy the entries of a LocalFileStore directory into another ByteStore.
+
+    Keys are file paths relative to root_path with "/" separators, as
+    LocalFileStore names them. Existing keys in the target are overwritten,
+    so an interrupted migration can simply be run again.
+
+    Args:
+        root_path: Root directory of the LocalFileStore
+        store: Target store, e.g. a SQLiteByteStore
+        batch_size: Entries per mset call
+        skip: Absolute paths of files to leave out (e.g. the target's own files)
+        prefix: Only copy keys starting with this (e.g. an embedding namespace);
+            directories that cannot hold such keys are not walked
+
+    Returns:
+        Number of entries copied
+    """
+    root_path = os.path.abspath(root_path)
+    skipped = {os.path.abspath(path) for path in skip}
+    copied = 0
+    batch: List[Tuple[str, bytes]] = []
+    for directory, dirs, files in os.walk(root_path):
+        relative_dir = os.path.relpath(directory, root_path).replace(os.sep, "/")
+        relative_dir = "" if relative_dir == "." else relative_dir + "/"
+        if prefix:
+            dirs[:] = [
+                d for d in dirs
+                if (relative_dir + d + "/").startswith(prefix) or prefix.startswith(relative_dir + d + "/")
+            ]
+        for name in files:
+            path = os.path.join(directory, name)
+            key = relative_dir + name
+            if path in skipped or (prefix and not key.startswith(prefix)):
+                continue
+            with open(path, "rb") as f:
+                batch.append((key, f.read()))
+            if len(batch) >= batch_size:
+                store.mset(batch)
+                copied += len(batch)
+                batch = []
+    if batch:
+        store.mset(batch)
+        copied += len(batch)
+    logger.info("Migrated %d entries from %s", copied, root_path)
+    return copied